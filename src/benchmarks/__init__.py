@@ -0,0 +1 @@
+# Benchmarks - standalone scripts, run from the src/ directory (e.g. python -m benchmarks.straico_load)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Conversation history microbenchmark.
+
+Replays a skewed message stream over many channels against the previous
+list-and-slice ConversationHistory and the ring-buffer one
+(services.conversation), reporting append and read throughput and the
+memory each holds afterwards (text excluded: both share the same
+strings). Run from the src/ directory:
+
+    python -m benchmarks.conversation_history --channels 10000 --messages 500000
+    python -m benchmarks.conversation_history --scope user --users 500 --channels 1000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.conversation import ConversationHistory
+from services.scopes import SCOPES, THREAD, scope_key
+
+
+class LegacyHistory:
+    """The pre-ring-buffer implementation, kept here as the baseline."""
+
+    def __init__(self, max_history: int = 50):
+        self.history: Dict[int, List[Dict]] = {}
+        self.max_history = max_history
+        self.logger = logging.getLogger(__name__)
+
+    def add_message(self, channel_id: int, role: str, content: str, username: str = None):
+        if channel_id not in self.history:
+            self.history[channel_id] = []
+        message = {"role": role, "content": content}
+        if username:
+            message["name"] = username
+        self.history[channel_id].append(message)
+        if len(self.history[channel_id]) > self.max_history:
+            self.history[channel_id] = self.history[channel_id][-self.max_history:]
+        self.logger.debug(f"Added message to channel {channel_id}: {role}")
+
+    def get_history(self, channel_id: int) -> List[Dict]:
+        return self.history.get(channel_id, [])
+
+
+def make_stream(channels: int, messages: int, seed: int, scope: str = THREAD, users: int = 200):
+    """(scope key, role, text, name) tuples; a few hot channels get most traffic."""
+    rng = random.Random(seed)
+    texts = [f"message {i} " + "lorem ipsum " * rng.randint(1, 20) for i in range(1000)]
+    stream = []
+    for _ in range(messages):
+        channel = min(int(rng.paretovariate(1.2)) - 1, channels - 1)
+        channel = channel if rng.random() < 0.7 else rng.randrange(channels)
+        user = rng.randrange(users)
+        key = scope_key(scope, channel, user)
+        if rng.random() < 0.5:
+            stream.append((key, "user", rng.choice(texts), f"user{user}"))
+        else:
+            stream.append((key, "assistant", rng.choice(texts), None))
+    return stream
+
+
+def run_one(name: str, factory: Callable[[], object], stream, reads: int) -> Dict:
+    history = factory()
+    gc.collect()
+    started = time.perf_counter()
+    for channel, role, text, user in stream:
+        history.add_message(channel, role, text, user)
+    append_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for channel, _, _, _ in stream[:reads]:
+        # What a reply does: read the history and look at the newest message
+        messages = history.get_history(channel)
+        if messages:
+            messages[-1]['content']
+    read_s = time.perf_counter() - started
+
+    # Memory in a separate pass; tracemalloc would distort the timings
+    del history
+    gc.collect()
+    tracemalloc.start()
+    history = factory()
+    for channel, role, text, user in stream:
+        history.add_message(channel, role, text, user)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'implementation': name,
+        'appends_per_s': round(len(stream) / append_s),
+        'reads_per_s': round(reads / read_s) if read_s else 0,
+        'histories': len(history.history) if isinstance(history, LegacyHistory) else history.get_scope_count(),
+        'retained_mib': round(retained / 2 ** 20, 1),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark per-channel conversation history")
+    parser.add_argument('--channels', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=500000)
+    parser.add_argument('--scope', choices=SCOPES, default=THREAD,
+                        help="History scope; 'user' multiplies the number of histories by --users")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--max-history', type=int, default=50)
+    parser.add_argument('--reads', type=int, default=100000)
+    parser.add_argument('--max-total-messages', type=int, default=200000,
+                        help="Global cap for the ring-buffer history")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Optional path for a JSON results artifact")
+    return parser
+
+
+def main(args):
+    stream = make_stream(args.channels, args.messages, args.seed, args.scope, args.users)
+    reads = min(args.reads, len(stream))
+    rows = [
+        run_one("list+slice", lambda: LegacyHistory(args.max_history), stream, reads),
+        run_one("ring buffer", lambda: ConversationHistory(args.max_history,
+                                                           max_total_messages=args.max_total_messages),
+                stream, reads),
+    ]
+
+    print(f"{args.messages} messages over {args.channels} channels (per {args.scope}), "
+          f"{args.max_history} kept per history\n")
+    header = f"{'implementation':<16} {'appends/s':>12} {'reads/s':>12} {'histories':>10} {'retained MiB':>13}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['implementation']:<16} {row['appends_per_s']:>12} {row['reads_per_s']:>12} {row['histories']:>10} "
+              f"{row['retained_mib']:>13}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())
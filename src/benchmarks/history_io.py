@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+History export/import throughput benchmark.
+
+Builds a synthetic history database, then exports it in each available
+dump format (services.history_io) and imports it back into a fresh
+database, reporting throughput and the peak memory each direction
+allocates. Peak memory should track the largest scope, not the dump
+size. Run from the src/ directory:
+
+    python -m benchmarks.history_io --scopes 20000 --messages-per-scope 50
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.history_io import import_into_database, msgpack, read_records, records_from_database, write_records
+from services.history_store import open_database
+
+
+def build_database(path: str, scopes: int, per_scope: int, seed: int) -> int:
+    rng = random.Random(seed)
+    texts = [f"message {i} " + "lorem ipsum dolor sit amet " * rng.randint(1, 30) for i in range(500)]
+    db = open_database(path)
+    rows = 0
+    for scope in range(scopes):
+        key = str(1_000_000_000 + scope)
+        batch = [(key, rng.choice(("user", "assistant")), rng.choice(texts), f"user{rng.randrange(200)}", 0, time.time())
+                 for _ in range(per_scope)]
+        db.executemany(
+            "INSERT INTO messages (scope, role, content, name, summary, created) VALUES (?, ?, ?, ?, ?, ?)", batch
+        )
+        rows += len(batch)
+    db.commit()
+    db.close()
+    return rows
+
+
+def measure(fn: Callable[[], object]) -> Dict:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    # Second run only for the allocation peak; tracemalloc would skew the timing
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_mib': round(peak / 2 ** 20, 2)}
+
+
+def run(args, workdir: str) -> List[Dict]:
+    source = os.path.join(workdir, "source.db")
+    rows = build_database(source, args.scopes, args.messages_per_scope, args.seed)
+    db_bytes = os.path.getsize(source)
+
+    formats = ["jsonl", "jsonl.gz"] + (["msgpack", "msgpack.gz"] if msgpack is not None else [])
+    results = []
+    for fmt in formats:
+        dump = os.path.join(workdir, f"dump.{fmt}")
+        target = os.path.join(workdir, f"target-{fmt}.db")
+        exported = measure(lambda: write_records(records_from_database(source), dump))
+        dump_bytes = os.path.getsize(dump)
+        imported = measure(lambda: import_into_database(read_records(dump), target, batch_size=args.batch_size))
+        for direction, m in (("export", exported), ("import", imported)):
+            results.append({
+                'format': fmt,
+                'direction': direction,
+                'messages_per_s': round(rows / m['seconds']),
+                'mb_per_s': round(db_bytes / m['seconds'] / 1e6, 1),
+                'dump_mib': round(dump_bytes / 2 ** 20, 1),
+                'peak_mib': m['peak_mib'],
+            })
+    print(f"{rows} messages in {args.scopes} scopes, database {db_bytes / 2 ** 20:.1f} MiB\n")
+    return results
+
+
+def print_table(rows: List[Dict]):
+    header = f"{'format':<12} {'direction':<10} {'messages/s':>12} {'DB MB/s':>9} {'dump MiB':>9} {'peak MiB':>9}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        print(f"{row['format']:<12} {row['direction']:<10} {row['messages_per_s']:>12} {row['mb_per_s']:>9} "
+              f"{row['dump_mib']:>9} {row['peak_mib']:>9}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark streaming history export and import")
+    parser.add_argument('--scopes', type=int, default=20000)
+    parser.add_argument('--messages-per-scope', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows per import transaction")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Directory for the databases and dumps (default: a temp dir)")
+    parser.add_argument('--json', help="Optional path for a JSON results artifact")
+    return parser
+
+
+def main(args):
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        rows = run(args, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            rows = run(args, workdir)
+    print_table(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Decode-cost benchmark for Straico response bodies.
+
+Compares the old text() + json.loads path with decoding raw bytes through
+each available decoder (services.decoding) on synthetic image/video
+generation status payloads of growing size. Run from the src/ directory:
+
+    python -m benchmarks.json_decode --items 10,100,1000,10000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.decoding import DECODERS, decode_body
+
+
+def make_status_payload(items: int, rng: random.Random) -> bytes:
+    """A generation-status style body with ``items`` image/video results."""
+    results = []
+    for i in range(items):
+        results.append({
+            "id": f"gen-{i:06d}",
+            "status": rng.choice(["completed", "processing", "queued"]),
+            "model": rng.choice(["openai/dall-e-3", "flux/1.1", "runway-gen3", "kling/v2"]),
+            "prompt": "a lighthouse on a cliff at dusk, volumetric fog, " * 2,
+            "urls": [f"https://cdn.example.com/{i}/{v}.png" for v in range(4)],
+            "size": {"width": 1024, "height": 1024},
+            "progress": round(rng.random(), 3),
+            "price": {"coins": rng.randint(10, 200), "words": None},
+            "created_at": 1700000000 + i,
+        })
+    body = {"success": True, "data": {"generations": results, "total": items}}
+    return json.dumps(body).encode()
+
+
+def _legacy(raw: bytes):
+    # What the client did before: decode to str, then json.loads the text
+    return json.loads(raw.decode('utf-8'))
+
+
+def time_decoder(fn: Callable[[bytes], object], raw: bytes, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(raw)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run(items: List[int], repeat: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    strategies: Dict[str, Callable[[bytes], object]] = {"text+json.loads": _legacy}
+    for name, decoder in DECODERS.items():
+        strategies[f"bytes:{name}"] = lambda raw, decoder=decoder: decode_body(raw, decoder)
+
+    rows = []
+    for count in items:
+        raw = make_status_payload(count, rng)
+        # Scale repeats down for big bodies so each level takes similar time
+        level_repeat = max(5, repeat // max(1, count // 100))
+        for name, fn in strategies.items():
+            samples = time_decoder(fn, raw, level_repeat)
+            median = statistics.median(samples)
+            rows.append({
+                'items': count,
+                'bytes': len(raw),
+                'decoder': name,
+                'median_us': round(median * 1e6, 1),
+                'mb_per_s': round(len(raw) / median / 1e6, 1) if median else 0.0,
+            })
+    return rows
+
+
+def print_table(rows: List[Dict]):
+    header = f"{'items':>7} {'KiB':>9} {'decoder':<18} {'median µs':>11} {'MB/s':>8} {'vs text':>8}"
+    print(header)
+    print('-' * len(header))
+    baseline = {}
+    for row in rows:
+        if row['decoder'] == 'text+json.loads':
+            baseline[row['items']] = row['median_us']
+        speedup = baseline.get(row['items'], row['median_us']) / row['median_us'] if row['median_us'] else 0
+        print(f"{row['items']:>7} {row['bytes'] / 1024:>9.1f} {row['decoder']:<18} {row['median_us']:>11} "
+              f"{row['mb_per_s']:>8} {speedup:>7.2f}x")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding of Straico response bodies")
+    parser.add_argument('--items', type=lambda s: [int(c) for c in s.split(',')], default=[10, 100, 1000, 10000],
+                        help="Generation results per payload, comma-separated")
+    parser.add_argument('--repeat', type=int, default=200, help="Decodes per strategy at 100 items (scaled by size)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Optional path for a JSON results artifact")
+    return parser
+
+
+def main(args):
+    print(f"Available decoders: {', '.join(DECODERS)}\n")
+    rows = run(args.items, args.repeat, args.seed)
+    print_table(rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())
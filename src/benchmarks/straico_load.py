@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test for StraicoService against the local Straico stand-in.
+
+Reports p50/p95/p99 latency, throughput and connection-pool saturation at
+each concurrency level. Run from the src/ directory:
+
+    python -m benchmarks.straico_load --concurrency 1,10,100,1000 --latency lognormal:200:0.5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List
+
+import aiohttp
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.straico_stub import StraicoStubServer, StubConfig, LatencyModel
+from core.errors import APIError
+from services.straico import StraicoService
+
+
+# Operation name -> coroutine factory taking the service
+OPERATIONS = {
+    'chat': lambda s: s.chat_completion(model="openai/gpt-5", messages=[{"role": "user", "content": "ping"}]),
+    'image': lambda s: s.generate_image(model="openai/dall-e-3", description="bench", size="square", variations=1),
+    'video': lambda s: s.generate_video("bench"),
+    'status': lambda s: s.get_generation_status("bench-generation"),
+    'models': lambda s: s.get_models(),
+    'user': lambda s: s.get_user_info(),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class PoolProbe:
+    """Observes connector behaviour through aiohttp tracing hooks."""
+
+    def __init__(self):
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_connection_queued_start.append(self._queued_start)
+        self.trace_config.on_connection_queued_end.append(self._queued_end)
+        self.trace_config.on_connection_create_end.append(self._created)
+        self.trace_config.on_connection_reuseconn.append(self._reused)
+        self.reset()
+
+    def reset(self):
+        self.queued = 0
+        self.queue_waits: List[float] = []
+        self.created = 0
+        self.reused = 0
+
+    async def _queued_start(self, session, ctx, params):
+        ctx.queued_at = time.perf_counter()
+        self.queued += 1
+
+    async def _queued_end(self, session, ctx, params):
+        self.queue_waits.append(time.perf_counter() - getattr(ctx, 'queued_at', time.perf_counter()))
+
+    async def _created(self, session, ctx, params):
+        self.created += 1
+
+    async def _reused(self, session, ctx, params):
+        self.reused += 1
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    requests: int
+    ok: int
+    errors: Dict[str, int] = field(default_factory=dict)
+    duration_s: float = 0.0
+    throughput_rps: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    pool_queued_pct: float = 0.0
+    pool_wait_p95_ms: float = 0.0
+    connections_created: int = 0
+    connections_reused: int = 0
+    server_peak_in_flight: int = 0
+
+
+async def run_level(service: StraicoService, stub: StraicoStubServer, probe: PoolProbe,
+                    concurrency: int, total_requests: int, mix: Dict[str, float],
+                    rng: random.Random) -> LevelResult:
+    probe.reset()
+    stub.reset_stats()
+    service.invalidate_cache()
+
+    operations = list(mix.keys())
+    weights = list(mix.values())
+    plan = rng.choices(operations, weights=weights, k=total_requests)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    async def caller():
+        nonlocal next_index
+        while next_index < len(plan):
+            op = plan[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await OPERATIONS[op](service)
+                latencies.append(time.perf_counter() - started)
+            except APIError as e:
+                key = str(e.status_code or 'timeout/network')
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    waits = sorted(probe.queue_waits)
+    return LevelResult(
+        concurrency=concurrency,
+        requests=total_requests,
+        ok=len(latencies),
+        errors=errors,
+        duration_s=round(duration, 3),
+        throughput_rps=round(len(latencies) / duration, 1) if duration else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        p95_ms=round(percentile(latencies, 95) * 1000, 1),
+        p99_ms=round(percentile(latencies, 99) * 1000, 1),
+        max_ms=round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        pool_queued_pct=round(100.0 * probe.queued / total_requests, 1) if total_requests else 0.0,
+        pool_wait_p95_ms=round(percentile(waits, 95) * 1000, 1),
+        connections_created=probe.created,
+        connections_reused=probe.reused,
+        server_peak_in_flight=stub.peak_in_flight,
+    )
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_error_rates(spec: str) -> Dict[int, float]:
+    rates = {}
+    if spec:
+        for part in spec.split(','):
+            status, _, rate = part.partition('=')
+            rates[int(status)] = float(rate)
+    return rates
+
+
+def print_table(results: List[LevelResult]):
+    header = f"{'conc':>5} {'reqs':>6} {'ok':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queued%':>8} {'wait95':>8} {'conns':>6} {'srvpeak':>7}  errors"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r.concurrency:>5} {r.requests:>6} {r.ok:>6} {r.throughput_rps:>8} {r.p50_ms:>8} {r.p95_ms:>8} "
+              f"{r.p99_ms:>8} {r.pool_queued_pct:>8} {r.pool_wait_p95_ms:>8} {r.connections_created:>6} "
+              f"{r.server_peak_in_flight:>7}  {r.errors or '-'}")
+
+
+async def main(args):
+    stub_config = StubConfig(
+        latency=LatencyModel.parse(args.latency),
+        error_rates=parse_error_rates(args.errors),
+        payload_bytes=args.payload_bytes,
+        seed=args.seed,
+    )
+    probe = PoolProbe()
+    rng = random.Random(args.seed)
+    results = []
+
+    async with StraicoStubServer(stub_config) as stub:
+        print(f"Stub server at {stub.url} (latency={stub_config.latency}, errors={stub_config.error_rates}, "
+              f"payload={stub_config.payload_bytes}B)")
+        print(f"Pool: limit={args.pool_size}, limit_per_host={args.limit_per_host}\n")
+
+        service = StraicoService(
+            api_key="benchmark",
+            base_url=stub.url,
+            connection_pool_size=args.pool_size,
+            limit_per_host=args.limit_per_host,
+            trace_configs=[probe.trace_config],
+        )
+        async with service:
+            for concurrency in args.concurrency:
+                total = max(args.requests, concurrency)
+                results.append(await run_level(service, stub, probe, concurrency, total, args.mix, rng))
+
+    print_table(results)
+    print("\nqueued% = share of requests that waited for a free pooled connection; "
+          "srvpeak = peak concurrent requests seen by the server.")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps([asdict(r) for r in results], indent=2))
+        print(f"Results written to {args.json}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load-test StraicoService against a local Straico stand-in")
+    parser.add_argument('--concurrency', type=lambda s: [int(c) for c in s.split(',')], default=[1, 10, 100, 1000],
+                        help="Comma-separated concurrent caller counts (default: 1,10,100,1000)")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per concurrency level (min: concurrency)")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('chat=6,image=1,status=1,models=1,user=1'),
+                        help="Weighted operation mix, e.g. chat=6,image=1,video=1,status=1,models=1,user=1")
+    parser.add_argument('--latency', default='lognormal:200:0.5',
+                        help="Server latency distribution: fixed:MS, uniform:LO:HI, lognormal:MEDIAN:SIGMA, exponential:MEAN")
+    parser.add_argument('--errors', default='', help="Injected error rates, e.g. 500=0.02,422=0.01,429=0.01")
+    parser.add_argument('--payload-bytes', type=int, default=512, help="Filler bytes added to each response body")
+    parser.add_argument('--pool-size', type=int, default=10, help="TCPConnector limit")
+    parser.add_argument('--limit-per-host', type=int, default=5, help="TCPConnector limit_per_host")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', help="Optional path for a JSON results artifact")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
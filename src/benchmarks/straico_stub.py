@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Straico API used by the load-test benchmarks.
+
+Serves the endpoints StraicoService talks to with configurable latency,
+error injection (500/422/429) and response payload sizes.
+"""
+
+import asyncio
+import json
+import math
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from config.models import STRAICO_MODELS, STRAICO_IMAGE_MODELS
+
+
+class LatencyModel:
+    """Latency distribution, parsed from specs like ``fixed:50``,
+    ``uniform:20:200``, ``lognormal:150:0.6`` or ``exponential:100`` (ms)."""
+
+    def __init__(self, kind: str = "fixed", *params: float):
+        if kind not in ("fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.params = params or (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        kind, *raw = spec.split(':')
+        return cls(kind, *(float(p) for p in raw))
+
+    def sample(self, rng: random.Random) -> float:
+        """Return a latency in seconds."""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "lognormal":
+            # median in ms, sigma of the underlying normal
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-3)), p[1] if len(p) > 1 else 0.5)
+        else:
+            ms = rng.expovariate(1.0 / max(p[0], 1e-3))
+        return max(ms, 0.0) / 1000.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{':'.join(str(p) for p in self.params)}"
+
+
+@dataclass
+class StubConfig:
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    # Per-route overrides, keyed by route name (completion, image, video, status, models, user,
+    # stream_chunk for the gap between streamed completion events)
+    route_latency: Dict[str, LatencyModel] = field(default_factory=dict)
+    error_rates: Dict[int, float] = field(default_factory=dict)
+    payload_bytes: int = 512
+    retry_after: int = 1
+    seed: Optional[int] = None
+
+
+class StraicoStubServer:
+    """aiohttp application mimicking the Straico API response shapes.
+
+    Usage::
+
+        async with StraicoStubServer(StubConfig()) as stub:
+            service = StraicoService("test-key", base_url=stub.url)
+    """
+
+    def __init__(self, config: StubConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.rng = random.Random(self.config.seed)
+        self._runner = None
+        self.url = None
+
+        # Server-side observations
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_served = 0
+        self.errors_injected: Dict[int, int] = {}
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post('/v1/prompt/completion', self._route('completion', self._completion)),
+            web.post('/v1/image/generation', self._route('image', self._image)),
+            web.post('/videos/generations', self._route('video', self._video)),
+            web.get('/generations/{generation_id}', self._route('status', self._status)),
+            web.get('/v1/models', self._route('models', self._models)),
+            web.get('/v1/user', self._route('user', self._user)),
+        ])
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self._runner.addresses:
+            self.port = self._runner.addresses[0][1]
+        self.url = f"http://{self.host}:{self.port}"
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def reset_stats(self):
+        self.peak_in_flight = self.in_flight
+        self.requests_served = 0
+        self.errors_injected = {}
+
+    def _route(self, name, handler):
+        async def wrapped(request: web.Request) -> web.Response:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                latency = self.config.route_latency.get(name, self.config.latency)
+                await asyncio.sleep(latency.sample(self.rng))
+
+                error = self._pick_error()
+                if error:
+                    self.errors_injected[error] = self.errors_injected.get(error, 0) + 1
+                    headers = {'Retry-After': str(self.config.retry_after)} if error == 429 else None
+                    return web.json_response({"success": False, "error": f"Injected {error}"},
+                                             status=error, headers=headers)
+
+                result = await handler(request)
+                if isinstance(result, web.StreamResponse):
+                    return result
+                return web.json_response(result)
+            finally:
+                self.in_flight -= 1
+                self.requests_served += 1
+        return wrapped
+
+    def _pick_error(self) -> Optional[int]:
+        roll = self.rng.random()
+        for status, rate in self.config.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def _filler(self) -> str:
+        return "x" * max(self.config.payload_bytes, 0)
+
+    async def _completion(self, request):
+        body = await request.json()
+        models = body.get('models') or ["stub/model"]
+        content = f"Echo: {body.get('message', '')[:200]} {self._filler()}"
+        if body.get('stream'):
+            return await self._stream_completion(request, content)
+        return {
+            "data": {
+                "completions": {
+                    model: {"completion": {"choices": [{"message": {"role": "assistant", "content": content}}]}}
+                    for model in models
+                },
+                "overall_price": {"total": 1}
+            },
+            "success": True
+        }
+
+    async def _stream_completion(self, request, content: str) -> web.StreamResponse:
+        """Server-Sent Events variant, one OpenAI-style delta per word."""
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        latency = self.config.route_latency.get('stream_chunk', LatencyModel('fixed', 5))
+        for word in content.split(' '):
+            event = {"choices": [{"delta": {"content": word + ' '}}]}
+            await response.write(f"data: {json.dumps(event)}\n\n".encode())
+            await asyncio.sleep(latency.sample(self.rng))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _image(self, request):
+        body = await request.json()
+        variations = int(body.get('variations', 1) or 1)
+        return {
+            "data": {
+                "images": [f"https://stub.invalid/{uuid.uuid4().hex}.png" for _ in range(variations)],
+                "padding": self._filler()
+            },
+            "success": True
+        }
+
+    async def _video(self, request):
+        return {"id": uuid.uuid4().hex, "status": "queued"}
+
+    async def _status(self, request):
+        generation_id = request.match_info['generation_id']
+        return {
+            "id": generation_id,
+            "status": "completed",
+            "url": f"https://stub.invalid/{generation_id}.mp4",
+            "metadata": self._filler()
+        }
+
+    async def _models(self, request):
+        return {
+            "data": {
+                "chat": [{"name": m, "model": m, "word_limit": 100000} for m in STRAICO_MODELS],
+                "image": [{"name": m, "model": m} for m in STRAICO_IMAGE_MODELS]
+            },
+            "success": True
+        }
+
+    async def _user(self, request):
+        return {"data": {"first_name": "Stub", "coins": 100000.0, "plan": "benchmark"}, "success": True}
@@ -107,4 +107,34 @@ STRAICO_IMAGE_MODELS = [
     "ideogram/V_2_TURBO",
     "ideogram/V_1",
     "ideogram/V_1_TURBO"
-]
\ No newline at end of file
+]
+
+# Approximate context windows in tokens, by model id prefix (longest match wins)
+MODEL_CONTEXT_WINDOWS = {
+    "openai/gpt-5": 400000,
+    "openai/gpt-4.1": 1000000,
+    "openai/gpt-4o": 128000,
+    "openai/o": 200000,
+    "openai/": 128000,
+    "anthropic/": 200000,
+    "google/gemini": 1000000,
+    "amazon/nova-micro": 128000,
+    "amazon/nova": 300000,
+    "cohere/": 128000,
+    "deepseek/": 64000,
+    "meta-llama/": 128000,
+    "mistralai/": 32768,
+    "qwen/": 32768,
+    "x-ai/": 131072,
+    "cognitivecomputations/dolphin-mixtral": 32768,
+    "alpindale/goliath-120b": 6144,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+def context_window(model: str) -> int:
+    best = None
+    for prefix in MODEL_CONTEXT_WINDOWS:
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return MODEL_CONTEXT_WINDOWS[best] if best else DEFAULT_CONTEXT_WINDOW
@@ -1,20 +1,38 @@
 import discord
 from discord.ext import commands
+from dotenv import find_dotenv
+import asyncio
 import importlib
+import json
 import pkgutil
-from typing import Dict, List, Optional, Any
+import sys
+import time
+from typing import AsyncIterator, Dict, List, Optional, Any
 import logging
 from pathlib import Path
 
-from .config import Config
-from .errors import PluginError
+from .config import Config, RESTART_REQUIRED
+from .errors import (PluginError, ConfigurationError, OverloadedError, CircuitOpenError, RateLimitError,
+                     DeadlineExceededError)
+from .reloader import HotReloader
+from .profiler import StartupProfiler
 from plugins.base import BasePlugin
 from services.straico import StraicoService
 from services.conversation import ConversationHistory
+from services.history_store import HistoryStore
+from services.rate_limit import RateLimiter, USER, CHANNEL, GUILD, GLOBAL
+from services.scheduler import AUTO_RESPONSE, BACKGROUND
+from services.completion_cache import CompletionCache
+from services.compaction import HistoryCompactor
+from services.debounce import KeyedDebouncer
+from services.preferences import PreferenceStore, COMPLETION_CACHE
+from services.model_catalog import ModelCatalog
+from services.scopes import scope_key
+from utils.streaming import StreamingReply
 
 
 class StraicoBot(commands.Bot):
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, profiler: Optional[StartupProfiler] = None):
         intents = discord.Intents.default()
         intents.message_content = True
 
@@ -26,47 +44,269 @@ class StraicoBot(commands.Bot):
 
         self.config = config
         self.plugins: Dict[str, BasePlugin] = {}
+        self.plugins_path = Path(__file__).parent.parent / 'plugins'
+        # plugins.<module> -> name of the plugin it registered, for reloads
+        self.plugin_modules: Dict[str, str] = {}
+        # Commands running per plugin, so a replaced version is torn down once idle
+        self._in_flight: Dict[commands.Cog, int] = {}
+        self.reloader: Optional[HotReloader] = None
+        # Stand-in commands per plugin module not imported yet (LAZY_PLUGINS)
+        self._lazy_plugins: Dict[str, List[commands.Command]] = {}
+        self._lazy_locks: Dict[str, asyncio.Lock] = {}
+        self.profiler = profiler or StartupProfiler()
         self.straico_service = None
-        self.conversation_history = ConversationHistory(config.max_history_per_channel)
+        self.history_store = HistoryStore(
+            config.history_db_path,
+            flush_interval=config.history_flush_interval,
+            retention=config.history_retention_days * 86400,
+            keep_per_scope=config.max_history_per_channel
+        ) if config.history_db_path else None
+        self.conversation_history = ConversationHistory(
+            config.max_history_per_channel,
+            max_total_messages=config.history_max_messages,
+            max_total_bytes=config.history_max_bytes,
+            idle_ttl=config.history_idle_ttl,
+            store=self.history_store
+        )
+        self.rate_limiter = RateLimiter({
+            USER: config.rate_limit_user,
+            CHANNEL: config.rate_limit_channel,
+            GUILD: config.rate_limit_guild,
+            GLOBAL: config.rate_limit_global,
+        })
+        self.preferences = PreferenceStore(config.preferences_db_path)
+        self.model_catalog = ModelCatalog(
+            self._fetch_models,
+            path=config.model_catalog_path,
+            refresh_interval=config.model_refresh_interval
+        )
+        self.completion_cache = CompletionCache(
+            path=config.completion_cache_path,
+            max_entries=config.completion_cache_max_entries,
+            ttl=config.completion_cache_ttl,
+            context_messages=config.completion_cache_context
+        )
+        self.compactor = HistoryCompactor(
+            self.conversation_history,
+            self._summarize,
+            threshold=config.compaction_threshold,
+            keep_recent=config.compaction_keep_recent
+        )
+        self.conversation_history.add_listener(self.compactor.maybe_compact)
+        # One auto-response at a time per channel; bursts share a reply
+        self.auto_responder = KeyedDebouncer(
+            self._auto_respond,
+            window=config.auto_response_debounce,
+            max_wait=config.auto_response_max_wait,
+            # A message to a quiet channel is answered at once; only follow-ups wait
+            leading=True
+        )
         self.logger = logging.getLogger(__name__)
 
     async def setup_hook(self):
+        with self.profiler.phase('history store'):
+            if self.history_store:
+                # Opens the database only; channel histories load on first use
+                await self.history_store.start()
+        with self.profiler.phase('preferences'):
+            # Warm-loads in the background; lookups read through until it finishes
+            await self.preferences.start()
+        with self.profiler.phase('completion cache'):
+            await self.completion_cache.start()
+
+        with self.profiler.phase('straico session'):
+            await self._start_straico_service()
+
+        with self.profiler.phase('model catalog'):
+            # Cached or built-in list; the API copy replaces it in the background
+            await self.model_catalog.start()
+
+        with self.profiler.phase('plugins'):
+            await self.load_plugins()
+
+        if self.config.hot_reload_interval > 0:
+            self.reloader = HotReloader(self, self.config.hot_reload_interval, find_dotenv() or None)
+            await self.reloader.start()
+
+    async def _start_straico_service(self):
         # Create a persistent Straico service session
         self.straico_service = StraicoService(
             api_key=self.config.straico_api_key,
-            base_url=self.config.api_base_url
+            base_url=self.config.api_base_url,
+            connection_pool_size=self.config.connection_pool_size,
+            limit_per_host=self.config.connection_limit_per_host,
+            cache_max_entries=self.config.cache_max_entries,
+            cache_max_bytes=self.config.cache_max_bytes,
+            queue_timeout=self.config.api_queue_timeout,
+            breaker_failure_threshold=self.config.breaker_failure_threshold,
+            breaker_recovery_timeout=self.config.breaker_recovery_timeout,
+            chat_deadline=self.config.chat_deadline,
+            hedge_ratio=self.config.hedge_ratio,
+            json_decoder=self.config.json_decoder,
+            extra_api_keys=self.config.extra_api_keys,
+            key_failure_threshold=self.config.key_failure_threshold,
+            key_cooldown=self.config.key_cooldown,
+            key_refresh_interval=self.config.key_refresh_interval,
+            warm_connections=self.config.warm_connections,
+            keepalive_interval=self.config.keepalive_interval,
+            context_token_budget=self.config.context_token_budget
         )
+        self.straico_service.upstream_streaming = self.config.upstream_streaming
         # Initialize the session immediately for performance
         await self.straico_service.__aenter__()
-
-        await self.load_plugins()
+        # Pay DNS/TCP/TLS now rather than on the first command
+        warmed = await self.straico_service.warm_up()
+        self.logger.info(f"Pre-warmed {warmed} Straico connection(s)")
 
     async def on_ready(self):
         self.logger.info(f'{self.user} has connected to Discord!')
         self.logger.info(f'Bot is in {len(self.guilds)} guilds')
-        self.logger.info(f'Loaded {len(self.plugins)} plugins')
+        self.logger.info(f'Loaded {len(self.plugins)} plugins'
+                         f'{f", {len(self._lazy_plugins)} more on first use" if self._lazy_plugins else ""}')
+        if self.profiler.ready is None:
+            # on_ready fires again after reconnects; only the first one ends startup
+            self.profiler.finish(self.logger, self.config.startup_profile_path or None)
+
+    def _read_manifest(self) -> Dict[str, Dict[str, List[str]]]:
+        """plugins/manifest.json: the commands (and their aliases) each plugin module registers."""
+        path = self.plugins_path / 'manifest.json'
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            return {module: entry['commands'] for module, entry in manifest.items()}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            self.logger.warning(f"Cannot read {path}, loading every plugin now: {e}")
+            return {}
 
     async def load_plugins(self):
-        plugins_path = Path(__file__).parent.parent / 'plugins'
-
-        for finder, name, ispkg in pkgutil.iter_modules([str(plugins_path)]):
+        manifest = self._read_manifest() if self.config.lazy_plugins else {}
+        for finder, name, ispkg in pkgutil.iter_modules([str(self.plugins_path)]):
             if name == 'base' or name.startswith('_'):
                 continue
 
+            if name in manifest:
+                self._register_lazy_plugin(name, manifest[name])
+                continue
             try:
-                module = importlib.import_module(f'plugins.{name}')
-                if hasattr(module, 'setup'):
-                    plugin = await module.setup(self, self.config)
-                    if isinstance(plugin, BasePlugin):
-                        await self.register_plugin(plugin)
-                        self.logger.info(f"Loaded plugin: {plugin.name}")
-                    else:
-                        self.logger.warning(f"Plugin {name} setup() did not return a BasePlugin instance")
-                else:
-                    self.logger.warning(f"Plugin {name} has no setup() function")
+                await self.load_plugin(name)
+            except PluginError as e:
+                self.logger.error(str(e))
+
+    def _register_lazy_plugin(self, module_name: str, command_names: Dict[str, List[str]]):
+        """Register stand-ins for a plugin's commands; the first one used imports the plugin."""
+        async def load_and_invoke(ctx, *, rest: str = ""):
+            await self._load_lazy_plugin(module_name)
+            # The real command is registered now; dispatch the message again
+            await self.process_commands(ctx.message)
+
+        stubs = []
+        for name, aliases in command_names.items():
+            stub = commands.Command(load_and_invoke, name=name, aliases=aliases, hidden=True)
+            self.add_command(stub)
+            stubs.append(stub)
+        self._lazy_plugins[module_name] = stubs
+        self.logger.info(f"Plugin module {module_name} will load on first use")
+
+    async def _load_lazy_plugin(self, module_name: str):
+        async with self._lazy_locks.setdefault(module_name, asyncio.Lock()):
+            stubs = self._lazy_plugins.pop(module_name, None)
+            if stubs is None:
+                return  # loaded by a command that got here first
+            for stub in stubs:
+                self.remove_command(stub.name)
+            started = time.perf_counter()
+            try:
+                await self.load_plugin(module_name)
+            except PluginError:
+                for stub in stubs:
+                    self.add_command(stub)
+                self._lazy_plugins[module_name] = stubs
+                raise
+            self.logger.info(f"Loaded plugin module {module_name} on first use "
+                             f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    async def _create_plugin(self, module_name: str) -> BasePlugin:
+        with self.profiler.plugin_stage(module_name, 'import'):
+            module = importlib.import_module(f'plugins.{module_name}')
+        if not hasattr(module, 'setup'):
+            raise PluginError(f"Plugin {module_name} has no setup() function")
+        with self.profiler.plugin_stage(module_name, 'setup'):
+            plugin = await module.setup(self, self.config)
+        if not isinstance(plugin, BasePlugin):
+            raise PluginError(f"Plugin {module_name} setup() did not return a BasePlugin instance")
+        return plugin
+
+    async def load_plugin(self, module_name: str) -> BasePlugin:
+        """Import plugins.<module_name> and register the plugin it sets up."""
+        try:
+            plugin = await self._create_plugin(module_name)
+        except Exception as e:
+            raise PluginError(f"Failed to load plugin {module_name}: {e}")
+        with self.profiler.plugin_stage(module_name, 'register'):
+            await self.register_plugin(plugin)
+        self.plugin_modules[module_name] = plugin.name
+        self.logger.info(f"Loaded plugin: {plugin.name}")
+        return plugin
+
+    async def reload_plugin(self, module_name: str) -> Optional[BasePlugin]:
+        """Re-import plugins.<module_name> and swap it in for the running version.
+
+        The new version is imported and set up before the old one is touched,
+        so a broken edit leaves the old version serving. Its commands are then
+        swapped without yielding to the event loop; commands already running
+        finish on the old version, which is torn down once they have. A lazy
+        plugin that has not been used yet stays unloaded; its first use
+        imports the edited files.
+        """
+        package = f'plugins.{module_name}'
+        if module_name in self._lazy_plugins:
+            for name in [name for name in sys.modules if name == package or name.startswith(package + '.')]:
+                del sys.modules[name]
+            return None
+        previous_modules = {name: module for name, module in sys.modules.items()
+                            if name == package or name.startswith(package + '.')}
+        for name in previous_modules:
+            del sys.modules[name]
+        old = self.plugins.get(self.plugin_modules.get(module_name))
 
+        try:
+            plugin = await self._create_plugin(module_name)
+            if plugin.name in self.plugins and (old is None or plugin.name != old.name):
+                raise PluginError(f"Plugin {plugin.name} is already registered")
+            await plugin.setup()
+        except Exception as e:
+            sys.modules.update(previous_modules)
+            raise PluginError(f"Failed to reload plugin {module_name}, keeping the running version: {e}")
+
+        if old is not None:
+            await self._detach_plugin(old)
+        try:
+            await self._attach_plugin(plugin)
+        except Exception as e:
+            if old is not None:
+                await self._attach_plugin(old)
+            sys.modules.update(previous_modules)
+            raise PluginError(f"Failed to reload plugin {module_name}, keeping the running version: {e}")
+        self.plugin_modules[module_name] = plugin.name
+        self.logger.info(f"Reloaded plugin: {plugin.name} {plugin.version}")
+
+        if old is not None:
+            try:
+                await self._retire_plugin(old)
             except Exception as e:
-                self.logger.error(f"Failed to load plugin {name}: {e}")
+                self.logger.error(f"Error during teardown of the replaced {old.name} plugin: {e}")
+        return plugin
+
+    async def unload_plugin_module(self, module_name: str):
+        """Unload whatever plugin plugins.<module_name> registered, e.g. after its files were deleted."""
+        for stub in self._lazy_plugins.pop(module_name, ()):
+            self.remove_command(stub.name)
+        plugin_name = self.plugin_modules.pop(module_name, None)
+        if plugin_name in self.plugins:
+            await self.unload_plugin(plugin_name)
+        package = f'plugins.{module_name}'
+        for name in [name for name in sys.modules if name == package or name.startswith(package + '.')]:
+            del sys.modules[name]
 
     async def register_plugin(self, plugin: BasePlugin):
         if plugin.name in self.plugins:
@@ -74,18 +314,7 @@ class StraicoBot(commands.Bot):
 
         try:
             await plugin.setup()
-
-            # Add the plugin as a cog
-            await self.add_cog(plugin)
-
-            # Also register any manual commands and listeners
-            for command in plugin.get_commands():
-                self.add_command(command)
-
-            for event_name, handler in plugin.get_listeners():
-                self.add_listener(handler, event_name)
-
-            self.plugins[plugin.name] = plugin
+            await self._attach_plugin(plugin)
 
         except Exception as e:
             self.logger.error(f"Failed to register plugin {plugin.name}: {e}")
@@ -98,59 +327,216 @@ class StraicoBot(commands.Bot):
         plugin = self.plugins[plugin_name]
 
         try:
-            await plugin.teardown()
-
-            for command in plugin.get_commands():
-                self.remove_command(command.name)
-
-            for event_name, handler in plugin.get_listeners():
-                self.remove_listener(handler, event_name)
-
-            del self.plugins[plugin_name]
+            await self._detach_plugin(plugin)
+            await self._retire_plugin(plugin)
             self.logger.info(f"Unloaded plugin: {plugin_name}")
 
         except Exception as e:
             self.logger.error(f"Failed to unload plugin {plugin_name}: {e}")
             raise PluginError(f"Failed to unload plugin {plugin_name}: {e}")
 
+    async def _attach_plugin(self, plugin: BasePlugin):
+        # Add the plugin as a cog
+        await self.add_cog(plugin)
+
+        # Also register any manual commands and listeners
+        for command in plugin.get_commands():
+            self.add_command(command)
+
+        for event_name, handler in plugin.get_listeners():
+            self.add_listener(handler, event_name)
+
+        self.plugins[plugin.name] = plugin
+
+    async def _detach_plugin(self, plugin: BasePlugin):
+        # Removing the cog takes its decorated commands with it
+        await self.remove_cog(plugin.qualified_name)
+
+        for command in plugin.get_commands():
+            self.remove_command(command.name)
+
+        for event_name, handler in plugin.get_listeners():
+            self.remove_listener(handler, event_name)
+
+        self.plugins.pop(plugin.name, None)
+
+    async def _retire_plugin(self, plugin: BasePlugin, timeout: float = 60.0):
+        """Tear down a detached plugin once the commands it was running have finished."""
+        deadline = time.monotonic() + timeout
+        while self._in_flight.get(plugin) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self._in_flight.get(plugin):
+            self.logger.warning(f"Tearing down {plugin.name} with {self._in_flight[plugin]} command(s) still running")
+        await plugin.teardown()
+
+    async def invoke(self, ctx):
+        cog = ctx.cog
+        if cog is None:
+            return await super().invoke(ctx)
+        self._in_flight[cog] = self._in_flight.get(cog, 0) + 1
+        try:
+            await super().invoke(ctx)
+        finally:
+            remaining = self._in_flight[cog] - 1
+            if remaining:
+                self._in_flight[cog] = remaining
+            else:
+                del self._in_flight[cog]
+
+    def reload_config(self, env_file: Optional[str] = None) -> Optional[List[str]]:
+        """Re-read the configuration and apply it; returns the settings applied, or None if invalid."""
+        try:
+            config = Config.from_env(env_file, override=True)
+            config.validate()
+        except ConfigurationError as e:
+            self.logger.error(f"Ignoring configuration change: {e}")
+            return None
+        return self.apply_config(config)
+
+    def apply_config(self, config: Config) -> List[str]:
+        """Apply changed settings to the running bot without reconnecting.
+
+        Everything that reads ``self.config`` per request (models, message
+        length, streaming) sees new values at once; limits copied into
+        services at startup are pushed to them here. Settings listed in
+        RESTART_REQUIRED keep their old values. Nothing changed from Discord
+        is kept in the config (``!cache`` and ``!auto`` toggles live in the
+        preferences store), so a reload only moves defaults and never undoes
+        those changes.
+        """
+        changed = self.config.changed_fields(config)
+        deferred = [name for name in changed if name in RESTART_REQUIRED]
+        applied = [name for name in changed if name not in RESTART_REQUIRED]
+        if deferred:
+            self.logger.warning(f"Restart needed to apply: {', '.join(deferred)}")
+        if not applied:
+            return applied
+
+        for name in applied:
+            setattr(self.config, name, getattr(config, name))
+        config = self.config
+
+        self.command_prefix = config.command_prefix
+        history = self.conversation_history
+        if history.max_history != config.max_history_per_channel:
+            history.set_max_history(config.max_history_per_channel)
+        history.max_total_messages = config.history_max_messages
+        history.max_total_bytes = config.history_max_bytes
+        history.idle_ttl = config.history_idle_ttl
+        if self.history_store:
+            self.history_store.keep_per_scope = config.max_history_per_channel
+        if any(name.startswith('rate_limit_') for name in applied):
+            # Fresh budgets; every caller starts with a full bucket
+            self.rate_limiter = RateLimiter({
+                USER: config.rate_limit_user,
+                CHANNEL: config.rate_limit_channel,
+                GUILD: config.rate_limit_guild,
+                GLOBAL: config.rate_limit_global,
+            })
+        self.completion_cache.max_entries = config.completion_cache_max_entries
+        self.completion_cache.ttl = config.completion_cache_ttl
+        self.completion_cache.context_messages = config.completion_cache_context
+        self.compactor.threshold = config.compaction_threshold
+        self.compactor.keep_recent = config.compaction_keep_recent
+        self.auto_responder.window = config.auto_response_debounce
+        self.auto_responder.max_wait = config.auto_response_max_wait
+        if self.straico_service:
+            self.straico_service.upstream_streaming = config.upstream_streaming
+            self.straico_service.apply_settings(
+                chat_deadline=config.chat_deadline,
+                queue_timeout=config.api_queue_timeout,
+                hedge_ratio=config.hedge_ratio,
+                context_token_budget=config.context_token_budget
+            )
+
+        self.logger.info(f"Applied configuration change: {', '.join(applied)}")
+        return applied
+
     async def on_message(self, message):
         if message.author.bot:
             return
 
         await self.process_commands(message)
 
-        if (message.channel.id in self.config.auto_response_channels and
-            not message.content.startswith(self.command_prefix)):
+        if (not message.content.startswith(self.command_prefix) and
+            await self.preferences.auto_response(message.channel.id)):
 
+            scope = self.history_scope(message)
+            await self.conversation_history.ensure_loaded(scope)
             self.conversation_history.add_message(
-                message.channel.id,
+                scope,
                 "user",
                 message.content,
                 message.author.display_name
             )
 
-            async with message.channel.typing():
-                try:
-                    await self._generate_auto_response(message)
-                except Exception as e:
-                    self.logger.error(f"Error in auto-response: {e}")
+            self.auto_responder.submit(scope, message)
+
+    def history_scope(self, source) -> str:
+        """Conversation history key for a message or command context, per HISTORY_SCOPE."""
+        channel = source.channel
+        parent_id = channel.parent_id if isinstance(channel, discord.Thread) else None
+        return scope_key(self.config.history_scope, channel.id, source.author.id, parent_id)
 
-    async def _generate_auto_response(self, message):
-        history = self.conversation_history.get_history(message.channel.id)
+    async def _auto_respond(self, scope: str, messages: List[discord.Message]):
+        """Answer a burst of auto-response messages with one completion.
 
+        Every message is already in the history, so replying to the latest
+        covers them all.
+        """
+        if len(messages) > 1:
+            self.logger.debug(f"Folded {len(messages)} messages in scope {scope} into one reply")
+        message = messages[-1]
+        # One reply, one charge, however many messages it answers
         try:
-            # Use persistent session for better performance
-            response = await self.straico_service.chat_completion(
-                model=self.config.default_chat_model,
-                messages=history,
-                max_tokens=1500
-            )
+            self.check_rate_limit(message.author.id, message.channel.id,
+                                  message.guild.id if message.guild else None)
+        except RateLimitError as e:
+            await self._send_rate_limit_notice(message.channel, e)
+            return
+        async with message.channel.typing():
+            try:
+                await self._generate_auto_response(message, scope)
+            except Exception as e:
+                self.logger.error(f"Error in auto-response: {e}")
+
+    async def _generate_auto_response(self, message, scope: str):
+        history = self.conversation_history.get_history(scope)
+        model = self.config.default_chat_model
+
+        try:
+            if self.config.stream_responses:
+                ai_response = await self.stream_response(
+                    message.channel,
+                    self.cached_stream(message.channel.id, model, history, self.straico_service.stream_chat_completion(
+                        model=model,
+                        messages=history,
+                        priority=AUTO_RESPONSE,
+                        guild_id=message.guild.id if message.guild else None,
+                        max_tokens=1500
+                    ))
+                )
+                if ai_response:
+                    self.conversation_history.add_message(scope, "assistant", ai_response)
+                return
+
+            ai_response = await self.cached_completion(message.channel.id, model, history)
+            if ai_response is None:
+                # Use persistent session for better performance
+                response = await self.straico_service.chat_completion(
+                    model=model,
+                    messages=history,
+                    priority=AUTO_RESPONSE,
+                    guild_id=message.guild.id if message.guild else None,
+                    max_tokens=1500
+                )
 
-            ai_response = self._extract_ai_response(response)
+                ai_response = self._extract_ai_response(response)
+                await self.store_completion(message.channel.id, model, history, ai_response)
 
             if ai_response:
                 self.conversation_history.add_message(
-                    message.channel.id,
+                    scope,
                     "assistant",
                     ai_response
                 )
@@ -161,6 +547,92 @@ class StraicoBot(commands.Bot):
         except Exception as e:
             await self._handle_api_error(message.channel, e)
 
+    async def _fetch_models(self) -> Dict:
+        """Fresh /v1/models response for the model catalog, bypassing the response cache."""
+        self.straico_service.invalidate_cache("/v1/models")
+        return await self.straico_service.get_models()
+
+    async def _summarize(self, prompt: str) -> Optional[str]:
+        """Summary text for the history compactor; queued behind every live request."""
+        response = await self.straico_service.chat_completion(
+            model=self.config.summary_model,
+            messages=[{"role": "user", "content": prompt}],
+            priority=BACKGROUND,
+            hedge=False,
+            # The turns being folded are dropped afterwards, so all of them must reach the model
+            pack_context=False,
+            max_tokens=400
+        )
+        return self._extract_ai_response(response)
+
+    def check_rate_limit(self, user_id: int, channel_id: int, guild_id: Optional[int], cost: float = 1.0):
+        """Charge a request against the rate-limit budgets; raises RateLimitError when exhausted"""
+        retry_after, scope = self.rate_limiter.check(user_id, channel_id, guild_id, cost)
+        if retry_after > 0:
+            reasons = {
+                USER: "You're sending requests too quickly.",
+                CHANNEL: "This channel is sending requests too quickly.",
+                GUILD: "This server is sending requests too quickly.",
+                GLOBAL: "The bot is handling too many requests right now.",
+            }
+            raise RateLimitError(
+                f"{reasons.get(scope, 'Rate limited.')} Try again in {int(retry_after) + 1}s.",
+                retry_after,
+                scope
+            )
+
+    async def _send_rate_limit_notice(self, channel, error: RateLimitError):
+        # Notices clean themselves up so a flood of rejections doesn't become its own spam
+        await channel.send(f"⏳ {error}", delete_after=max(5.0, error.retry_after))
+
+    async def completion_cache_enabled(self, channel_id: int) -> bool:
+        """Toggled with !cache (saved in preferences); otherwise per COMPLETION_CACHE_CHANNELS"""
+        return await self.preferences.completion_cache(channel_id, channel_id in self.config.completion_cache_channels)
+
+    def completion_cache_channels(self) -> set:
+        enabled = set(self.preferences.subjects(COMPLETION_CACHE, "1"))
+        disabled = set(self.preferences.subjects(COMPLETION_CACHE, "0"))
+        return (self.config.completion_cache_channels - disabled) | enabled
+
+    async def cached_completion(self, channel_id: int, model: str, history: List[Dict]) -> Optional[str]:
+        """Cached reply for this context, if the channel has opted in to the completion cache"""
+        if not await self.completion_cache_enabled(channel_id):
+            return None
+        return self.completion_cache.get(channel_id, model, history)
+
+    async def store_completion(self, channel_id: int, model: str, history: List[Dict], text: Optional[str]):
+        if text and await self.completion_cache_enabled(channel_id):
+            self.completion_cache.set(channel_id, model, history, text)
+
+    def cached_stream(self, channel_id: int, model: str, history: List[Dict],
+                      chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Serve a cached reply as one chunk, or pass ``chunks`` through and cache the full text."""
+        # History is a live list; key on the context as it is now
+        history = list(history)
+
+        async def relay():
+            cached = await self.cached_completion(channel_id, model, history)
+            if cached is not None:
+                await chunks.aclose()
+                yield cached
+                return
+            parts = []
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            await self.store_completion(channel_id, model, history, "".join(parts).strip())
+
+        return relay()
+
+    async def stream_response(self, channel, chunks) -> Optional[str]:
+        """Post a placeholder and edit it as chunks arrive; returns the full text."""
+        reply = StreamingReply(
+            channel,
+            max_length=self.config.max_message_length,
+            edit_interval=self.config.stream_edit_interval
+        )
+        return await reply.consume(chunks)
+
     def _extract_ai_response(self, response) -> Optional[str]:
         if isinstance(response, dict) and 'data' in response:
             data = response['data']
@@ -179,7 +651,13 @@ class StraicoBot(commands.Bot):
 
     async def _handle_api_error(self, channel, error):
         error_msg = str(error)
-        if "500" in error_msg:
+        if isinstance(error, CircuitOpenError):
+            await channel.send(f"⛔ {error_msg}")
+        elif isinstance(error, OverloadedError):
+            await channel.send("🚦 The AI service is busy right now. Please try again in a few seconds.")
+        elif isinstance(error, DeadlineExceededError):
+            await channel.send("⌛ The AI service took too long to respond. Please try again.")
+        elif "500" in error_msg:
             await channel.send("🔄 The AI service is temporarily unavailable. Please try again in a moment.")
         elif "422" in error_msg:
             await channel.send("⚠️ There was an issue with the request format. Please try rephrasing your message.")
@@ -208,7 +686,10 @@ class StraicoBot(commands.Bot):
                 await channel.send(chunk)
 
     async def on_command_error(self, ctx, error):
-        if isinstance(error, commands.MissingRequiredArgument):
+        original = getattr(error, 'original', error)
+        if isinstance(original, RateLimitError):
+            await self._send_rate_limit_notice(ctx.channel, original)
+        elif isinstance(error, commands.MissingRequiredArgument):
             await ctx.send(f"❌ Missing required argument: `{error.param.name}`")
         elif isinstance(error, commands.CommandNotFound):
             await ctx.send("❌ Command not found. Use `!help` to see available commands.")
@@ -222,12 +703,20 @@ class StraicoBot(commands.Bot):
             await ctx.send(f"❌ An error occurred: {str(error)}")
 
     async def close(self):
+        if self.reloader:
+            await self.reloader.close()
+
+        await self.auto_responder.close()
+
         for plugin in self.plugins.values():
             try:
                 await plugin.teardown()
             except Exception as e:
                 self.logger.error(f"Error during plugin teardown: {e}")
 
+        await self.compactor.close()
+        await self.model_catalog.close()
+
         # Clean up persistent Straico service session
         if self.straico_service:
             try:
@@ -235,4 +724,20 @@ class StraicoBot(commands.Bot):
             except Exception as e:
                 self.logger.error(f"Error closing Straico service: {e}")
 
+        try:
+            await self.completion_cache.close()
+        except Exception as e:
+            self.logger.error(f"Error closing completion cache: {e}")
+
+        if self.history_store:
+            try:
+                await self.history_store.close()
+            except Exception as e:
+                self.logger.error(f"Error closing history store: {e}")
+
+        try:
+            await self.preferences.close()
+        except Exception as e:
+            self.logger.error(f"Error closing preferences: {e}")
+
         await super().close()
\ No newline at end of file
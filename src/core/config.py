@@ -1,42 +1,170 @@
 import os
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, field
+from typing import List, Any, Optional, Tuple
+from dataclasses import dataclass, field, fields
 from dotenv import load_dotenv
 from .errors import ConfigurationError
+from services.scopes import SCOPES
+
+
+def _parse_rate(spec: str) -> Optional[Tuple[float, float]]:
+    """Parse a "<requests>/<seconds>" budget; empty or "0" disables the limit."""
+    spec = spec.strip()
+    if not spec or spec == "0":
+        return None
+    capacity, _, period = spec.partition('/')
+    return float(capacity), float(period or 60)
+
+
+# Settings read once at startup (credentials, connections, storage); a hot
+# reload leaves them as they were until the bot is restarted
+RESTART_REQUIRED = frozenset({
+    'discord_token', 'straico_api_key', 'extra_api_keys', 'log_level', 'log_file', 'api_base_url',
+    'connection_pool_size', 'connection_limit_per_host', 'cache_max_entries', 'cache_max_bytes',
+    'breaker_failure_threshold', 'breaker_recovery_timeout', 'json_decoder', 'key_failure_threshold',
+    'key_cooldown', 'key_refresh_interval', 'warm_connections', 'keepalive_interval',
+    'history_scope', 'history_db_path', 'history_flush_interval', 'history_retention_days',
+    'completion_cache_path', 'preferences_db_path', 'hot_reload_interval', 'model_catalog_path',
+    'model_refresh_interval', 'lazy_plugins', 'startup_profile_path',
+})
+
 
 @dataclass
 class Config:
     discord_token: str = ""
     straico_api_key: str = ""
+    extra_api_keys: List[str] = field(default_factory=list)
     command_prefix: str = "!"
     log_level: str = "INFO"
     log_file: Optional[str] = None
     max_history_per_channel: int = 50
+    history_max_messages: int = 200_000
+    history_max_bytes: int = 64 * 1024 * 1024
+    history_scope: str = "thread"
+    history_idle_ttl: float = 86400.0
+    history_db_path: Optional[str] = "history.db"
+    history_flush_interval: float = 0.5
+    history_retention_days: float = 30.0
     default_chat_model: str = "openai/gpt-5"
     max_message_length: int = 2000
     api_base_url: str = "https://api.straico.com"
-    auto_response_channels: set = field(default_factory=set)
-    user_models: Dict[int, str] = field(default_factory=dict)
+    connection_pool_size: int = 10
+    connection_limit_per_host: int = 5
+    cache_max_entries: int = 256
+    cache_max_bytes: int = 4 * 1024 * 1024
+    api_queue_timeout: float = 15.0
+    breaker_failure_threshold: int = 5
+    breaker_recovery_timeout: float = 30.0
+    rate_limit_user: Optional[Tuple[float, float]] = (10, 60)
+    rate_limit_channel: Optional[Tuple[float, float]] = (30, 60)
+    rate_limit_guild: Optional[Tuple[float, float]] = (60, 60)
+    rate_limit_global: Optional[Tuple[float, float]] = (200, 60)
+    rate_cost_image: float = 2.0
+    rate_cost_video: float = 5.0
+    stream_responses: bool = True
+    stream_edit_interval: float = 1.0
+    upstream_streaming: bool = True
+    chat_deadline: float = 30.0
+    hedge_ratio: float = 0.0
+    json_decoder: str = "auto"
+    key_failure_threshold: int = 3
+    key_cooldown: float = 60.0
+    key_refresh_interval: float = 300.0
+    warm_connections: int = 2
+    keepalive_interval: float = 20.0
+    context_token_budget: int = 4000
+    compaction_threshold: int = 40
+    compaction_keep_recent: int = 20
+    summary_model: str = "openai/gpt-4o-mini"
+    auto_response_debounce: float = 1.5
+    auto_response_max_wait: float = 5.0
+    completion_cache_channels: set = field(default_factory=set)
+    completion_cache_path: Optional[str] = "completion_cache.db"
+    completion_cache_ttl: float = 86400.0
+    completion_cache_max_entries: int = 2000
+    completion_cache_context: int = 2
+    preferences_db_path: Optional[str] = "preferences.db"
+    hot_reload_interval: float = 0.0
+    model_catalog_path: Optional[str] = "models_cache.json"
+    model_refresh_interval: float = 3600.0
+    lazy_plugins: bool = False
+    startup_profile_path: Optional[str] = "startup_profile.json"
 
     @classmethod
-    def from_env(cls) -> 'Config':
-        load_dotenv()
+    def from_env(cls, env_file: Optional[str] = None, override: bool = False) -> 'Config':
+        # override lets a hot reload pick up edited values over the ones already loaded
+        load_dotenv(env_file, override=override)
 
         config = cls()
         config.discord_token = os.getenv('DISCORD_TOKEN', '')
         config.straico_api_key = os.getenv('STRAICO_API_KEY', '')
+        # Additional Straico accounts to balance requests across, comma-separated
+        config.extra_api_keys = [k.strip() for k in os.getenv('STRAICO_EXTRA_API_KEYS', '').split(',') if k.strip()]
         config.command_prefix = os.getenv('COMMAND_PREFIX', '!')
         config.log_level = os.getenv('LOG_LEVEL', 'INFO')
         config.log_file = os.getenv('LOG_FILE')
 
         try:
             config.max_history_per_channel = int(os.getenv('MAX_HISTORY_PER_CHANNEL', '50'))
+            config.history_max_messages = int(os.getenv('HISTORY_MAX_MESSAGES', '200000'))
+            config.history_max_bytes = int(os.getenv('HISTORY_MAX_BYTES', str(64 * 1024 * 1024)))
+            config.history_idle_ttl = float(os.getenv('HISTORY_IDLE_TTL', '86400'))
+            config.history_flush_interval = float(os.getenv('HISTORY_FLUSH_INTERVAL', '0.5'))
+            config.history_retention_days = float(os.getenv('HISTORY_RETENTION_DAYS', '30'))
             config.max_message_length = int(os.getenv('MAX_MESSAGE_LENGTH', '2000'))
+            config.connection_pool_size = int(os.getenv('CONNECTION_POOL_SIZE', '10'))
+            config.connection_limit_per_host = int(os.getenv('CONNECTION_LIMIT_PER_HOST', '5'))
+            config.cache_max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '256'))
+            config.cache_max_bytes = int(os.getenv('CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
+            config.api_queue_timeout = float(os.getenv('API_QUEUE_TIMEOUT', '15'))
+            config.breaker_failure_threshold = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+            config.breaker_recovery_timeout = float(os.getenv('BREAKER_RECOVERY_TIMEOUT', '30'))
+            config.rate_limit_user = _parse_rate(os.getenv('RATE_LIMIT_USER', '10/60'))
+            config.rate_limit_channel = _parse_rate(os.getenv('RATE_LIMIT_CHANNEL', '30/60'))
+            config.rate_limit_guild = _parse_rate(os.getenv('RATE_LIMIT_GUILD', '60/60'))
+            config.rate_limit_global = _parse_rate(os.getenv('RATE_LIMIT_GLOBAL', '200/60'))
+            config.rate_cost_image = float(os.getenv('RATE_COST_IMAGE', '2'))
+            config.rate_cost_video = float(os.getenv('RATE_COST_VIDEO', '5'))
+            config.stream_edit_interval = float(os.getenv('STREAM_EDIT_INTERVAL', '1.0'))
+            config.chat_deadline = float(os.getenv('CHAT_DEADLINE', '30'))
+            config.hedge_ratio = float(os.getenv('HEDGE_RATIO', '0'))
+            config.key_failure_threshold = int(os.getenv('KEY_FAILURE_THRESHOLD', '3'))
+            config.key_cooldown = float(os.getenv('KEY_COOLDOWN', '60'))
+            config.key_refresh_interval = float(os.getenv('KEY_REFRESH_INTERVAL', '300'))
+            config.warm_connections = int(os.getenv('WARM_CONNECTIONS', '2'))
+            config.keepalive_interval = float(os.getenv('KEEPALIVE_INTERVAL', '20'))
+            config.context_token_budget = int(os.getenv('CONTEXT_TOKEN_BUDGET', '4000'))
+            config.auto_response_debounce = float(os.getenv('AUTO_RESPONSE_DEBOUNCE', '1.5'))
+            config.auto_response_max_wait = float(os.getenv('AUTO_RESPONSE_MAX_WAIT', '5'))
+            config.compaction_threshold = int(os.getenv('COMPACTION_THRESHOLD', '40'))
+            config.compaction_keep_recent = int(os.getenv('COMPACTION_KEEP_RECENT', '20'))
+            config.completion_cache_ttl = float(os.getenv('COMPLETION_CACHE_TTL', '86400'))
+            config.completion_cache_max_entries = int(os.getenv('COMPLETION_CACHE_MAX_ENTRIES', '2000'))
+            config.completion_cache_context = int(os.getenv('COMPLETION_CACHE_CONTEXT', '2'))
+            config.hot_reload_interval = float(os.getenv('HOT_RELOAD_INTERVAL', '0'))
+            config.model_refresh_interval = float(os.getenv('MODEL_REFRESH_INTERVAL', '3600'))
+            config.completion_cache_channels = {
+                int(c) for c in os.getenv('COMPLETION_CACHE_CHANNELS', '').split(',') if c.strip()
+            }
         except ValueError as e:
             raise ConfigurationError(f"Invalid numeric configuration: {e}")
 
         config.default_chat_model = os.getenv('DEFAULT_CHAT_MODEL', 'openai/gpt-5')
         config.api_base_url = os.getenv('API_BASE_URL', 'https://api.straico.com')
+        config.stream_responses = os.getenv('STREAM_RESPONSES', 'true').lower() in ('1', 'true', 'yes')
+        config.upstream_streaming = os.getenv('UPSTREAM_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+        config.json_decoder = os.getenv('JSON_DECODER', 'auto').lower()
+        config.summary_model = os.getenv('SUMMARY_MODEL', 'openai/gpt-4o-mini')
+        # Empty paths keep conversation history / the completion cache in memory only
+        config.history_db_path = os.getenv('HISTORY_DB_PATH', 'history.db') or None
+        config.history_scope = os.getenv('HISTORY_SCOPE', 'thread').lower()
+        config.completion_cache_path = os.getenv('COMPLETION_CACHE_PATH', 'completion_cache.db') or None
+        # Per-user models and auto-response channels; empty keeps them in memory only
+        config.preferences_db_path = os.getenv('PREFERENCES_DB_PATH', 'preferences.db') or None
+        # Last /v1/models response, so the model list is there at boot even if the API is not
+        config.model_catalog_path = os.getenv('MODEL_CATALOG_PATH', 'models_cache.json') or None
+        # Import plugins on their first command instead of at startup (see plugins/manifest.json)
+        config.lazy_plugins = os.getenv('LAZY_PLUGINS', 'false').lower() in ('1', 'true', 'yes')
+        config.startup_profile_path = os.getenv('STARTUP_PROFILE_PATH', 'startup_profile.json') or None
 
         if not config.discord_token:
             raise ConfigurationError("DISCORD_TOKEN is required")
@@ -45,6 +173,10 @@ class Config:
 
         return config
 
+    def changed_fields(self, other: 'Config') -> List[str]:
+        """Names of the settings whose value differs in ``other``."""
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
     def validate(self) -> None:
         if not self.discord_token:
             raise ConfigurationError("Discord token is required")
@@ -52,5 +184,32 @@ class Config:
             raise ConfigurationError("Straico API key is required")
         if self.max_history_per_channel < 1:
             raise ConfigurationError("Max history per channel must be positive")
+        if self.history_max_messages < self.max_history_per_channel or self.history_max_bytes < 1:
+            raise ConfigurationError("History memory limits must hold at least one full channel")
+        if self.history_scope not in SCOPES:
+            raise ConfigurationError(f"History scope must be one of: {', '.join(SCOPES)}")
+        if self.history_flush_interval <= 0:
+            raise ConfigurationError("History flush interval must be positive")
         if self.max_message_length < 100:
-            raise ConfigurationError("Max message length must be at least 100")
\ No newline at end of file
+            raise ConfigurationError("Max message length must be at least 100")
+        if self.connection_pool_size < 1 or self.connection_limit_per_host < 1:
+            raise ConfigurationError("Connection pool limits must be positive")
+        if self.chat_deadline <= 0:
+            raise ConfigurationError("Chat deadline must be positive")
+        if not 0 <= self.hedge_ratio <= 1:
+            raise ConfigurationError("Hedge ratio must be between 0 and 1")
+        if self.context_token_budget < 16:
+            raise ConfigurationError("Context token budget must be at least 16")
+        if self.compaction_threshold > 0:
+            if self.compaction_threshold > self.max_history_per_channel:
+                raise ConfigurationError("Compaction threshold cannot exceed max history per channel")
+            if not 0 <= self.compaction_keep_recent < self.compaction_threshold - 1:
+                raise ConfigurationError("Compaction must keep fewer recent messages than its threshold")
+        if self.auto_response_debounce < 0 or self.auto_response_max_wait < self.auto_response_debounce:
+            raise ConfigurationError("Auto-response max wait must be at least the (non-negative) debounce window")
+        if self.hot_reload_interval < 0:
+            raise ConfigurationError("Hot reload interval cannot be negative")
+        if self.model_refresh_interval < 0:
+            raise ConfigurationError("Model refresh interval cannot be negative")
+        if self.completion_cache_context < 0:
+            raise ConfigurationError("Completion cache context cannot be negative")
\ No newline at end of file
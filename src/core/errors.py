@@ -6,6 +6,29 @@ class APIError(BotError):
         super().__init__(message)
         self.status_code = status_code
 
+class OverloadedError(APIError):
+    """Raised when a request gave up waiting for an API concurrency slot."""
+    def __init__(self, message: str, status_code: int = 503):
+        super().__init__(message, status_code)
+
+class CircuitOpenError(APIError):
+    """Raised without calling the API while a circuit breaker is open."""
+    def __init__(self, message: str, retry_after: float = 0, status_code: int = 503):
+        super().__init__(message, status_code)
+        self.retry_after = retry_after
+
+class DeadlineExceededError(APIError):
+    """Raised when a request's deadline leaves no time to start or finish an API call."""
+    def __init__(self, message: str, status_code: int = 504):
+        super().__init__(message, status_code)
+
+class RateLimitError(BotError):
+    """Raised when a user, channel, guild or global request budget is exhausted."""
+    def __init__(self, message: str, retry_after: float, scope: str = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.scope = scope
+
 class ValidationError(BotError):
     pass
 
@@ -0,0 +1,170 @@
+import json
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class _TimedLoader:
+    """Wraps a module's loader for the duration of its exec_module only."""
+
+    def __init__(self, loader, profiler: 'StartupProfiler'):
+        self.loader = loader
+        self.profiler = profiler
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # The module keeps its real loader; only this one call is timed
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.profiler._enter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler._leave(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _ImportTimer(MetaPathFinder):
+    def __init__(self, profiler: 'StartupProfiler'):
+        self.profiler = profiler
+        self._finding = set()
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self.profiler)
+        return spec
+
+
+class StartupProfiler:
+    """Where the time goes between process start and ``on_ready``.
+
+    ``install()`` (called first thing in main.py) times every module import
+    from then on, in the manner of ``python -X importtime``: ``self`` is the
+    time spent executing the module body and ``cumulative`` includes the
+    imports it triggered. Startup phases and per-plugin import/setup time
+    are recorded by the bot. ``finish()`` stops the import timer, logs a
+    summary and writes the full report as JSON.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: Dict[str, List[float]] = {}   # module -> [self, cumulative]
+        self.phases: List[Dict[str, Any]] = []
+        self.plugins: Dict[str, Dict[str, Any]] = {}
+        self.ready: Optional[float] = None
+        self.import_seconds = 0.0                   # outermost imports only, so nothing counts twice
+        self._local = threading.local()             # per-thread stack of [started, time in nested imports]
+        self._finder: Optional[_ImportTimer] = None
+
+    @classmethod
+    def install(cls) -> 'StartupProfiler':
+        profiler = cls()
+        profiler._finder = _ImportTimer(profiler)
+        sys.meta_path.insert(0, profiler._finder)
+        return profiler
+
+    def uninstall(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self):
+        self._stack().append([time.perf_counter(), 0.0])
+
+    def _leave(self, name: str):
+        stack = self._stack()
+        started, nested = stack.pop()
+        cumulative = time.perf_counter() - started
+        self.imports[name] = [cumulative - nested, cumulative]
+        if stack:
+            stack[-1][1] += cumulative
+        else:
+            self.import_seconds += cumulative
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'name': name, 'seconds': time.perf_counter() - started})
+
+    @contextmanager
+    def plugin_stage(self, module: str, stage: str) -> Iterator[None]:
+        """Time one stage (``import`` or ``setup``) of loading a plugin module."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.plugins.setdefault(module, {})[stage] = time.perf_counter() - started
+
+    def report(self, top: Optional[int] = None) -> Dict[str, Any]:
+        imports = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            'time_to_ready': self.ready,
+            'import_seconds': self.import_seconds,
+            'phases': self.phases,
+            'plugins': self.plugins,
+            'imports': [
+                {'module': name, 'self': self_time, 'cumulative': cumulative}
+                for name, (self_time, cumulative) in imports[:top]
+            ],
+        }
+
+    def finish(self, logger: logging.Logger, path: Optional[str] = None, top: int = 10) -> Dict[str, Any]:
+        """Stop timing imports, log the slowest steps and write the report to ``path``."""
+        self.uninstall()
+        self.ready = time.perf_counter() - self.started
+        report = self.report()
+
+        logger.info(f"Startup: ready {self.ready:.2f}s after launch, "
+                    f"{report['import_seconds']:.2f}s of it importing {len(self.imports)} modules")
+        if self.phases:
+            logger.info("Startup phases: " + ", ".join(
+                f"{p['name']} {p['seconds'] * 1000:.0f}ms" for p in self.phases))
+        for module, stages in self.plugins.items():
+            logger.info(f"Startup plugin {module}: " + ", ".join(
+                f"{stage} {seconds * 1000:.1f}ms" if isinstance(seconds, float) else f"{stage} {seconds}"
+                for stage, seconds in stages.items()))
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        if slowest:
+            logger.info("Slowest imports (self time): " + ", ".join(
+                f"{name} {self_time * 1000:.1f}ms" for name, (self_time, _) in slowest))
+
+        if path:
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2)
+                logger.info(f"Startup profile written to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write startup profile to {path}: {e}")
+        return report
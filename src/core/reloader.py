@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .errors import PluginError
+
+Signature = Tuple[Tuple[str, int, int], ...]   # (file, mtime_ns, size) per source file
+
+
+class HotReloader:
+    """Reloads edited plugins and configuration without reconnecting to Discord.
+
+    Every ``interval`` seconds each plugin under ``bot.plugins_path`` is
+    fingerprinted by the names, sizes and modification times of its .py
+    files. A changed plugin is swapped through ``bot.reload_plugin``, a new
+    one loaded and a deleted one unloaded. When ``env_path`` changes the bot
+    re-reads its configuration with ``bot.reload_config``.
+
+    A failed reload is logged and leaves the running version in place; the
+    next edit to the same files is tried again. plugins/base.py and code
+    outside plugins/ still need a restart.
+    """
+
+    def __init__(self, bot, interval: float = 2.0, env_path: Optional[str] = None):
+        self.bot = bot
+        self.interval = interval
+        self.env_path = Path(env_path) if env_path else None
+        self.logger = logging.getLogger(__name__)
+        self._plugins: Dict[str, Signature] = {}
+        self._env: Optional[Tuple[int, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.plugin_reloads = 0
+        self.config_reloads = 0
+        self.failures = 0
+
+    def _signature(self, files) -> Signature:
+        signature = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue    # removed between listing and stat; the next poll settles it
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def plugin_signatures(self) -> Dict[str, Signature]:
+        """Fingerprint of every plugin module or package, by module name."""
+        signatures = {}
+        for path in sorted(Path(self.bot.plugins_path).iterdir()):
+            if path.name.startswith(('_', '.')):
+                continue
+            if path.is_dir() and (path / '__init__.py').exists():
+                signatures[path.name] = self._signature(sorted(path.rglob('*.py')))
+            elif path.suffix == '.py' and path.stem != 'base':
+                signatures[path.stem] = self._signature([path])
+        return signatures
+
+    def env_signature(self) -> Optional[Tuple[int, int]]:
+        if self.env_path is None:
+            return None
+        try:
+            stat = self.env_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def start(self):
+        self._plugins = self.plugin_signatures()
+        self._env = self.env_signature()
+        self._task = asyncio.create_task(self._watch())
+        self.logger.info(f"Watching {len(self._plugins)} plugins"
+                         f"{f' and {self.env_path}' if self.env_path else ''} for changes")
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                self.logger.error(f"Hot reload check failed: {e}")
+
+    async def check(self):
+        """Apply whatever changed since the last check."""
+        current = self.plugin_signatures()
+        for name, signature in current.items():
+            previous = self._plugins.get(name)
+            if previous == signature:
+                continue
+            try:
+                if previous is None:
+                    await self.bot.load_plugin(name)
+                else:
+                    await self.bot.reload_plugin(name)
+                self.plugin_reloads += 1
+            except PluginError as e:
+                self.failures += 1
+                self.logger.error(str(e))
+        for name in self._plugins.keys() - current.keys():
+            try:
+                await self.bot.unload_plugin_module(name)
+            except PluginError as e:
+                self.failures += 1
+                self.logger.error(str(e))
+        self._plugins = current
+
+        env = self.env_signature()
+        if env != self._env:
+            self._env = env
+            if env is not None:
+                if self.bot.reload_config(str(self.env_path)) is None:
+                    self.failures += 1
+                else:
+                    self.config_reloads += 1
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'interval': self.interval,
+            'plugins': len(self._plugins),
+            'plugin_reloads': self.plugin_reloads,
+            'config_reloads': self.config_reloads,
+            'failures': self.failures,
+        }
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Export and import conversation history between bot hosts.
+
+Dumps stream one conversation scope at a time, so memory stays flat for
+databases of any size. The format follows the file name: .jsonl or
+.msgpack (msgpack needs the msgpack package), optionally with .gz.
+
+    python history_tool.py export history.db backup.jsonl.gz
+    python history_tool.py import backup.jsonl.gz history.db
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.history_io import import_into_database, read_records, records_from_database, write_records
+
+
+def export_command(args) -> int:
+    if not Path(args.database).exists():
+        print(f"No history database at {args.database}")
+        return 1
+    started = time.perf_counter()
+    scopes, messages = write_records(records_from_database(args.database), args.dump)
+    elapsed = time.perf_counter() - started
+    size = Path(args.dump).stat().st_size
+    print(f"Exported {scopes} scopes / {messages} messages to {args.dump} "
+          f"({size / 2 ** 20:.1f} MiB) in {elapsed:.1f}s")
+    return 0
+
+
+def import_command(args) -> int:
+    started = time.perf_counter()
+    try:
+        scopes, messages = import_into_database(
+            read_records(args.dump), args.database, batch_size=args.batch_size, replace=not args.merge
+        )
+    except ValueError as e:
+        print(f"Import stopped: {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+    print(f"Imported {scopes} scopes / {messages} messages into {args.database} in {elapsed:.1f}s")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Export or import Straico bot conversation history")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help="Write a history database to a dump file")
+    export.add_argument('database', help="History database (HISTORY_DB_PATH)")
+    export.add_argument('dump', help="Output file, e.g. backup.jsonl.gz")
+    export.set_defaults(run=export_command)
+
+    restore = commands.add_parser('import', help="Load a dump file into a history database")
+    restore.add_argument('dump', help="Dump written by export or !exporthistory")
+    restore.add_argument('database', help="History database (HISTORY_DB_PATH); created if missing")
+    restore.add_argument('--merge', action='store_true',
+                         help="Append to existing scopes instead of replacing them")
+    restore.add_argument('--batch-size', type=int, default=5000, help="Rows per transaction")
+    restore.set_defaults(run=import_command)
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    sys.exit(args.run(args))
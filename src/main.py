@@ -12,6 +12,10 @@ from pathlib import Path
 # Add the current directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Installed before the imports below so their cost shows up in the startup profile
+from core.profiler import StartupProfiler
+profiler = StartupProfiler.install()
+
 from core.bot import StraicoBot
 from core.config import Config
 from core.logger import setup_logger
@@ -29,7 +33,7 @@ async def main():
     logger = setup_logger("straico_bot", config.log_level, config.log_file)
     logger.info("Starting Straico Discord Bot...")
 
-    bot = StraicoBot(config)
+    bot = StraicoBot(config, profiler=profiler)
 
     def signal_handler(signum, frame):
         logger.info(f"Received signal {signum}, shutting down...")
@@ -1,6 +1,10 @@
+import discord
 from discord.ext import commands
 from typing import List
 from plugins.base import BasePlugin
+from core.errors import CircuitOpenError, OverloadedError, DeadlineExceededError
+
+MAX_COMPARE_MODELS = 4
 
 
 class ChatPlugin(BasePlugin):
@@ -25,10 +29,14 @@ class ChatPlugin(BasePlugin):
 
     @commands.command(name='chat')
     async def chat(self, ctx, *, message: str):
-        user_model = self.config.user_models.get(ctx.author.id, self.config.default_chat_model)
+        self.bot.check_rate_limit(ctx.author.id, ctx.channel.id, ctx.guild.id if ctx.guild else None)
+
+        user_model = await self.bot.preferences.user_model(ctx.author.id, self.config.default_chat_model)
 
+        scope = self.bot.history_scope(ctx)
+        await self.bot.conversation_history.ensure_loaded(scope)
         self.bot.conversation_history.add_message(
-            ctx.channel.id,
+            scope,
             "user",
             message,
             ctx.author.display_name
@@ -36,30 +44,97 @@ class ChatPlugin(BasePlugin):
 
         async with ctx.typing():
             try:
-                history = self.bot.conversation_history.get_history(ctx.channel.id)
-                # Use persistent session for faster responses
-                response = await self.bot.straico_service.chat_completion(
-                    model=user_model,
-                    messages=history,
-                    max_tokens=1000
-                )
+                history = self.bot.conversation_history.get_history(scope)
 
-                ai_response = self._extract_ai_response(response)
+                if self.config.stream_responses:
+                    ai_response = await self.bot.stream_response(
+                        ctx.channel,
+                        self.bot.cached_stream(ctx.channel.id, user_model, history, self.bot.straico_service.stream_chat_completion(
+                            model=user_model,
+                            messages=history,
+                            guild_id=ctx.guild.id if ctx.guild else None,
+                            max_tokens=1000
+                        ))
+                    )
+                    if ai_response:
+                        self.bot.conversation_history.add_message(scope, "assistant", ai_response)
+                    return
+
+                ai_response = await self.bot.cached_completion(ctx.channel.id, user_model, history)
+                if ai_response is None:
+                    # Use persistent session for faster responses
+                    response = await self.bot.straico_service.chat_completion(
+                        model=user_model,
+                        messages=history,
+                        guild_id=ctx.guild.id if ctx.guild else None,
+                        max_tokens=1000
+                    )
+
+                    ai_response = self._extract_ai_response(response)
+                    await self.bot.store_completion(ctx.channel.id, user_model, history, ai_response)
 
                 if not ai_response:
                     ai_response = 'Sorry, I could not generate a response.'
 
                 self.bot.conversation_history.add_message(
-                    ctx.channel.id,
+                    scope,
                     "assistant",
                     ai_response
                 )
 
                 await self.bot._send_long_message(ctx.channel, ai_response)
 
+            except (CircuitOpenError, OverloadedError, DeadlineExceededError) as e:
+                await self.bot._handle_api_error(ctx.channel, e)
             except Exception as e:
                 await ctx.send(f"Error: {str(e)}")
 
+    @commands.command(name='compare')
+    async def compare(self, ctx, *, args: str = ""):
+        # Leading tokens that name models are the models; the rest is the prompt
+        tokens = args.split()
+        models = []
+        while tokens and self.bot.model_catalog.resolve(tokens[0]):
+            model = self.bot.model_catalog.resolve(tokens.pop(0))
+            if model not in models:
+                models.append(model)
+        prompt = " ".join(tokens)
+
+        if len(models) < 2 or len(models) > MAX_COMPARE_MODELS or not prompt:
+            await ctx.send(
+                f"❌ Usage: `!compare <model> <model> [...] <prompt>` with 2-{MAX_COMPARE_MODELS} models "
+                f"from `!models`.\nExample: `!compare openai/gpt-5 anthropic/claude-sonnet-4 Explain CRDTs`"
+            )
+            return
+
+        self.bot.check_rate_limit(ctx.author.id, ctx.channel.id, ctx.guild.id if ctx.guild else None,
+                                  cost=len(models))
+
+        await ctx.send(f"⚖️ Comparing {len(models)} models on: `{prompt[:200]}`")
+        timings = []
+        async with ctx.typing():
+            async for result in self.bot.straico_service.compare_models(
+                models, prompt, guild_id=ctx.guild.id if ctx.guild else None
+            ):
+                latency = result['latency']
+                if result['error'] is not None:
+                    embed = discord.Embed(title=result['model'], description=f"❌ {str(result['error'])[:1000]}",
+                                          color=0xff6b6b)
+                    timings.append((result['model'], latency, False))
+                else:
+                    text = self._extract_ai_response(result['response']) or 'Sorry, I could not generate a response.'
+                    if len(text) > 4000:
+                        text = text[:4000] + "…"
+                    embed = discord.Embed(title=result['model'], description=text, color=0x00ff00)
+                    timings.append((result['model'], latency, True))
+                embed.set_footer(text=f"⏱️ {latency:.2f}s · {len(timings)}/{len(models)}")
+                await ctx.send(embed=embed)
+
+        ranking = " · ".join(f"`{model}` {latency:.2f}s" for model, latency, ok in timings if ok)
+        failed = len(timings) - sum(ok for _, _, ok in timings)
+        await ctx.send(f"🏁 Done. Fastest first: {ranking or 'no answers'}"
+                       + (f" ({failed} failed)" if failed else ""))
+
     def _extract_ai_response(self, response):
         if isinstance(response, dict) and 'data' in response:
             data = response['data']
@@ -4,7 +4,8 @@ from typing import List, Dict
 import json
 import re
 from plugins.base import BasePlugin
-from config.models import STRAICO_IMAGE_MODELS
+from core.errors import CircuitOpenError, OverloadedError, RateLimitError
+from services.model_catalog import IMAGE
 
 
 class ImagePlugin(BasePlugin):
@@ -39,9 +40,10 @@ class ImagePlugin(BasePlugin):
     @commands.command(name='imagemodels', aliases=['imgmodels'])
     async def list_image_models(self, ctx):
         embed = discord.Embed(title="Available Image Models", color=0xff6b6b)
+        image_models = self.bot.model_catalog.models(IMAGE)
 
         model_list = []
-        for i, model in enumerate(STRAICO_IMAGE_MODELS, 1):
+        for i, model in enumerate(image_models, 1):
             model_list.append(f"`{i}.` {model}")
 
         chunk_size = 8
@@ -52,7 +54,7 @@ class ImagePlugin(BasePlugin):
             embed.add_field(name=field_name, value="\n".join(chunk), inline=True)
 
         embed.add_field(name="Usage", value="`!genimage <model_number> <prompt>`\nExample: `!genimage 7 a beautiful sunset`", inline=False)
-        embed.set_footer(text=f"Total: {len(STRAICO_IMAGE_MODELS)} image models available")
+        embed.set_footer(text=f"Total: {len(image_models)} image models available")
 
         await ctx.send(embed=embed)
 
@@ -97,8 +99,10 @@ class ImagePlugin(BasePlugin):
             embed = discord.Embed(title="🎨 Step 2: Select Model", color=0xff6b6b)
             embed.add_field(name="Your Prompt", value=f"`{message.content}`", inline=False)
 
+            # Numbered as listed now, even if the catalog refreshes before the reply
+            image_models = session['data']['models'] = self.bot.model_catalog.models(IMAGE)
             model_list = []
-            for i, model in enumerate(STRAICO_IMAGE_MODELS, 1):
+            for i, model in enumerate(image_models, 1):
                 model_list.append(f"`{i}.` {model}")
 
             chunk_size = 5
@@ -108,17 +112,18 @@ class ImagePlugin(BasePlugin):
                 field_name = "Available Models" if i == 0 else f"Models (cont.)"
                 embed.add_field(name=field_name, value="\n".join(chunk), inline=True)
 
-            embed.add_field(name="Next Step", value="Reply with a number (1-15) to select your model", inline=False)
+            embed.add_field(name="Next Step", value=f"Reply with a number (1-{len(image_models)}) to select your model", inline=False)
             await message.channel.send(embed=embed)
 
         elif step == 'model':
             try:
                 model_num = int(message.content.strip())
-                if model_num < 1 or model_num > len(STRAICO_IMAGE_MODELS):
-                    await message.channel.send(f"❌ Please choose a number between 1 and {len(STRAICO_IMAGE_MODELS)}")
+                image_models = session['data']['models']
+                if model_num < 1 or model_num > len(image_models):
+                    await message.channel.send(f"❌ Please choose a number between 1 and {len(image_models)}")
                     return
 
-                selected_model = STRAICO_IMAGE_MODELS[model_num - 1]
+                selected_model = image_models[model_num - 1]
                 session['data']['model'] = selected_model
                 session['step'] = 'variations'
 
@@ -197,6 +202,8 @@ class ImagePlugin(BasePlugin):
     @commands.command(name='image')
     async def generate_image_simple(self, ctx, *, prompt: str):
         default_model = "openai/dall-e-3"
+        self.bot.check_rate_limit(ctx.author.id, ctx.channel.id, ctx.guild.id if ctx.guild else None,
+                                  cost=self.config.rate_cost_image)
 
         async with ctx.typing():
             try:
@@ -204,7 +211,8 @@ class ImagePlugin(BasePlugin):
                     model=default_model,
                     description=prompt,
                     size="square",
-                    variations=1
+                    variations=1,
+                    guild_id=ctx.guild.id if ctx.guild else None
                 )
 
                 images = self._extract_images(response)
@@ -223,17 +231,28 @@ class ImagePlugin(BasePlugin):
                     else:
                         await ctx.send(f"✅ Image generation started for: `{prompt}`\nResponse: {json.dumps(response, indent=2)[:1000]}")
 
+            except (CircuitOpenError, OverloadedError) as e:
+                await self.bot._handle_api_error(ctx.channel, e)
             except Exception as e:
                 await ctx.send(f"Error generating image: {str(e)}")
 
     async def _generate_image_with_params(self, message, params):
+        try:
+            self.bot.check_rate_limit(message.author.id, message.channel.id,
+                                      message.guild.id if message.guild else None,
+                                      cost=self.config.rate_cost_image * params['variations'])
+        except RateLimitError as e:
+            await self.bot._send_rate_limit_notice(message.channel, e)
+            return
+
         async with message.channel.typing():
             try:
                 response = await self.bot.straico_service.generate_image(
                     model=params['model'],
                     description=params['prompt'],
                     size=params['size'],
-                    variations=params['variations']
+                    variations=params['variations'],
+                    guild_id=message.guild.id if message.guild else None
                 )
 
                 images = self._extract_images(response)
@@ -265,6 +284,8 @@ class ImagePlugin(BasePlugin):
                     else:
                         await message.channel.send(f"✅ Generation submitted!\n```json\n{json.dumps(response, indent=2)[:1000]}```")
 
+            except (CircuitOpenError, OverloadedError) as e:
+                await self.bot._handle_api_error(message.channel, e)
             except Exception as e:
                 await message.channel.send(f"❌ Error generating image: {str(e)}")
 
@@ -1,8 +1,19 @@
+import asyncio
+import os
+import tempfile
+import time
 import discord
 from discord.ext import commands
 from typing import List
 from plugins.base import BasePlugin
-from config.models import STRAICO_MODELS
+from core.errors import CircuitOpenError, OverloadedError
+from services.model_catalog import CHAT, IMAGE, VIDEO, AUDIO, classify
+from services.scopes import CHANNEL, USER
+from services.history_io import (
+    batched, detect_format, import_into_database, read_records, records_from_database, records_from_history,
+    write_records
+)
+from utils.formatters import format_model_embeds
 
 
 class UtilityPlugin(BasePlugin):
@@ -30,7 +41,7 @@ class UtilityPlugin(BasePlugin):
         embed = discord.Embed(title="Straico Bot Commands", color=0x00ff00)
         embed.add_field(
             name="Chat Commands",
-            value="`!chat <message>` - Chat with AI\n`!setmodel <model_name>` - Set your preferred model\n`!currentmodel` - Show your current model\n`!models` - List available models",
+            value="`!chat <message>` - Chat with AI\n`!compare <models...> <prompt>` - Ask several models at once\n`!setmodel <model_name>` - Set your preferred model\n`!currentmodel` - Show your current model\n`!models` - List available models",
             inline=False
         )
         embed.add_field(
@@ -40,52 +51,25 @@ class UtilityPlugin(BasePlugin):
         )
         embed.add_field(
             name="Utility Commands",
-            value="`!userinfo` - Get your Straico account info\n`!auto` - Toggle auto-response in this channel\n`!clear` - Clear conversation history",
+            value="`!userinfo` - Get your Straico account info\n`!auto` - Toggle auto-response in this channel\n`!cache [on|off|clear]` - Toggle the reply cache in this channel\n`!clear` - Clear conversation history\n`!exporthistory` / `!importhistory` - Back up or restore all history (owner only)\n`!apistats` - Show API client statistics\n`!breakers` - Show API circuit breaker state",
             inline=False
         )
         await ctx.send(embed=embed)
 
     @commands.command(name='models')
     async def list_models(self, ctx):
-        embed = discord.Embed(title="Available Straico Models", color=0x0099ff)
-
-        chat_models = []
-        image_models = []
-        video_models = []
-        audio_models = []
-
-        for model in STRAICO_MODELS:
-            model_lower = model.lower()
-
-            if any(keyword in model_lower for keyword in ['dall-e', 'flux', 'ideogram', 'imagen', 'recraft', 'bagel']):
-                image_models.append(model)
-            elif any(keyword in model_lower for keyword in ['kling', 'veo', 'vidu', 'gen3', 'gen4']):
-                video_models.append(model)
-            elif any(keyword in model_lower for keyword in ['eleven', 'tts']):
-                audio_models.append(model)
-            else:
-                chat_models.append(model)
-
-        def chunk_list(lst, chunk_size=15):
-            return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
-
-        if chat_models:
-            chat_chunks = chunk_list(chat_models)
-            for i, chunk in enumerate(chat_chunks):
-                field_name = "Chat Models" if i == 0 else f"Chat Models (cont. {i+1})"
-                embed.add_field(name=field_name, value="\n".join(chunk), inline=True)
-
-        if image_models:
-            embed.add_field(name="Image Models", value="\n".join(image_models), inline=True)
-
-        if video_models:
-            embed.add_field(name="Video Models", value="\n".join(video_models), inline=True)
-
-        if audio_models:
-            embed.add_field(name="Audio Models", value="\n".join(audio_models), inline=True)
-
-        embed.set_footer(text=f"Total: {len(STRAICO_MODELS)} models available")
-        await ctx.send(embed=embed)
+        catalog = self.bot.model_catalog
+        sections = [
+            ("Chat Models", catalog.models(CHAT)),
+            ("Image Models", catalog.models(IMAGE)),
+            ("Video Models", catalog.models(VIDEO)),
+            ("Audio Models", catalog.models(AUDIO)),
+        ]
+
+        # A large catalog spills over into more messages rather than failing
+        for embed in format_model_embeds(sections, title="Available Straico Models",
+                                         footer=f"Total: {len(catalog)} models available"):
+            await ctx.send(embed=embed)
 
     @commands.command(name='setmodel')
     async def set_model(self, ctx, *, model_name: str = None):
@@ -93,8 +77,9 @@ class UtilityPlugin(BasePlugin):
             await ctx.send("❌ Please specify a model name. Use `!models` to see available models.")
             return
 
-        if model_name not in STRAICO_MODELS:
-            similar = [m for m in STRAICO_MODELS if model_name.lower() in m.lower()]
+        model = self.bot.model_catalog.resolve(model_name)
+        if model is None:
+            similar = self.bot.model_catalog.suggest(model_name, limit=10)
             if similar:
                 embed = discord.Embed(title="Model not found", color=0xff6b6b)
                 embed.add_field(name="Did you mean one of these?", value="\n".join(similar[:10]), inline=False)
@@ -104,25 +89,23 @@ class UtilityPlugin(BasePlugin):
                 await ctx.send(f"❌ Model `{model_name}` not found. Use `!models` to see available models.")
             return
 
-        self.config.user_models[ctx.author.id] = model_name
-        await ctx.send(f"✅ Set your preferred model to: `{model_name}`")
+        self.bot.preferences.set_user_model(ctx.author.id, model)
+        await ctx.send(f"✅ Set your preferred model to: `{model}`")
 
     @commands.command(name='currentmodel', aliases=['current', 'mymodel'])
     async def current_model(self, ctx):
-        user_model = self.config.user_models.get(ctx.author.id, self.config.default_chat_model)
+        user_model = await self.bot.preferences.user_model(ctx.author.id, self.config.default_chat_model)
 
         embed = discord.Embed(title="Your Current Model", color=0x00ff00)
         embed.add_field(name="Selected Model", value=f"`{user_model}`", inline=False)
 
-        model_lower = user_model.lower()
-        if any(keyword in model_lower for keyword in ['dall-e', 'flux', 'ideogram', 'imagen', 'recraft', 'bagel']):
-            model_type = "🎨 Image Generation"
-        elif any(keyword in model_lower for keyword in ['kling', 'veo', 'vidu', 'gen3', 'gen4']):
-            model_type = "🎬 Video Generation"
-        elif any(keyword in model_lower for keyword in ['eleven', 'tts']):
-            model_type = "🔊 Audio Generation"
-        else:
-            model_type = "💬 Chat Model"
+        # Models dropped from the catalog since they were chosen are classified by name
+        category = self.bot.model_catalog.category(user_model) or classify(user_model)
+        model_type = {
+            IMAGE: "🎨 Image Generation",
+            VIDEO: "🎬 Video Generation",
+            AUDIO: "🔊 Audio Generation",
+        }.get(category, "💬 Chat Model")
 
         embed.add_field(name="Type", value=model_type, inline=True)
         embed.add_field(name="Change Model", value="`!setmodel <model_name>`", inline=True)
@@ -130,11 +113,11 @@ class UtilityPlugin(BasePlugin):
         await ctx.send(embed=embed)
 
     @commands.command(name='userinfo')
-    async def user_info(self, ctx):
+    async def user_info(self, ctx, option: str = None):
         async with ctx.typing():
             try:
-                # Use persistent session and caching for user info
-                user_data = await self.bot.straico_service.get_user_info()
+                # Use persistent session and caching for user info; `!userinfo refresh` bypasses the cache
+                user_data = await self.bot.straico_service.get_user_info(refresh=option == 'refresh')
 
                 embed = discord.Embed(title="Straico Account Info", color=0x00ff00)
 
@@ -144,6 +127,8 @@ class UtilityPlugin(BasePlugin):
 
                 await ctx.send(embed=embed)
 
+            except (CircuitOpenError, OverloadedError) as e:
+                await self.bot._handle_api_error(ctx.channel, e)
             except Exception as e:
                 await ctx.send(f"Error fetching user info: {str(e)}")
 
@@ -151,30 +136,320 @@ class UtilityPlugin(BasePlugin):
     async def toggle_auto_response(self, ctx):
         channel_id = ctx.channel.id
 
-        if channel_id in self.config.auto_response_channels:
-            self.config.auto_response_channels.remove(channel_id)
+        if await self.bot.preferences.auto_response(channel_id):
+            self.bot.preferences.set_auto_response(channel_id, False)
             await ctx.send("🔇 Auto-response disabled in this channel.")
         else:
-            self.config.auto_response_channels.add(channel_id)
+            self.bot.preferences.set_auto_response(channel_id, True)
             await ctx.send("🔊 Auto-response enabled in this channel. I'll respond to all messages!")
 
+    @commands.command(name='cache')
+    async def toggle_completion_cache(self, ctx, option: str = None):
+        channel_id = ctx.channel.id
+        cache = self.bot.completion_cache
+
+        if option == 'clear':
+            removed = cache.clear(channel_id)
+            await ctx.send(f"🗑️ Cleared {removed} cached replies for this channel.")
+            return
+
+        enable = {'on': True, 'off': False}.get(option)
+        if enable is None:
+            enable = not await self.bot.completion_cache_enabled(channel_id)
+        self.bot.preferences.set_completion_cache(channel_id, enable)
+        if enable:
+            await ctx.send("💾 Reply cache enabled in this channel. Repeated questions will be answered from cache.")
+        else:
+            await ctx.send("💾 Reply cache disabled in this channel.")
+
+    def _scope_label(self, ctx) -> str:
+        """How the caller's conversation scope reads in a reply."""
+        place = "this thread" if isinstance(ctx.channel, discord.Thread) else "this channel"
+        if self.config.history_scope == USER:
+            return f"your conversation in {place}"
+        if self.config.history_scope == CHANNEL and isinstance(ctx.channel, discord.Thread):
+            return "this thread's parent channel"
+        return place
+
     @commands.command(name='clear')
     async def clear_history(self, ctx):
-        self.bot.conversation_history.clear_history(ctx.channel.id)
-        await ctx.send("🗑️ Conversation history cleared for this channel.")
+        self.bot.conversation_history.clear_history(self.bot.history_scope(ctx))
+        await ctx.send(f"🗑️ Conversation history cleared for {self._scope_label(ctx)}.")
 
     @commands.command(name='history')
     async def show_history(self, ctx):
-        history = self.bot.conversation_history.get_history(ctx.channel.id)
+        scope = self.bot.history_scope(ctx)
+        await self.bot.conversation_history.ensure_loaded(scope)
+        history = self.bot.conversation_history.get_history(scope)
         if not history:
-            await ctx.send("📭 No conversation history for this channel.")
+            await ctx.send(f"📭 No conversation history for {self._scope_label(ctx)}.")
             return
 
         history_text = f"📖 **Conversation History ({len(history)} messages):**\n"
         for i, msg in enumerate(history[-10:], 1):
-            role = "🟦 User" if msg['role'] == 'user' else "🟩 Bot"
+            if msg.get('summary'):
+                role = "📝 Summary"
+            else:
+                role = "🟦 User" if msg['role'] == 'user' else "🟩 Bot"
             name = f" ({msg.get('name', 'Unknown')})" if msg['role'] == 'user' else ""
             content = msg['content'][:100] + "..." if len(msg['content']) > 100 else msg['content']
             history_text += f"\n{i}. {role}{name}: {content}"
 
-        await ctx.send(history_text)
\ No newline at end of file
+        await ctx.send(history_text)
+
+    @commands.command(name='exporthistory')
+    @commands.is_owner()
+    async def export_history(self, ctx):
+        history = self.bot.conversation_history
+        path = os.path.join(tempfile.gettempdir(), f"straico-history-{int(time.time())}.jsonl.gz")
+        async with ctx.typing():
+            if history.store is not None:
+                await history.store.flush()
+                records = records_from_database(history.store.path)
+            else:
+                records = records_from_history(history)
+            # Compression and disk I/O stay off the event loop
+            scopes, messages = await asyncio.to_thread(write_records, records, path)
+
+        size = os.path.getsize(path)
+        limit = ctx.guild.filesize_limit if ctx.guild else 8 * 1024 * 1024
+        summary = f"📦 Exported {scopes} conversations ({messages} messages, {size / 2 ** 20:.1f} MiB)."
+        if size <= limit:
+            await ctx.send(summary, file=discord.File(path))
+            os.remove(path)
+        else:
+            await ctx.send(f"{summary} Too large to upload; saved on the bot host at `{path}`.")
+
+    @commands.command(name='importhistory')
+    @commands.is_owner()
+    async def import_history(self, ctx):
+        if not ctx.message.attachments:
+            await ctx.send("❌ Attach a dump from `!exporthistory` (.jsonl, .msgpack, optionally .gz).")
+            return
+        attachment = ctx.message.attachments[0]
+        try:
+            detect_format(attachment.filename)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}")
+            return
+
+        history = self.bot.conversation_history
+        suffix = "".join(os.path.basename(attachment.filename).partition(".")[1:])
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        imported = []
+        try:
+            async with ctx.typing():
+                await attachment.save(path)
+                if history.store is not None:
+                    await history.store.flush()
+                    scopes, messages = await asyncio.to_thread(
+                        import_into_database, read_records(path), history.store.path, on_scope=imported.append
+                    )
+                else:
+                    scopes = messages = 0
+                    # Parse a batch at a time off the event loop; the dump is never held whole
+                    batches = batched(read_records(path), 500)
+                    try:
+                        while True:
+                            batch = await asyncio.to_thread(next, batches, None)
+                            if batch is None:
+                                break
+                            for record in batch:
+                                history.restore(record['scope'], record.get('summary'), record['messages'])
+                                scopes += 1
+                                messages += len(record['messages'])
+                    finally:
+                        batches.close()
+        except ValueError as e:
+            await ctx.send(f"❌ Import stopped: {e}")
+            return
+        finally:
+            os.remove(path)
+            # Cached copies are stale; they reload from the store on next use
+            for scope in imported:
+                history.forget(scope)
+
+        await ctx.send(f"📥 Imported {scopes} conversations ({messages} messages).")
+
+    @commands.command(name='apistats')
+    async def api_stats(self, ctx):
+        stats = self.bot.straico_service.get_stats()
+
+        embed = discord.Embed(title="Straico API Statistics", color=0x0099ff)
+
+        flights = stats['singleflight']
+        embed.add_field(
+            name="Request Coalescing",
+            value=f"Upstream calls: {flights['executed']}\nCoalesced: {flights['coalesced']}\n"
+                  f"Abandoned: {flights['abandoned']}\nIn flight: {flights['in_flight']}",
+            inline=True
+        )
+        cache = stats['cache']
+        embed.add_field(
+            name="Response Cache",
+            value=f"Entries: {cache['entries']}/{cache['max_entries']}\n"
+                  f"Size: {cache['bytes'] // 1024} KiB / {cache['max_bytes'] // 1024} KiB\n"
+                  f"Hits: {cache['hits']} (+{cache['stale_hits']} stale)\nMisses: {cache['misses']}\n"
+                  f"Hit rate: {cache['hit_rate']:.0%}\nEvictions: {cache['evictions']}",
+            inline=True
+        )
+
+        limits = "\n".join(
+            f"`{name}` limit {s['limit']} · in flight {s['in_flight']} · queued {s['queued']} · cuts {s['decreases']}"
+            for name, s in stats['concurrency'].items()
+        )
+        embed.add_field(name="Adaptive Concurrency", value=limits, inline=False)
+
+        scheduler = stats['scheduler']
+        queues = "\n".join(
+            f"`{name}` queued {s['queued']} · served {s['served']} · wait avg {s['avg_wait_ms']} ms / p95 {s['p95_wait_ms']} ms"
+            for name, s in scheduler['classes'].items()
+        )
+        embed.add_field(
+            name=f"Priority Queues ({scheduler['in_flight']}/{scheduler['capacity']} in flight, "
+                 f"{scheduler['rejected']} timed out)",
+            value=queues,
+            inline=False
+        )
+
+        hedging = stats['hedging']
+        latency = (f"p50 {hedging['p50_ms']} ms · p95 {hedging['p95_ms']} ms"
+                   if hedging['p95_ms'] is not None else f"calibrating ({hedging['samples']} samples)")
+        embed.add_field(
+            name="Chat Latency & Hedging",
+            value=f"{latency}\nHedged: {hedging['hedges']}/{hedging['requests']} "
+                  f"(cap {hedging['ratio']:.0%}) · hedge won {hedging['hedge_wins']}\n"
+                  f"JSON decoder: `{stats['decoder']}`",
+            inline=False
+        )
+
+        context = stats['context']
+        embed.add_field(
+            name="Chat Context",
+            value=f"Budget: {context['max_tokens']} tokens\n"
+                  f"Packed: {context['avg_packed']}/{context['avg_available']} messages avg\n"
+                  f"Truncated: {context['truncated']}",
+            inline=True
+        )
+
+        memory = self.bot.conversation_history.get_stats()
+        store = memory['store']
+        embed.add_field(
+            name="Conversation Memory",
+            value=f"Scopes: {memory['scopes']} (per {self.config.history_scope})\n"
+                  f"Messages: {memory['messages']}/{memory['max_messages']}\n"
+                  f"Text: {memory['bytes'] // 1024} KiB / {memory['max_bytes'] // 1024} KiB\n"
+                  f"Idle scopes evicted: {memory['evicted_scopes']}"
+                  + (f"\nOn disk: {store['written']} writes in {store['flushes']} batches · "
+                     f"{store['pending']} pending · {store['loads']} loads" if store else ""),
+            inline=True
+        )
+
+        bursts = self.bot.auto_responder.get_stats()
+        embed.add_field(
+            name="Auto-Response",
+            value=f"Messages: {bursts['submitted']}\nReplies: {bursts['batches']}\n"
+                  f"Folded into bursts: {bursts['folded']}\nChannels busy: {bursts['active']}",
+            inline=True
+        )
+
+        catalog = self.bot.model_catalog.get_stats()
+        age = f", {int(catalog['age'] // 60)}m old" if catalog['age'] is not None else ""
+        embed.add_field(
+            name="Model Catalog",
+            value=f"Models: {catalog['models']} (from {catalog['source']}{age})\n"
+                  f"Refreshes: {catalog['refreshes']} · failed {catalog['failures']}",
+            inline=True
+        )
+
+        preferences = self.bot.preferences.get_stats()
+        embed.add_field(
+            name="Preferences",
+            value=f"Entries: {preferences['entries']}"
+                  f"{'' if preferences['warm'] else ' (loading)'}\n"
+                  + (f"On disk: {preferences['written']} writes in {preferences['flushes']} batches · "
+                     f"{preferences['pending']} pending · {preferences['read_throughs']} read-throughs"
+                     if preferences['path'] else "Memory only"),
+            inline=True
+        )
+
+        compaction = self.bot.compactor.get_stats()
+        embed.add_field(
+            name="History Compaction",
+            value=(f"At {compaction['threshold']} messages, keep {compaction['keep_recent']}\n"
+                   f"Compactions: {compaction['compactions']} ({compaction['messages_folded']} messages folded)\n"
+                   f"Failed: {compaction['failures']} · running {compaction['running']}"
+                   if compaction['threshold'] > 0 else "Disabled"),
+            inline=True
+        )
+
+        replies = self.bot.completion_cache.get_stats()
+        embed.add_field(
+            name="Reply Cache",
+            value=f"Channels: {len(self.bot.completion_cache_channels())}\n"
+                  f"Entries: {replies['entries']}/{replies['max_entries']}"
+                  f"{' (on disk)' if replies['persistent'] else ''}\n"
+                  f"Hit rate: {replies['hit_rate']:.0%}\nAPI calls saved: {replies['saved_calls']}",
+            inline=True
+        )
+
+        connections = stats['connections']
+        cold, warm = connections['cold'], connections['warm']
+        embed.add_field(
+            name="Connections",
+            value=f"Cold (new connection): p50 {cold['p50_ms']} ms over {cold['count']}\n"
+                  f"Warm (reused): p50 {warm['p50_ms']} ms over {warm['count']}\n"
+                  f"Warm target: {connections['warm_target']} · probes {connections['probes']} "
+                  f"({connections['probe_failures']} failed, {connections['replaced']} replaced)",
+            inline=False
+        )
+
+        state_icons = {'active': '🟢', 'cooling': '🟡', 'exhausted': '🔴'}
+        keys = "\n".join(
+            f"{state_icons.get(k['state'], '⚪')} `{k['key']}` in flight {k['in_flight']} · requests {k['requests']} · "
+            f"credits {k['credits'] if k['credits'] is not None else '?'}"
+            + (f" · back in {k['retry_after']:.0f}s" if k['state'] == 'cooling' else "")
+            for k in stats['keys']
+        )
+        embed.add_field(name="API Keys", value=keys, inline=False)
+
+        rate = self.bot.rate_limiter.get_stats()
+        rejected = ", ".join(f"{tier}: {count}" for tier, count in rate['rejected'].items()) or "none"
+        tracked = sum(rate['tracked_buckets'].values())
+        embed.add_field(
+            name="Rate Limiting",
+            value=f"Allowed: {rate['allowed']}\nRejected: {rejected}\nActive buckets: {tracked}",
+            inline=False
+        )
+
+        await ctx.send(embed=embed)
+
+    @commands.command(name='breakers', aliases=['circuits'])
+    async def show_breakers(self, ctx):
+        breakers = self.bot.straico_service.get_stats()['breakers']
+
+        if not breakers:
+            await ctx.send("✅ No API calls recorded yet - all circuits closed.")
+            return
+
+        state_icons = {'closed': '🟢', 'half_open': '🟡', 'open': '🔴'}
+        # Show tripped circuits first
+        breakers.sort(key=lambda b: (b['state'] == 'closed', b['endpoint'], b['model']))
+
+        embed = discord.Embed(title="API Circuit Breakers", color=0x0099ff)
+        lines = []
+        for b in breakers[:25]:
+            line = f"{state_icons.get(b['state'], '⚪')} `{b['endpoint']}` · `{b['model']}` · {b['state']}"
+            if b['state'] == 'open':
+                line += f" (retry in {b['retry_after']:.0f}s)"
+            if b['consecutive_failures']:
+                line += f" · {b['consecutive_failures']} failures"
+            if b['fast_failures']:
+                line += f" · {b['fast_failures']} fast-failed"
+            lines.append(line)
+
+        embed.description = "\n".join(lines)
+        open_count = sum(1 for b in breakers if b['state'] != 'closed')
+        embed.set_footer(text=f"{open_count} of {len(breakers)} circuits tripped")
+        await ctx.send(embed=embed)
\ No newline at end of file
@@ -3,6 +3,7 @@ from discord.ext import commands
 from typing import List
 import json
 from plugins.base import BasePlugin
+from core.errors import CircuitOpenError, OverloadedError
 
 
 class VideoPlugin(BasePlugin):
@@ -27,9 +28,12 @@ class VideoPlugin(BasePlugin):
 
     @commands.command(name='video')
     async def generate_video(self, ctx, *, prompt: str):
+        self.bot.check_rate_limit(ctx.author.id, ctx.channel.id, ctx.guild.id if ctx.guild else None,
+                                  cost=self.config.rate_cost_video)
+
         async with ctx.typing():
             try:
-                response = await self.bot.straico_service.generate_video(prompt)
+                response = await self.bot.straico_service.generate_video(prompt, guild_id=ctx.guild.id if ctx.guild else None)
 
                 generation_id = response.get('id')
                 if generation_id:
@@ -37,6 +41,8 @@ class VideoPlugin(BasePlugin):
                 else:
                     await ctx.send(f"✅ Video generation request submitted for: `{prompt}`\nResponse: {json.dumps(response, indent=2)}")
 
+            except (CircuitOpenError, OverloadedError) as e:
+                await self.bot._handle_api_error(ctx.channel, e)
             except Exception as e:
                 await ctx.send(f"Error generating video: {str(e)}")
 
@@ -44,7 +50,7 @@ class VideoPlugin(BasePlugin):
     async def check_status(self, ctx, generation_id: str):
         async with ctx.typing():
             try:
-                status = await self.bot.straico_service.get_generation_status(generation_id)
+                status = await self.bot.straico_service.get_generation_status(generation_id, guild_id=ctx.guild.id if ctx.guild else None)
 
                 embed = discord.Embed(title="Generation Status", color=0xffdd59)
                 embed.add_field(name="ID", value=generation_id, inline=False)
@@ -57,5 +63,7 @@ class VideoPlugin(BasePlugin):
 
                 await ctx.send(embed=embed)
 
+            except (CircuitOpenError, OverloadedError) as e:
+                await self.bot._handle_api_error(ctx.channel, e)
             except Exception as e:
                 await ctx.send(f"Error checking status: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,161 @@
+import json
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float                            # seconds an entry is fresh
+    stale_while_revalidate: float = 0.0   # extra seconds a stale entry may be served while refreshing
+
+
+# Keyed by endpoint; entries ending in '/' match any endpoint with that prefix
+DEFAULT_CACHE_POLICIES: Dict[str, CachePolicy] = {
+    "/v1/models": CachePolicy(ttl=600, stale_while_revalidate=3600),
+    "/v1/user": CachePolicy(ttl=60, stale_while_revalidate=600),
+    "/generations/": CachePolicy(ttl=5),
+}
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'stored_at', 'policy')
+
+    def __init__(self, value: Any, size: int, stored_at: float, policy: CachePolicy):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.policy = policy
+
+
+class ResponseCache:
+    """Size- and byte-bounded LRU cache with per-endpoint TTLs.
+
+    Entries past their TTL but inside the stale-while-revalidate window are
+    returned as ``STALE`` so the caller can serve them and refresh in the
+    background; anything older is treated as a miss and dropped.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 4 * 1024 * 1024,
+                 default_policy: CachePolicy = CachePolicy(ttl=300),
+                 policies: Optional[Dict[str, CachePolicy]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_policy = default_policy
+        self.policies = dict(DEFAULT_CACHE_POLICIES if policies is None else policies)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._endpoints: Dict[str, str] = {}
+        self.total_bytes = 0
+        self.logger = logging.getLogger(__name__)
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def policy_for(self, endpoint: str) -> CachePolicy:
+        policy = self.policies.get(endpoint)
+        if policy is not None:
+            return policy
+        for prefix, candidate in self.policies.items():
+            if prefix.endswith('/') and endpoint.startswith(prefix):
+                return candidate
+        return self.default_policy
+
+    def get(self, key: str) -> Tuple[Any, Optional[str]]:
+        """Return ``(value, FRESH | STALE)`` or ``(None, None)`` on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, None
+
+        age = time.monotonic() - entry.stored_at
+        if age < entry.policy.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value, FRESH
+        if age < entry.policy.ttl + entry.policy.stale_while_revalidate:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry.value, STALE
+
+        self._remove(key)
+        self.expirations += 1
+        self.misses += 1
+        return None, None
+
+    def set(self, key: str, value: Any, endpoint: str, size: Optional[int] = None):
+        policy = self.policy_for(endpoint)
+        if policy.ttl <= 0:
+            return
+
+        if size is None:
+            size = self._estimate_size(value)
+        if size > self.max_bytes:
+            self.logger.debug(f"Not caching {endpoint}: {size} bytes exceeds cache budget")
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _Entry(value, size, time.monotonic(), policy)
+        self._endpoints[key] = endpoint
+        self.total_bytes += size
+
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """Drop one key, every entry for an endpoint (or endpoint prefix), or everything."""
+        if key is not None:
+            targets = [key] if key in self._entries else []
+        elif endpoint is not None:
+            targets = [k for k, ep in self._endpoints.items() if ep == endpoint or ep.startswith(endpoint.rstrip('/') + '/')]
+        else:
+            targets = list(self._entries)
+
+        for target in targets:
+            self._remove(target)
+        self.invalidations += len(targets)
+        return len(targets)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        self._endpoints.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        try:
+            return len(json.dumps(value, separators=(',', ':'), default=str))
+        except (TypeError, ValueError):
+            return 1024
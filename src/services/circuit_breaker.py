@@ -0,0 +1,162 @@
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from core.errors import CircuitOpenError
+from services.concurrency import classify_outcome, SUCCESS, OVERLOAD
+from services.endpoints import normalize_endpoint
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Friendly names used in fast-fail messages
+_ENDPOINT_LABELS = {
+    "/v1/prompt/completion": "chat",
+    "/v1/image/generation": "image generation",
+    "/videos/generations": "video generation",
+    "/generations/": "generation status",
+    "/v1/models": "model list",
+    "/v1/user": "account",
+}
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one (endpoint, model) pair.
+
+    ``failure_threshold`` consecutive overload failures open the circuit.
+    After ``recovery_timeout`` it goes half-open and lets up to
+    ``half_open_probes`` requests through: a success closes it, a failure
+    re-opens it with the timeout doubled (capped at ``max_recovery_timeout``).
+    """
+
+    def __init__(self, endpoint: str, model: str, failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0, max_recovery_timeout: float = 300.0,
+                 half_open_probes: int = 1):
+        self.endpoint = endpoint
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.logger = logging.getLogger(__name__)
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+
+        self.times_opened = 0
+        self.fast_failures = 0
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Return True if a request may proceed (possibly as a half-open probe)."""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.fast_failures += 1
+                return False
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+            self.logger.info(f"Circuit {self.endpoint} [{self.model}] half-open, probing")
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.fast_failures += 1
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def record(self, outcome: str, was_probe: bool):
+        if was_probe:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+        if outcome == SUCCESS:
+            if self.state != CLOSED:
+                self.logger.info(f"Circuit {self.endpoint} [{self.model}] closed")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.recovery_timeout = self.base_recovery_timeout
+        elif outcome == OVERLOAD:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self.recovery_timeout = min(self.max_recovery_timeout, self.recovery_timeout * 2)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.logger.warning(
+            f"Circuit {self.endpoint} [{self.model}] opened for {self.recovery_timeout:.0f}s "
+            f"after {self.consecutive_failures} failures"
+        )
+
+    def get_stats(self) -> Dict:
+        return {
+            'endpoint': self.endpoint,
+            'model': self.model,
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_after': round(self.retry_after(), 1),
+            'times_opened': self.times_opened,
+            'fast_failures': self.fast_failures,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Lazily creates one CircuitBreaker per (endpoint, model)."""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, endpoint: str, model: Optional[str] = None) -> CircuitBreaker:
+        key = (normalize_endpoint(endpoint), model or "*")
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                key[0], key[1],
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout
+            )
+            self._breakers[key] = breaker
+        return breaker
+
+    @asynccontextmanager
+    async def guard(self, endpoint: str, model: Optional[str] = None):
+        """Fail fast with CircuitOpenError while open; otherwise record the outcome."""
+        breaker = self.get(endpoint, model)
+        was_probe = breaker.state != CLOSED
+        if not breaker.try_acquire():
+            label = _ENDPOINT_LABELS.get(breaker.endpoint, breaker.endpoint)
+            target = f" for `{breaker.model}`" if breaker.model != "*" else ""
+            wait = breaker.retry_after()
+            raise CircuitOpenError(
+                f"The {label} service{target} is temporarily unavailable. "
+                f"Please try again in {max(1, round(wait))}s.",
+                retry_after=wait
+            )
+        error = None
+        try:
+            yield breaker
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            breaker.record(classify_outcome(error), was_probe)
+
+    def get_stats(self):
+        return [breaker.get_stats() for breaker in self._breakers.values()]
+
+    def reset(self):
+        self._breakers.clear()
@@ -0,0 +1,131 @@
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from services.context_builder import speaker
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the following Discord conversation in at most 150 words so it can stand in for "
+    "the original messages. Keep who said what, facts, decisions and open questions; "
+    "drop greetings and small talk. Reply with the summary only.\n\n"
+)
+
+
+def summary_message(text: str) -> Dict:
+    return {"role": "system", "content": SUMMARY_PREFIX + text, "summary": True}
+
+
+def summary_prompt(messages: List[Dict]) -> str:
+    lines = [f"{speaker(m)}: {m.get('content') or ''}" for m in messages]
+    return SUMMARY_INSTRUCTIONS + "\n".join(lines)
+
+
+class HistoryCompactor:
+    """Folds the oldest turns of long conversation histories into one summary message.
+
+    When a scope reaches ``threshold`` messages, everything but the newest
+    ``keep_recent`` is handed to ``summarize`` in a background task and, once
+    it returns, replaced by a single summary message (an earlier summary is
+    folded into the next one). Replies never wait on this: they read whatever
+    the history holds at the time, and a failed summary leaves the history
+    untouched and is not retried for ``retry_delay`` seconds. At most one
+    compaction runs per scope and ``max_concurrent`` overall.
+    """
+
+    def __init__(self, history, summarize: Callable[[str], Awaitable[Optional[str]]],
+                 threshold: int = 40, keep_recent: int = 20, max_concurrent: int = 1,
+                 retry_delay: float = 60.0):
+        self.history = history
+        self.summarize = summarize
+        self.threshold = threshold
+        self.keep_recent = keep_recent
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._running: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._retry_at: Dict[Hashable, float] = {}
+
+        self.compactions = 0
+        self.failures = 0
+        self.discarded = 0
+        self.messages_folded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def maybe_compact(self, scope: Hashable) -> bool:
+        """Schedule a compaction of ``scope`` if it is due; never waits."""
+        if not self.enabled or scope in self._running:
+            return False
+        if self.history.message_count(scope) < self.threshold:
+            return False
+        if self._retry_at.get(scope, 0.0) > time.monotonic():
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self._running.add(scope)
+        task = loop.create_task(self.compact(scope))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def compact(self, scope: Hashable) -> bool:
+        """Summarize and replace the oldest turns of one scope now."""
+        self._running.add(scope)
+        try:
+            async with self._slots:
+                messages = list(self.history.get_history(scope))
+                folded = messages[:-self.keep_recent] if self.keep_recent else messages
+                # A lone summary has nothing left to fold
+                if len(folded) < 2:
+                    return False
+
+                try:
+                    text = await self.summarize(summary_prompt(folded))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    text = None
+                    self.logger.warning(f"Compacting history for scope {scope} failed: {e}")
+                if not text:
+                    self.failures += 1
+                    self._retry_at[scope] = time.monotonic() + self.retry_delay
+                    return False
+
+                if not self.history.replace_prefix(scope, folded, summary_message(text.strip())):
+                    # Cleared or trimmed past the snapshot while we were summarizing
+                    self.discarded += 1
+                    return False
+
+                self._retry_at.pop(scope, None)
+                self.compactions += 1
+                self.messages_folded += len(folded)
+                self.logger.info(f"Compacted {len(folded)} messages in scope {scope} into a summary")
+                return True
+        finally:
+            self._running.discard(scope)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        return {
+            'threshold': self.threshold,
+            'keep_recent': self.keep_recent,
+            'compactions': self.compactions,
+            'messages_folded': self.messages_folded,
+            'failures': self.failures,
+            'discarded': self.discarded,
+            'running': len(self._running),
+        }
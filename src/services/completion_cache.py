@@ -0,0 +1,251 @@
+import time
+import re
+import json
+import asyncio
+import hashlib
+import logging
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Queued database writes, applied in order on the worker thread
+_SET = "set"
+_DELETE = "delete"
+_CLEAR = "clear"
+
+
+# Words that tie a question to the reply before it ("why?", "explain that again")
+_REFERENCES = frozenset(
+    "it its that this these those they them their why more else again above previous earlier also too same instead"
+    .split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of a message used for cache keys."""
+    return " ".join(text.casefold().split())
+
+
+def is_follow_up(text: str) -> bool:
+    """Whether a message likely depends on the conversation before it.
+
+    Very short messages and ones that refer back ("it", "that", "why") count
+    as follow-ups; erring this way only costs cache hits, never wrong answers.
+    """
+    words = re.findall(r"[\w']+", normalize_text(text))
+    return len(words) < 3 or any(word in _REFERENCES for word in words)
+
+
+class _Entry:
+    __slots__ = ('channel_id', 'text', 'created')
+
+    def __init__(self, channel_id: int, text: str, created: float):
+        self.channel_id = channel_id
+        self.text = text
+        self.created = created
+
+
+class CompletionCache:
+    """Exact-match cache of chat completion text, scoped per channel.
+
+    Keys hash the channel, model and the normalized question. A follow-up
+    (see ``is_follow_up``) also keys on the messages before it, up to the
+    last ``context_messages`` in all (2, the default, adds the reply it
+    answers), so "why?" only hits after the same exchange while a repeated
+    standalone question hits however much chatter came between. With
+    ``context_messages`` 0 every key covers the whole conversation and 1
+    keys on the question alone. Entries live in an
+    in-memory LRU bounded by ``max_entries`` and expire ``ttl`` seconds
+    after creation. With a ``path`` they are also kept in SQLite so hits
+    survive restarts: ``start()`` loads the newest entries on a worker
+    thread, and changes are queued and written in one transaction every
+    ``flush_interval`` seconds, so replies never wait on the disk.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2000, ttl: float = 86400,
+                 context_messages: int = 2, flush_interval: float = 1.0, batch_size: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.context_messages = context_messages
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending: List[tuple] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.written = 0
+        self.errors = 0
+
+    # --- worker thread -----------------------------------------------------
+
+    def _open(self) -> List[tuple]:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY, channel_id INTEGER NOT NULL, model TEXT NOT NULL,"
+            " text TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        db.execute("DELETE FROM completions WHERE created < ?", (time.time() - self.ttl,))
+        rows = db.execute(
+            "SELECT key, channel_id, text, created FROM completions ORDER BY created DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        db.commit()
+        self._db = db
+        return rows
+
+    def _apply(self, ops: List[tuple]):
+        with self._db as db:
+            for op in ops:
+                kind = op[0]
+                if kind == _SET:
+                    db.execute(
+                        "INSERT OR REPLACE INTO completions (key, channel_id, model, text, created) "
+                        "VALUES (?, ?, ?, ?, ?)", op[1:]
+                    )
+                elif kind == _DELETE:
+                    db.execute("DELETE FROM completions WHERE key = ?", (op[1],))
+                elif op[1] is None:
+                    db.execute("DELETE FROM completions")
+                else:
+                    db.execute("DELETE FROM completions WHERE channel_id = ?", (op[1],))
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- event loop side ---------------------------------------------------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def start(self):
+        """Open the database and load the newest unexpired entries."""
+        if self.path is None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="completion-cache")
+        rows = await self._run(self._open)
+        # Oldest first so the newest end up most recently used; anything cached meanwhile is newer still
+        loaded: "OrderedDict[str, _Entry]" = OrderedDict(
+            (key, _Entry(channel_id, text, created)) for key, channel_id, text, created in reversed(rows)
+        )
+        loaded.update(self._entries)
+        self._entries = loaded
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_periodically())
+        self.logger.info(f"Loaded {len(rows)} cached completions from {self.path}")
+
+    def _submit(self, op: tuple):
+        if self.path is None:
+            return
+        self._pending.append(op)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def make_key(self, channel_id: int, model: str, messages: List[Dict]) -> str:
+        window = messages
+        if self.context_messages > 0:
+            window = messages[-self.context_messages:]
+            if window and not is_follow_up(window[-1].get('content') or ''):
+                window = window[-1:]
+        context = [(m.get('role', ''), normalize_text(m.get('content') or '')) for m in window]
+        return hashlib.sha256(json.dumps([channel_id, model, context]).encode()).hexdigest()
+
+    def get(self, channel_id: int, model: str, messages: List[Dict]) -> Optional[str]:
+        key = self.make_key(channel_id, model, messages)
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry.created > self.ttl:
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.text
+
+    def set(self, channel_id: int, model: str, messages: List[Dict], text: str):
+        if not text:
+            return
+        key = self.make_key(channel_id, model, messages)
+        created = time.time()
+        self._entries[key] = _Entry(channel_id, text, created)
+        self._entries.move_to_end(key)
+        self._submit((_SET, key, channel_id, model, text, created))
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        self._entries.pop(key, None)
+        self._submit((_DELETE, key))
+
+    def clear(self, channel_id: Optional[int] = None) -> int:
+        """Drop every entry, or only those for one channel."""
+        keys = [k for k, e in self._entries.items() if channel_id is None or e.channel_id == channel_id]
+        for key in keys:
+            self._entries.pop(key)
+        self._submit((_CLEAR, channel_id))
+        return len(keys)
+
+    async def flush(self):
+        if not self._pending or self._db is None:
+            return
+        ops, self._pending = self._pending, []
+        try:
+            await self._run(self._apply, ops)
+            self.written += len(ops)
+        except Exception as e:
+            self.errors += 1
+            self.logger.error(f"Failed to write {len(ops)} completion cache change(s): {e}")
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._db is not None:
+            await self.flush()
+            await self._run(self._close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_calls': self.hits,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'persistent': self.path is not None,
+            'pending': len(self._pending),
+            'errors': self.errors,
+        }
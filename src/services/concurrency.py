@@ -0,0 +1,185 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from core.errors import APIError, OverloadedError, DeadlineExceededError
+from services.endpoints import CHAT, IMAGE, VIDEO, METADATA
+
+SUCCESS = "success"
+OVERLOAD = "overload"   # 429/5xx/timeout: the upstream is struggling
+IGNORE = "ignore"       # client errors and cancellations say nothing about capacity
+
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class LimiterSettings:
+    initial: int
+    minimum: int = 1
+    maximum: int = 16
+
+
+DEFAULT_LIMITS: Dict[str, LimiterSettings] = {
+    CHAT: LimiterSettings(initial=4, maximum=16),
+    IMAGE: LimiterSettings(initial=2, maximum=8),
+    VIDEO: LimiterSettings(initial=1, maximum=4),
+    METADATA: LimiterSettings(initial=2, maximum=8),
+}
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one class of API work.
+
+    Each healthy completion raises the limit by ``1/limit`` (about +1 per
+    window of requests); an overload signal multiplies it by
+    ``decrease_factor``, at most once per ``cooldown`` so a burst of failures
+    from the same window only counts once. Callers over the limit queue in
+    FIFO order until a slot frees up or their wait deadline passes.
+    """
+
+    def __init__(self, name: str, settings: LimiterSettings, decrease_factor: float = 0.5,
+                 cooldown: float = 1.0, latency_tolerance: float = 2.0):
+        self.name = name
+        self.settings = settings
+        self.limit = float(settings.initial)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.latency_tolerance = latency_tolerance
+        self.logger = logging.getLogger(__name__)
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self._latency_ewma: Optional[float] = None
+
+        self.increases = 0
+        self.decreases = 0
+        self.rejected = 0
+        self.peak_queue = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.settings.minimum, int(self.limit))
+
+    def is_backing_off(self) -> bool:
+        return time.monotonic() - self._last_decrease < self.cooldown
+
+    async def acquire(self, timeout: Optional[float] = None):
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_queue = max(self.peak_queue, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # the slot was handed over just as the deadline fired
+            self._discard(waiter)
+            self.rejected += 1
+            raise OverloadedError(
+                f"The AI service is busy ({self.name} queue wait exceeded {timeout:.0f}s)"
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Pass the slot we were just given on to the next waiter
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._discard(waiter)
+            raise
+
+    def release(self, outcome: str, latency: float):
+        self.in_flight -= 1
+
+        if outcome == SUCCESS:
+            healthy = self._latency_ewma is None or latency <= self._latency_ewma * self.latency_tolerance
+            self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+            if healthy and self.limit < self.settings.maximum:
+                self.limit = min(self.settings.maximum, self.limit + 1.0 / self.limit)
+                self.increases += 1
+        elif outcome == OVERLOAD and not self.is_backing_off():
+            self.limit = max(float(self.settings.minimum), self.limit * self.decrease_factor)
+            self._last_decrease = time.monotonic()
+            self.decreases += 1
+            self.logger.warning(f"{self.name} limit cut to {self.capacity} after overload signal")
+
+        self._wake()
+
+    def get_stats(self) -> Dict:
+        return {
+            'limit': self.capacity,
+            'in_flight': self.in_flight,
+            'queued': len(self._waiters),
+            'peak_queue': self.peak_queue,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'rejected': self.rejected,
+            'latency_ewma_ms': round(self._latency_ewma * 1000) if self._latency_ewma is not None else None,
+        }
+
+    def _discard(self, waiter: asyncio.Future):
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def classify_outcome(error: Optional[BaseException]) -> str:
+    """Map a request result onto the limiter's feedback signal."""
+    if error is None:
+        return SUCCESS
+    # Cancellation, early generator exit, our own queue rejections and calls cut short
+    # by the caller's deadline carry no signal
+    if not isinstance(error, APIError) or isinstance(error, (OverloadedError, DeadlineExceededError)):
+        return IGNORE
+    # Timeouts and network failures arrive as APIError without a status code
+    if error.status_code is None or error.status_code in OVERLOAD_STATUSES:
+        return OVERLOAD
+    return IGNORE
+
+
+class ConcurrencyController:
+    """One AdaptiveLimiter per endpoint class."""
+
+    def __init__(self, limits: Optional[Dict[str, LimiterSettings]] = None, queue_timeout: float = 15.0):
+        self.queue_timeout = queue_timeout
+        self.limiters = {
+            name: AdaptiveLimiter(name, settings)
+            for name, settings in {**DEFAULT_LIMITS, **(limits or {})}.items()
+        }
+
+    def __getitem__(self, endpoint_cls: str) -> AdaptiveLimiter:
+        return self.limiters[endpoint_cls]
+
+    @asynccontextmanager
+    async def slot(self, endpoint_cls: str, timeout: Optional[float] = None):
+        """Hold a concurrency slot for one request and feed its outcome back."""
+        limiter = self.limiters[endpoint_cls]
+        await limiter.acquire(self.queue_timeout if timeout is None else timeout)
+        started = time.monotonic()
+        error = None
+        try:
+            yield limiter
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            limiter.release(classify_outcome(error), time.monotonic() - started)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {name: limiter.get_stats() for name, limiter in self.limiters.items()}
@@ -0,0 +1,40 @@
+from typing import Any, Dict
+
+from services.hedging import LatencyTracker
+
+
+class ConnectionHealth:
+    """Cold- vs warm-connection latency and keepalive probe counters.
+
+    Latency is time to response headers, split by whether the request
+    opened a new connection (DNS + TCP + TLS) or reused a pooled one.
+    """
+
+    def __init__(self, window: int = 200):
+        self.cold = LatencyTracker(window, min_samples=1)
+        self.warm = LatencyTracker(window, min_samples=1)
+        self.probes = 0
+        self.probe_failures = 0
+        self.replaced = 0
+
+    def record_request(self, latency: float, reused: bool):
+        (self.warm if reused else self.cold).record(latency)
+
+    @staticmethod
+    def _summary(tracker: LatencyTracker) -> Dict[str, Any]:
+        p50 = tracker.percentile(0.5)
+        p95 = tracker.percentile(0.95)
+        return {
+            'count': len(tracker),
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000) if p95 is not None else None,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'cold': self._summary(self.cold),
+            'warm': self._summary(self.warm),
+            'probes': self.probes,
+            'probe_failures': self.probe_failures,
+            'replaced': self.replaced,
+        }
@@ -0,0 +1,115 @@
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+from config.models import context_window
+
+# Role label, separators and the like per packed message
+MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    """Approximate token count at ~4 UTF-8 bytes per token.
+
+    Counting bytes rather than characters errs high for non-Latin scripts,
+    which is the safe side for a budget. Cached, so each distinct message
+    is only measured once however often the history is rebuilt.
+    """
+    return (len(text.encode('utf-8')) + 3) // 4
+
+
+def _message_tokens(message: Dict) -> int:
+    return estimate_tokens(message.get('content') or '') + MESSAGE_OVERHEAD
+
+
+def speaker(message: Dict) -> str:
+    """Label a message's author in a flattened transcript."""
+    if message.get('role') == 'assistant':
+        return "Assistant"
+    return message.get('name') or message.get('role', 'user').title()
+
+
+class ContextBuilder:
+    """Packs as much recent conversation as fits a model's token budget.
+
+    The budget is ``max_tokens`` capped by the model's context window less
+    the tokens reserved for the reply. The newest message is always sent
+    (truncated if it alone is over budget); older messages are added
+    newest-first until the next one would not fit. A leading summary of
+    compacted history is kept ahead of them whenever it fits.
+    """
+
+    def __init__(self, max_tokens: int = 4000, window_for: Callable[[str], int] = context_window):
+        self.max_tokens = max_tokens
+        self.window_for = window_for
+        self.built = 0
+        self.messages_in = 0
+        self.messages_packed = 0
+        self.truncated = 0
+
+    def budget_for(self, model: str, reply_tokens: int = 0) -> int:
+        return max(MESSAGE_OVERHEAD + 1, min(self.max_tokens, self.window_for(model) - reply_tokens))
+
+    def select(self, model: str, messages: List[Dict], reply_tokens: int = 0) -> List[Dict]:
+        if not messages:
+            return []
+        budget = self.budget_for(model, reply_tokens)
+
+        latest = messages[-1]
+        used = _message_tokens(latest)
+        if used > budget:
+            # Keep the start of an oversized message; ~4 bytes per token
+            keep = (budget - MESSAGE_OVERHEAD) * 4
+            content = (latest.get('content') or '').encode('utf-8')[:keep].decode('utf-8', errors='ignore')
+            latest = {**latest, 'content': content}
+            used = budget
+            self.truncated += 1
+
+        older = messages[:-1]
+        summary = None
+        if older and older[0].get('summary') and used + _message_tokens(older[0]) <= budget:
+            summary, older = older[0], older[1:]
+            used += _message_tokens(summary)
+
+        packed = [latest]
+        for message in reversed(older):
+            cost = _message_tokens(message)
+            if used + cost > budget:
+                break
+            packed.append(message)
+            used += cost
+        if summary is not None:
+            packed.append(summary)
+        packed.reverse()
+
+        self.built += 1
+        self.messages_in += len(messages)
+        self.messages_packed += len(packed)
+        return packed
+
+    @staticmethod
+    def render(messages: List[Dict]) -> str:
+        """Flatten packed messages into the single prompt string the completion API takes."""
+        if not messages:
+            return ""
+        if len(messages) == 1:
+            return messages[0].get('content') or ''
+
+        lines = ["Conversation so far:"]
+        lines.extend(f"{speaker(m)}: {m.get('content') or ''}" for m in messages[:-1])
+        lines.append("")
+        lines.append(f"{speaker(messages[-1])}: {messages[-1].get('content') or ''}")
+        return "\n".join(lines)
+
+    def build(self, model: str, messages: List[Dict], reply_tokens: int = 0) -> str:
+        return self.render(self.select(model, messages, reply_tokens))
+
+    def get_stats(self) -> Dict:
+        return {
+            'max_tokens': self.max_tokens,
+            'built': self.built,
+            'avg_packed': round(self.messages_packed / self.built, 1) if self.built else 0,
+            'avg_available': round(self.messages_in / self.built, 1) if self.built else 0,
+            'truncated': self.truncated,
+            'token_cache': estimate_tokens.cache_info().currsize,
+        }
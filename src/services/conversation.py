@@ -1,40 +1,351 @@
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import time
 import logging
 
+from services.history_store import HistoryStore
+
+
+class Message(Mapping):
+    """One stored chat turn.
+
+    Slotted to keep per-message overhead small, but readable like the plain
+    ``{"role", "content", "name"}`` dicts the rest of the bot passes around;
+    ``name`` and ``summary`` only appear as keys when set.
+    """
+
+    __slots__ = ('role', 'content', 'name', 'summary', 'size')
+
+    def __init__(self, role: str, content: str, name: Optional[str] = None, summary: bool = False):
+        self.role = role
+        self.content = content
+        self.name = name
+        self.summary = summary
+        self.size = len(content.encode('utf-8'))
+
+    @classmethod
+    def from_dict(cls, message: Mapping) -> 'Message':
+        if isinstance(message, cls):
+            return message
+        return cls(message.get('role', 'user'), message.get('content') or '',
+                   message.get('name'), bool(message.get('summary')))
+
+    @classmethod
+    def from_row(cls, row) -> 'Message':
+        role, content, name, summary = row
+        return cls(role, content, name, bool(summary))
+
+    def __getitem__(self, key: str):
+        if key in ('role', 'content'):
+            return getattr(self, key)
+        if key == 'name' and self.name:
+            return self.name
+        if key == 'summary' and self.summary:
+            return True
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'role'
+        yield 'content'
+        if self.name:
+            yield 'name'
+        if self.summary:
+            yield 'summary'
+
+    def __len__(self) -> int:
+        return 2 + bool(self.name) + bool(self.summary)
+
+    def __repr__(self) -> str:
+        return f"Message({dict(self)!r})"
+
+
+class _Scope:
+    """One scope's messages as a ring buffer over a plain list.
+
+    The list grows to the history limit and then wraps, overwriting the
+    oldest entry at ``head``. A list is a fraction of a deque's size, which
+    matters when most of hundreds of thousands of scopes hold a few messages.
+    """
+
+    __slots__ = ('messages', 'head', 'summary', 'size', 'snapshot', 'loaded', 'appends', 'last_active')
+
+    def __init__(self, messages: Optional[List[Message]] = None, loaded: bool = True):
+        self.messages: List[Message] = messages if messages is not None else []
+        self.head = 0
+        self.summary: Optional[Message] = None
+        self.size = sum(m.size for m in self.messages)
+        self.snapshot: Optional[Tuple[Message, ...]] = None
+        self.loaded = loaded    # False until the persistent store has been read
+        self.appends = 0
+        self.last_active = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.messages) + (self.summary is not None)
+
+    def push(self, message: Message, limit: int) -> Optional[Message]:
+        """Append ``message``; returns the message it displaced once the buffer is full."""
+        messages = self.messages
+        if len(messages) < limit:
+            messages.append(message)
+            return None
+        head = self.head
+        dropped = messages[head]
+        messages[head] = message
+        self.head = head + 1 if head + 1 < len(messages) else 0
+        return dropped
+
+    def ordered(self) -> List[Message]:
+        head = self.head
+        return self.messages[head:] + self.messages[:head] if head else list(self.messages)
+
+    def drop_oldest(self, count: int) -> List[Message]:
+        ordered = self.ordered()
+        self.messages = ordered[count:]
+        self.head = 0
+        return ordered[:count]
+
+
 class ConversationHistory:
-    def __init__(self, max_history: int = 50):
-        self.history: Dict[int, List[Dict]] = {}
+    """Recent messages per conversation scope, bounded per scope and in total.
+
+    A scope is any hashable key: a channel, a thread or a user within a
+    channel (see services.scopes). Each keeps its last ``max_history``
+    messages in a ring buffer, plus at most one leading summary of compacted
+    history. Across scopes, ``max_total_messages`` and ``max_total_bytes``
+    (of message text) cap memory by forgetting the least recently active
+    scopes first, and scopes idle for ``idle_ttl`` seconds are forgotten as
+    new messages arrive. Scopes are kept in activity order, so both checks
+    only ever look at the oldest entries.
+
+    With a ``store`` (services.history_store) every change is also written
+    behind to disk, and a scope's saved history is read back the first
+    time ``ensure_loaded`` is awaited for it, including after eviction.
+    """
+
+    def __init__(self, max_history: int = 50, max_total_messages: int = 200_000,
+                 max_total_bytes: int = 64 * 1024 * 1024, idle_ttl: float = 0,
+                 store: Optional[HistoryStore] = None):
+        self._scopes: "OrderedDict[Hashable, _Scope]" = OrderedDict()
+        self.store = store
         self.max_history = max_history
+        self.max_total_messages = max_total_messages
+        self.max_total_bytes = max_total_bytes
+        self.idle_ttl = idle_ttl
         self.logger = logging.getLogger(__name__)
+        self._listeners: List[Callable[[Hashable], None]] = []
+        self._total_messages = 0
+        self._total_bytes = 0
+        self.evicted_scopes = 0
 
-    def add_message(self, channel_id: int, role: str, content: str, username: str = None):
-        if channel_id not in self.history:
-            self.history[channel_id] = []
+    def add_listener(self, callback: Callable[[Hashable], None]):
+        """Call ``callback(scope)`` after every message added to a scope."""
+        self._listeners.append(callback)
 
-        message = {
-            "role": role,
-            "content": content
-        }
-        if username:
-            message["name"] = username
+    def add_message(self, scope: Hashable, role: str, content: str, username: str = None):
+        state = self._scopes.get(scope)
+        if state is None:
+            state = self._scopes[scope] = _Scope(loaded=self.store is None)
+        else:
+            self._scopes.move_to_end(scope)
+        if self.idle_ttl > 0:
+            state.last_active = time.monotonic()
+
+        message = Message(role, content, username)
+        if self.store is not None:
+            self.store.append(str(scope), role, content, username)
+        size = message.size
+        dropped = state.push(message, self.max_history)
+        if dropped is None:
+            self._total_messages += 1
+        else:
+            size -= dropped.size
+        state.appends += 1
+        state.size += size
+        self._total_bytes += size
+        state.snapshot = None
+
+        if self._total_messages > self.max_total_messages or self._total_bytes > self.max_total_bytes:
+            self._enforce_budget()
+        if self.idle_ttl > 0:
+            self._evict_idle(state.last_active)
+        self.logger.debug("Added message to scope %s: %s", scope, role)
+
+        for callback in self._listeners:
+            callback(scope)
+
+    def _remember(self, state: _Scope, message: Message):
+        state.size += message.size
+        self._total_messages += 1
+        self._total_bytes += message.size
+
+    def _forget(self, state: _Scope, message: Message):
+        state.size -= message.size
+        self._total_messages -= 1
+        self._total_bytes -= message.size
+
+    def _enforce_budget(self):
+        # Never evict the scope that was just written to
+        while len(self._scopes) > 1 and (self._total_messages > self.max_total_messages or
+                                           self._total_bytes > self.max_total_bytes):
+            scope = next(iter(self._scopes))
+            self._drop(scope)
+            self.evicted_scopes += 1
+            self.logger.debug(f"Evicted history for idle scope {scope}")
+
+    def _evict_idle(self, now: float):
+        cutoff = now - self.idle_ttl
+        while self._scopes:
+            scope, state = next(iter(self._scopes.items()))
+            if state.last_active >= cutoff:
+                break
+            self._drop(scope)
+            self.evicted_scopes += 1
+
+    async def ensure_loaded(self, scope: Hashable):
+        """Read a scope's saved history from the store if this process hasn't yet."""
+        if self.store is None:
+            return
+        state = self._scopes.get(scope)
+        if state is not None and state.loaded:
+            return
+        appends_before = state.appends if state is not None else 0
 
-        self.history[channel_id].append(message)
+        summary, rows = await self.store.load(str(scope), self.max_history)
 
-        if len(self.history[channel_id]) > self.max_history:
-            self.history[channel_id] = self.history[channel_id][-self.max_history:]
+        current = self._scopes.get(scope)
+        if current is not None and current.loaded:
+            return  # another caller loaded it while we waited
+        messages = [Message.from_row(row) for row in rows]
+        if current is not None:
+            # Messages added while the read was in flight aren't in its result
+            if current is not state:
+                appends_before = 0
+            recent = current.appends - appends_before
+            if recent:
+                messages.extend(current.ordered()[-recent:])
+            self._drop(scope)
+        loaded = _Scope(messages[-self.max_history:])
+        if summary is not None:
+            loaded.summary = Message.from_row(summary)
+            loaded.size += loaded.summary.size
+        loaded.appends = len(loaded.messages)
+        self._scopes[scope] = loaded
+        self._total_messages += len(loaded)
+        self._total_bytes += loaded.size
+        self._enforce_budget()
 
-        self.logger.debug(f"Added message to channel {channel_id}: {role}")
+    def _drop(self, scope: Hashable) -> Optional[_Scope]:
+        state = self._scopes.pop(scope, None)
+        if state is not None:
+            self._total_messages -= len(state)
+            self._total_bytes -= state.size
+        return state
 
-    def get_history(self, channel_id: int) -> List[Dict]:
-        return self.history.get(channel_id, [])
+    def get_history(self, scope: Hashable) -> Sequence[Mapping]:
+        """Immutable snapshot of a scope's history, oldest first; later writes don't change it."""
+        state = self._scopes.get(scope)
+        if state is None:
+            return ()
+        if state.snapshot is None:
+            head = (state.summary,) if state.summary is not None else ()
+            state.snapshot = head + tuple(state.ordered())
+        return state.snapshot
 
-    def clear_history(self, channel_id: int):
-        if channel_id in self.history:
-            del self.history[channel_id]
-            self.logger.info(f"Cleared history for channel {channel_id}")
+    def message_count(self, scope: Hashable) -> int:
+        state = self._scopes.get(scope)
+        return len(state) if state is not None else 0
 
-    def get_channel_count(self) -> int:
-        return len(self.history)
+    def replace_prefix(self, scope: Hashable, messages: Sequence[Mapping], replacement: Mapping) -> bool:
+        """Swap the oldest ``messages`` of a scope, if still at its head, for ``replacement``.
+
+        Messages are matched by identity, so anything added or trimmed since
+        ``messages`` was read is handled.
+        """
+        state = self._scopes.get(scope)
+        if state is None:
+            return False
+        ids = {id(m) for m in messages}
+        replaced = state.summary is not None and id(state.summary) in ids
+        folded = 0
+        for message in state.ordered():
+            if id(message) not in ids:
+                break
+            folded += 1
+        if not replaced and not folded:
+            return False
+
+        for message in state.drop_oldest(folded):
+            self._forget(state, message)
+        if state.summary is not None:
+            self._forget(state, state.summary)
+        state.summary = Message.from_dict(replacement)
+        self._remember(state, state.summary)
+        state.snapshot = None
+        if self.store is not None:
+            self.store.replace_prefix(str(scope), len(state.messages), state.summary.content)
+        self._enforce_budget()
+        return True
+
+    def clear_history(self, scope: Hashable):
+        if self.store is not None:
+            self.store.clear(str(scope))
+        if self._drop(scope) is not None:
+            self.logger.info(f"Cleared history for scope {scope}")
+
+    def forget(self, scope: Hashable):
+        """Drop a scope from memory only; with a store it reloads on next use."""
+        self._drop(scope)
+
+    def restore(self, scope: Hashable, summary: Optional[str], messages: Iterable[Mapping]):
+        """Replace a scope's history wholesale, e.g. from an imported dump."""
+        if self.store is not None:
+            self.store.clear(str(scope))
+        self._drop(scope)
+        state = _Scope([Message.from_dict(m) for m in messages][-self.max_history:])
+        if summary is not None:
+            state.summary = Message("system", summary, summary=True)
+            state.size += state.summary.size
+        if self.store is not None:
+            if state.summary is not None:
+                self.store.replace_prefix(str(scope), 0, summary)
+            for message in state.messages:
+                self.store.append(str(scope), message.role, message.content, message.name)
+        self._scopes[scope] = state
+        self._total_messages += len(state)
+        self._total_bytes += state.size
+        self._enforce_budget()
+
+    def set_max_history(self, max_history: int):
+        """Change the per-scope limit; scopes over a lower limit drop their oldest messages."""
+        self.max_history = max_history
+        for state in self._scopes.values():
+            excess = len(state.messages) - max_history
+            if excess > 0:
+                for message in state.drop_oldest(excess):
+                    self._forget(state, message)
+                state.snapshot = None
+            elif state.head:
+                # A wrapped buffer can only grow in place once it is back in order
+                state.drop_oldest(0)
+
+    def scopes(self) -> List[Hashable]:
+        """The scopes held in memory, least recently active first."""
+        return list(self._scopes)
+
+    def get_scope_count(self) -> int:
+        return len(self._scopes)
 
     def get_total_messages(self) -> int:
-        return sum(len(messages) for messages in self.history.values())
\ No newline at end of file
+        return self._total_messages
+
+    def get_stats(self) -> Dict:
+        return {
+            'scopes': len(self._scopes),
+            'messages': self._total_messages,
+            'max_messages': self.max_total_messages,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_total_bytes,
+            'evicted_scopes': self.evicted_scopes,
+            'store': self.store.get_stats() if self.store is not None else None,
+        }
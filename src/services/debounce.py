@@ -0,0 +1,98 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class _Lane:
+    __slots__ = ('items', 'first_at', 'arrived', 'task')
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.first_at = 0.0
+        self.arrived = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class KeyedDebouncer:
+    """Runs ``handler(key, items)`` one call at a time per key, folding bursts together.
+
+    Items submitted for a key are held until ``window`` seconds pass with no
+    new arrivals, or ``max_wait`` seconds after the first of them, and then
+    handed over as one batch. With ``leading`` an item for an idle key is
+    handed over at once instead, and only items arriving while the handler
+    runs are held. Items arriving while the handler runs make up the next
+    batch, so calls for a key never overlap. A key's worker task exits once
+    it has nothing left to do.
+    """
+
+    def __init__(self, handler: Callable[[Hashable, List[Any]], Awaitable[None]],
+                 window: float = 1.5, max_wait: float = 5.0, leading: bool = False):
+        self.handler = handler
+        self.window = window
+        self.max_wait = max_wait
+        self.leading = leading
+        self.logger = logging.getLogger(__name__)
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+        self.submitted = 0
+        self.batches = 0
+
+    def submit(self, key: Hashable, item: Any):
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+        if not lane.items:
+            lane.first_at = time.monotonic()
+        lane.items.append(item)
+        lane.arrived.set()
+        self.submitted += 1
+        if lane.task is None:
+            lane.task = asyncio.get_running_loop().create_task(self._drain(key, lane))
+
+    async def _settle(self, lane: _Lane):
+        # Wait for a quiet window, but never past max_wait for the oldest item
+        while True:
+            lane.arrived.clear()
+            remaining = min(self.window, lane.first_at + self.max_wait - time.monotonic())
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(lane.arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _drain(self, key: Hashable, lane: _Lane):
+        settle = not self.leading
+        try:
+            while lane.items:
+                if settle:
+                    await self._settle(lane)
+                settle = True
+                batch, lane.items = lane.items, []
+                self.batches += 1
+                try:
+                    await self.handler(key, batch)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Debounced handler for {key} failed: {e}")
+        finally:
+            lane.task = None
+            if self._lanes.get(key) is lane:
+                del self._lanes[key]
+
+    async def close(self):
+        tasks = [lane.task for lane in self._lanes.values() if lane.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'window': self.window,
+            'submitted': self.submitted,
+            'batches': self.batches,
+            'folded': self.submitted - self.batches - sum(len(l.items) for l in self._lanes.values()),
+            'active': len(self._lanes),
+        }
@@ -0,0 +1,49 @@
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Optional fast JSON decoders; the stdlib is always available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Decoder = Callable[[bytes], Any]
+
+DECODERS: Dict[str, Decoder] = {"json": json.loads}
+DECODE_ERRORS: Tuple[type, ...] = (ValueError,)
+
+if msgspec is not None:
+    DECODERS["msgspec"] = msgspec.json.decode
+    DECODE_ERRORS += (msgspec.DecodeError,)
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+# Fastest first
+_PREFERENCE = ("orjson", "msgspec", "json")
+
+
+def get_decoder(name: Optional[str] = "auto") -> Tuple[str, Decoder]:
+    """Resolve a decoder by name; ``auto`` (or an unavailable name) picks the fastest installed."""
+    if name and name != "auto" and name in DECODERS:
+        return name, DECODERS[name]
+    for candidate in _PREFERENCE:
+        if candidate in DECODERS:
+            return candidate, DECODERS[candidate]
+    return "json", json.loads
+
+
+def decode_body(raw: bytes, decoder: Decoder = json.loads) -> Any:
+    """Decode a response body read once as bytes.
+
+    Bodies that aren't JSON (whatever the content type claims) come back
+    as ``{"response": text}``.
+    """
+    try:
+        return decoder(raw)
+    except DECODE_ERRORS:
+        return {"response": raw.decode('utf-8', errors='replace')}
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from services.scheduler import BACKGROUND
+
+CHAT = "chat"
+IMAGE = "image"
+VIDEO = "video"
+METADATA = "metadata"
+
+ENDPOINT_CLASSES = (CHAT, IMAGE, VIDEO, METADATA)
+
+# Endpoint (or prefix ending in '/') -> endpoint class
+_CLASS_BY_ENDPOINT = {
+    "/v1/prompt/completion": CHAT,
+    "/v1/image/generation": IMAGE,
+    "/videos/generations": VIDEO,
+    "/generations/": VIDEO,
+    "/v1/models": METADATA,
+    "/v1/user": METADATA,
+}
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Classify an API endpoint so limits can be applied per kind of work."""
+    endpoint = '/' + endpoint.lstrip('/')
+    found = _CLASS_BY_ENDPOINT.get(endpoint)
+    if found:
+        return found
+    for prefix, cls in _CLASS_BY_ENDPOINT.items():
+        if prefix.endswith('/') and endpoint.startswith(prefix):
+            return cls
+    return METADATA
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """Collapse per-resource paths (e.g. /generations/<id>) onto their route."""
+    endpoint = '/' + endpoint.lstrip('/')
+    if endpoint in _CLASS_BY_ENDPOINT:
+        return endpoint
+    for prefix in _CLASS_BY_ENDPOINT:
+        if prefix.endswith('/') and endpoint.startswith(prefix):
+            return prefix
+    return endpoint
+
+
+@dataclass(frozen=True)
+class EndpointProfile:
+    """How the request pipeline treats one endpoint."""
+    timeout: float = 30.0            # client timeout per attempt, in seconds
+    retries: int = 0                 # extra attempts after an API 500
+    cache: bool = False              # GET responses go through the response cache
+    coalesce: bool = False           # identical in-flight GETs share one upstream call
+    hedge: bool = False              # slow calls may get a duplicate request (see services.hedging)
+    priority: Optional[int] = None   # scheduler priority; None = default for the endpoint class
+    decoder: Optional[str] = None    # services.decoding name; None = service default
+
+
+# Endpoint (or prefix ending in '/') -> profile. Paid POSTs are never cached or coalesced.
+ENDPOINT_PROFILES = {
+    "/v1/prompt/completion": EndpointProfile(timeout=30, retries=2, hedge=True),
+    "/v1/image/generation": EndpointProfile(timeout=60),   # generate_image extends this per variation
+    "/videos/generations": EndpointProfile(timeout=90),
+    "/generations/": EndpointProfile(cache=True, coalesce=True, priority=BACKGROUND),
+    "/v1/models": EndpointProfile(cache=True, coalesce=True),
+    "/v1/user": EndpointProfile(cache=True, coalesce=True),
+}
+DEFAULT_PROFILE = EndpointProfile(cache=True, coalesce=True)
+
+
+def profile_for(endpoint: str) -> EndpointProfile:
+    return ENDPOINT_PROFILES.get(normalize_endpoint(endpoint), DEFAULT_PROFILE)
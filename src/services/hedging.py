@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Sliding window of recent successful request latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile ``q`` (0-1), or None until ``min_samples`` are recorded."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class HedgeBudget:
+    """Caps hedged requests to roughly ``ratio`` of primary requests.
+
+    Every primary request earns ``ratio`` tokens (up to ``burst``) and each
+    hedge spends one, so hedging cannot double load during a slowdown.
+    """
+
+    def __init__(self, ratio: float = 0.0, burst: float = 3.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ratio > 0
+
+    def on_request(self):
+        self.requests += 1
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        self.hedges += 1
+        return True
+
+
+class HedgePolicy:
+    """Decides when a slow chat completion gets a duplicate request.
+
+    A hedge is sent once a request has been outstanding for the observed p95
+    latency (but never sooner than ``min_delay``), subject to the budget.
+    """
+
+    def __init__(self, ratio: float = 0.0, quantile: float = 0.95, min_delay: float = 1.0,
+                 tracker: Optional[LatencyTracker] = None):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.latency = tracker if tracker is not None else LatencyTracker()
+        self.budget = HedgeBudget(ratio)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not yet calibrated."""
+        if not self.budget.enabled:
+            return None
+        threshold = self.latency.percentile(self.quantile)
+        if threshold is None:
+            return None
+        return max(self.min_delay, threshold)
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50 = self.latency.percentile(0.5)
+        p95 = self.latency.percentile(0.95)
+        return {
+            'samples': len(self.latency),
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000) if p95 is not None else None,
+            'ratio': self.budget.ratio,
+            'requests': self.budget.requests,
+            'hedges': self.budget.hedges,
+            'hedge_wins': self.budget.hedge_wins,
+        }
+
@@ -0,0 +1,222 @@
+import gzip
+import json
+import time
+from itertools import groupby, islice
+from operator import itemgetter
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.history_store import open_database
+
+# Optional compact binary format
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSONL = "jsonl"
+MSGPACK = "msgpack"
+
+FORMAT_NAME = "straico-history"
+FORMAT_VERSION = 1
+ROLES = {"user", "assistant", "system"}
+
+# A dump is a header followed by one record per scope:
+#   {"format": "straico-history", "version": 1}
+#   {"scope": "123", "summary": "..." | null, "messages": [{"role", "content", "name"?}, ...]}
+Record = Dict[str, Any]
+
+
+def detect_format(path) -> Tuple[str, bool]:
+    """(format, gzip-compressed) from a file name such as ``dump.jsonl.gz`` or ``dump.msgpack``."""
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    compressed = bool(suffixes) and suffixes[-1] == ".gz"
+    if compressed:
+        suffixes = suffixes[:-1]
+    fmt = MSGPACK if suffixes and suffixes[-1] in (".msgpack", ".mpk") else JSONL
+    if fmt == MSGPACK and msgpack is None:
+        raise ValueError("msgpack dumps need the msgpack package installed")
+    return fmt, compressed
+
+
+def _open(path, mode: str, compressed: bool) -> IO[bytes]:
+    return gzip.open(path, mode, compresslevel=6) if compressed else open(path, mode)
+
+
+def _message(role: str, content: str, name: Optional[str]) -> Dict[str, str]:
+    message = {"role": role, "content": content}
+    if name:
+        message["name"] = name
+    return message
+
+
+# --- sources -------------------------------------------------------------
+
+def records_from_database(path: str) -> Iterator[Record]:
+    """Stream every scope of a history database, one record at a time.
+
+    Rows come off a single cursor in index order, so memory holds one
+    scope's messages no matter how large the database is.
+    """
+    db = open_database(path)
+    try:
+        rows = db.execute(
+            "SELECT scope, role, content, name, summary FROM messages ORDER BY scope, summary, id"
+        )
+        for scope, scope_rows in groupby(rows, key=itemgetter(0)):
+            summary = None
+            messages = []
+            for _, role, content, name, is_summary in scope_rows:
+                if is_summary:
+                    summary = content
+                else:
+                    messages.append(_message(role, content, name))
+            yield {"scope": scope, "summary": summary, "messages": messages}
+    finally:
+        db.close()
+
+
+def records_from_history(history) -> Iterator[Record]:
+    """Stream the scopes currently held by an in-memory ConversationHistory."""
+    for scope in history.scopes():
+        snapshot = history.get_history(scope)
+        if not snapshot:
+            continue
+        summary = snapshot[0]['content'] if snapshot[0].get('summary') else None
+        messages = [_message(m['role'], m['content'], m.get('name'))
+                    for m in snapshot[1 if summary is not None else 0:]]
+        yield {"scope": str(scope), "summary": summary, "messages": messages}
+
+
+# --- writing and reading -------------------------------------------------
+
+def write_records(records: Iterable[Record], path, fmt: Optional[str] = None,
+                  compressed: Optional[bool] = None) -> Tuple[int, int]:
+    """Write a dump, format picked from the file name unless given; returns (scopes, messages)."""
+    detected, gz = detect_format(path)
+    fmt = fmt or detected
+    compressed = gz if compressed is None else compressed
+    scopes = messages = 0
+    with _open(path, "wb", compressed) as out:
+        if fmt == MSGPACK:
+            pack = msgpack.Packer(use_bin_type=True).pack
+        else:
+            def pack(obj):
+                return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        out.write(pack({"format": FORMAT_NAME, "version": FORMAT_VERSION}))
+        for record in records:
+            out.write(pack(record))
+            scopes += 1
+            messages += len(record["messages"]) + (record.get("summary") is not None)
+    return scopes, messages
+
+
+def validate_record(record: Any, position: int) -> Record:
+    """Check one scope record; raises ValueError naming the offending record."""
+    def bad(reason: str):
+        raise ValueError(f"Record {position}: {reason}")
+
+    if not isinstance(record, dict):
+        bad("not an object")
+    scope = record.get("scope")
+    if not isinstance(scope, str) or not scope:
+        bad("missing scope")
+    summary = record.get("summary")
+    if summary is not None and not isinstance(summary, str):
+        bad("summary must be text")
+    messages = record.get("messages")
+    if not isinstance(messages, list):
+        bad("messages must be a list")
+    for message in messages:
+        if not isinstance(message, dict) or message.get("role") not in ROLES:
+            bad("message without a valid role")
+        if not isinstance(message.get("content"), str):
+            bad("message content must be text")
+        name = message.get("name")
+        if name is not None and not isinstance(name, str):
+            bad("message name must be text")
+    return record
+
+
+def read_records(path) -> Iterator[Record]:
+    """Stream validated records from a dump written by write_records."""
+    fmt, compressed = detect_format(path)
+    with _open(path, "rb", compressed) as source:
+        if fmt == MSGPACK:
+            items = iter(msgpack.Unpacker(source, raw=False))
+        else:
+            items = (json.loads(line) for line in source if line.strip())
+        try:
+            header = next(items)
+        except StopIteration:
+            raise ValueError("Empty history dump")
+        except ValueError as e:
+            raise ValueError(f"Not a history dump: {e}")
+        if not isinstance(header, dict) or header.get("format") != FORMAT_NAME:
+            raise ValueError("Not a history dump")
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported history dump version {header.get('version')}")
+        position = 0
+        while True:
+            position += 1
+            try:
+                record = next(items)
+            except StopIteration:
+                return
+            except ValueError as e:
+                raise ValueError(f"Record {position}: {e}")
+            yield validate_record(record, position)
+
+
+def batched(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    """Group records into lists of at most ``size``, pulling each batch lazily."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+# --- importing -----------------------------------------------------------
+
+def import_into_database(records: Iterable[Record], path: str, batch_size: int = 5000, replace: bool = True,
+                         on_scope: Optional[Callable[[str], None]] = None) -> Tuple[int, int]:
+    """Bulk-insert records, committing every ``batch_size`` rows; returns (scopes, messages).
+
+    With ``replace`` an imported scope's existing rows are deleted first, so
+    importing the same dump twice is harmless. Each batch is one transaction,
+    so a failed import keeps the scopes from earlier batches.
+    """
+    db = open_database(path, timeout=30.0)
+    scopes = messages = 0
+    batch = []
+
+    def flush():
+        db.executemany(
+            "INSERT INTO messages (scope, role, content, name, summary, created) VALUES (?, ?, ?, ?, ?, ?)",
+            batch
+        )
+        db.commit()
+        batch.clear()
+
+    try:
+        for record in records:
+            scope = record["scope"]
+            created = time.time()
+            if replace:
+                db.execute("DELETE FROM messages WHERE scope = ?", (scope,))
+            if record.get("summary") is not None:
+                batch.append((scope, "system", record["summary"], None, 1, created))
+            for message in record["messages"]:
+                batch.append((scope, message["role"], message["content"], message.get("name"), 0, created))
+            scopes += 1
+            messages += len(record["messages"]) + (record.get("summary") is not None)
+            if on_scope is not None:
+                on_scope(scope)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        db.close()
+    return scopes, messages
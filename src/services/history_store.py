@@ -0,0 +1,252 @@
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Buffered operations, applied in order by the writer thread
+_APPEND = 0
+_REPLACE_PREFIX = 1
+_CLEAR = 2
+
+Row = Tuple[str, str, Optional[str], bool]   # role, content, name, summary
+
+
+def open_database(path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """Connect to a history database in WAL mode, creating the schema if needed."""
+    db = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS messages ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT NOT NULL, role TEXT NOT NULL,"
+        " content TEXT NOT NULL, name TEXT, summary INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL)"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS messages_scope ON messages (scope, summary, id)")
+    db.execute("CREATE INDEX IF NOT EXISTS messages_created ON messages (created)")
+    db.commit()
+    return db
+
+
+class HistoryStore:
+    """SQLite (WAL) persistence for conversation history with write-behind batching.
+
+    Writes are buffered in memory and flushed every ``flush_interval``
+    seconds (or once ``batch_size`` are pending) as one transaction on a
+    single worker thread, so the event loop never waits on disk. Reads run
+    on the same thread after any buffered writes, so a load always sees
+    everything written before it. Nothing is read at startup; histories are
+    fetched per scope on first use.
+
+    Retention runs in the background: messages older than ``retention``
+    seconds are deleted, as is anything beyond the newest ``keep_per_scope``
+    per scope.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 500,
+                 retention: float = 30 * 86400, keep_per_scope: int = 200,
+                 retention_interval: float = 3600):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention = retention
+        self.keep_per_scope = keep_per_scope
+        self.retention_interval = retention_interval
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-store")
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending: List[tuple] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.written = 0
+        self.flushes = 0
+        self.loads = 0
+        self.pruned = 0
+        self.errors = 0
+
+    # --- writer thread -----------------------------------------------------
+
+    def _open(self):
+        self._db = open_database(self.path)
+
+    def _apply(self, ops: List[tuple]):
+        db = self._db
+        with db:
+            for op in ops:
+                kind, scope = op[0], op[1]
+                if kind == _APPEND:
+                    _, _, role, content, name, created = op
+                    db.execute(
+                        "INSERT INTO messages (scope, role, content, name, summary, created) VALUES (?, ?, ?, ?, 0, ?)",
+                        (scope, role, content, name, created)
+                    )
+                elif kind == _REPLACE_PREFIX:
+                    _, _, keep, content, created = op
+                    db.execute("DELETE FROM messages WHERE scope = ? AND summary = 1", (scope,))
+                    db.execute(
+                        "DELETE FROM messages WHERE scope = ? AND summary = 0 AND id NOT IN "
+                        "(SELECT id FROM messages WHERE scope = ? AND summary = 0 ORDER BY id DESC LIMIT ?)",
+                        (scope, scope, keep)
+                    )
+                    db.execute(
+                        "INSERT INTO messages (scope, role, content, name, summary, created) "
+                        "VALUES (?, 'system', ?, NULL, 1, ?)",
+                        (scope, content, created)
+                    )
+                elif kind == _CLEAR:
+                    db.execute("DELETE FROM messages WHERE scope = ?", (scope,))
+
+    def _read(self, scope: str, limit: int) -> Tuple[Optional[Row], List[Row]]:
+        db = self._db
+        summary = db.execute(
+            "SELECT role, content, name, summary FROM messages WHERE scope = ? AND summary = 1 "
+            "ORDER BY id DESC LIMIT 1", (scope,)
+        ).fetchone()
+        rows = db.execute(
+            "SELECT role, content, name, summary FROM messages WHERE scope = ? AND summary = 0 "
+            "ORDER BY id DESC LIMIT ?", (scope, limit)
+        ).fetchall()
+        rows.reverse()
+        return summary, rows
+
+    def _apply_then_read(self, ops: List[tuple], scope: str,
+                         limit: int) -> Tuple[Optional[Exception], Tuple[Optional[Row], List[Row]]]:
+        # One job: nothing flushed after the snapshot can land between the write and the read
+        error = None
+        if ops:
+            try:
+                self._apply(ops)
+            except Exception as e:
+                error = e
+        return error, self._read(scope, limit)
+
+    def _prune(self) -> int:
+        db = self._db
+        with db:
+            removed = 0
+            if self.retention > 0:
+                removed += db.execute(
+                    "DELETE FROM messages WHERE created < ?", (time.time() - self.retention,)
+                ).rowcount
+            if self.keep_per_scope > 0:
+                removed += db.execute(
+                    "DELETE FROM messages WHERE id IN (SELECT id FROM ("
+                    " SELECT id, ROW_NUMBER() OVER (PARTITION BY scope ORDER BY id DESC) AS position"
+                    " FROM messages WHERE summary = 0) WHERE position > ?)",
+                    (self.keep_per_scope,)
+                ).rowcount
+        return removed
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- event loop side ---------------------------------------------------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def start(self):
+        await self._run(self._open)
+        self._wakeup = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._flush_periodically()))
+        if self.retention_interval > 0 and (self.retention > 0 or self.keep_per_scope > 0):
+            self._tasks.append(asyncio.create_task(self._prune_periodically()))
+        self.logger.info(f"Conversation history store at {self.path}")
+
+    def _submit(self, op: tuple):
+        self._pending.append(op)
+        if len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def append(self, scope: str, role: str, content: str, name: Optional[str] = None):
+        self._submit((_APPEND, scope, role, content, name, time.time()))
+
+    def replace_prefix(self, scope: str, keep: int, summary: str):
+        """Swap everything but the newest ``keep`` messages of a scope for one summary."""
+        self._submit((_REPLACE_PREFIX, scope, keep, summary, time.time()))
+
+    def clear(self, scope: str):
+        self._submit((_CLEAR, scope))
+
+    def _record_flush(self, ops: List[tuple], error: Optional[Exception]):
+        if error is None:
+            self.written += len(ops)
+            self.flushes += 1
+        else:
+            self.errors += 1
+            self.logger.error(f"Failed to write {len(ops)} history change(s): {error}")
+
+    async def flush(self):
+        if not self._pending or self._db is None:
+            return
+        ops, self._pending = self._pending, []
+        try:
+            await self._run(self._apply, ops)
+            self._record_flush(ops, None)
+        except Exception as e:
+            self._record_flush(ops, e)
+
+    async def load(self, scope: str, limit: int) -> Tuple[Optional[Row], List[Row]]:
+        """The scope's summary (if any) and newest ``limit`` messages, oldest first.
+
+        Buffered writes are applied and the scope read in a single job on the
+        writer thread, so the result holds exactly what was appended before
+        this call; anything appended later is still pending.
+        """
+        if self._db is None:
+            return None, []
+        ops, self._pending = self._pending, []
+        self.loads += 1
+        error, result = await self._run(self._apply_then_read, ops, scope, limit)
+        if ops:
+            self._record_flush(ops, error)
+        return result
+
+    async def prune(self) -> int:
+        removed = await self._run(self._prune)
+        self.pruned += removed
+        if removed:
+            self.logger.info(f"Retention removed {removed} stored history message(s)")
+        return removed
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _prune_periodically(self):
+        while True:
+            await asyncio.sleep(self.retention_interval)
+            try:
+                await self.prune()
+            except Exception as e:
+                self.logger.warning(f"History retention pass failed: {e}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._db is not None:
+            await self.flush()
+            await self._run(self._close)
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'pending': len(self._pending),
+            'written': self.written,
+            'flushes': self.flushes,
+            'loads': self.loads,
+            'pruned': self.pruned,
+            'errors': self.errors,
+        }
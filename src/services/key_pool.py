@@ -0,0 +1,140 @@
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.errors import OverloadedError
+
+# Responses that say "this key", not "this request", is the problem
+KEY_FAILURE_STATUSES = {401, 403, 429}
+
+ACTIVE = "active"
+COOLING = "cooling"        # taken out of rotation after repeated 401/429s
+EXHAUSTED = "exhausted"    # known to have no credits left
+
+
+class ApiKey:
+    __slots__ = ('value', 'label', 'in_flight', 'requests', 'credits', 'consecutive_failures',
+                 'strikes', 'disabled_until', 'last_status')
+
+    def __init__(self, value: str):
+        self.value = value
+        self.label = f"…{value[-4:]}" if len(value) > 8 else "…"
+        self.in_flight = 0
+        self.requests = 0
+        self.credits: Optional[float] = None   # None until /v1/user has been read for this key
+        self.consecutive_failures = 0
+        self.strikes = 0
+        self.disabled_until = 0.0
+        self.last_status: Optional[int] = None
+
+    def state(self, now: float) -> str:
+        if self.disabled_until > now:
+            return COOLING
+        if self.credits is not None and self.credits <= 0:
+            return EXHAUSTED
+        return ACTIVE
+
+
+class KeyPool:
+    """Straico API keys shared by one service, picked least-loaded first.
+
+    ``failure_threshold`` consecutive 401/403/429 responses take a key out
+    of rotation for ``cooldown`` seconds, doubling on each repeat (capped at
+    ``max_cooldown``); any success restores it. Keys known to be out of
+    credits are only used when nothing else is left.
+    """
+
+    def __init__(self, keys: Iterable[str], failure_threshold: int = 3,
+                 cooldown: float = 60.0, max_cooldown: float = 3600.0):
+        self.keys: List[ApiKey] = []
+        for value in keys:
+            if value and value not in (k.value for k in self.keys):
+                self.keys.append(ApiKey(value))
+        if not self.keys:
+            raise ValueError("KeyPool needs at least one API key")
+        self._by_value = {k.value: k for k in self.keys}
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def primary(self) -> ApiKey:
+        return self.keys[0]
+
+    def get(self, value: str) -> Optional[ApiKey]:
+        return self._by_value.get(value)
+
+    def _candidates(self, exclude: Iterable[ApiKey] = ()) -> List[ApiKey]:
+        now = time.monotonic()
+        excluded = set(id(k) for k in exclude)
+        usable = [k for k in self.keys if id(k) not in excluded and k.state(now) != COOLING]
+        active = [k for k in usable if k.state(now) == ACTIVE]
+        return active or usable
+
+    def has_alternative(self, exclude: Iterable[ApiKey]) -> bool:
+        return bool(self._candidates(exclude))
+
+    def acquire(self, pinned: Optional[str] = None, exclude: Iterable[ApiKey] = ()) -> ApiKey:
+        """Lease the least-loaded usable key (or the pinned one); pair with release()."""
+        if pinned is not None:
+            key = self._by_value.get(pinned) or ApiKey(pinned)
+        else:
+            candidates = self._candidates(exclude)
+            if not candidates:
+                wait = min(k.disabled_until for k in self.keys) - time.monotonic()
+                raise OverloadedError(
+                    f"All Straico API keys are rate limited or rejected. Please try again in {max(1, round(wait))}s."
+                )
+            # Least in flight first, then most credits left, then least used
+            key = min(candidates, key=lambda k: (
+                k.in_flight,
+                -(k.credits if k.credits is not None else float('inf')),
+                k.requests,
+            ))
+        key.in_flight += 1
+        key.requests += 1
+        return key
+
+    def release(self, key: ApiKey, status: Optional[int]):
+        """Return a leased key; ``status`` is the HTTP status, or None if no response arrived."""
+        key.in_flight = max(0, key.in_flight - 1)
+        if status is None:
+            return
+        key.last_status = status
+        if status in KEY_FAILURE_STATUSES:
+            key.consecutive_failures += 1
+            if key.consecutive_failures >= self.failure_threshold and key.disabled_until <= time.monotonic():
+                duration = min(self.max_cooldown, self.cooldown * (2 ** key.strikes))
+                key.strikes += 1
+                key.disabled_until = time.monotonic() + duration
+                self.logger.warning(
+                    f"API key {key.label} out of rotation for {duration:.0f}s after "
+                    f"{key.consecutive_failures} consecutive {status} responses"
+                )
+        elif status < 400:
+            key.consecutive_failures = 0
+            key.strikes = 0
+
+    def update_credits(self, key: ApiKey, credits: float):
+        key.credits = credits
+
+    def charge(self, key: ApiKey, coins: float):
+        if key.credits is not None:
+            key.credits -= coins
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [{
+            'key': k.label,
+            'state': k.state(now),
+            'in_flight': k.in_flight,
+            'requests': k.requests,
+            'credits': round(k.credits, 2) if k.credits is not None else None,
+            'failures': k.consecutive_failures,
+            'retry_after': round(max(0.0, k.disabled_until - now), 1),
+            'last_status': k.last_status,
+        } for k in self.keys]
@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.models import STRAICO_MODELS, STRAICO_IMAGE_MODELS
+
+CHAT = "chat"
+IMAGE = "image"
+VIDEO = "video"
+AUDIO = "audio"
+CATEGORIES = (CHAT, IMAGE, VIDEO, AUDIO)
+
+# Fallback for ids the API lists without a telling group (or for the built-in lists)
+_KEYWORDS = (
+    (IMAGE, ('dall-e', 'flux', 'ideogram', 'imagen', 'recraft', 'bagel', 'gpt-image')),
+    (VIDEO, ('kling', 'veo', 'vidu', 'gen3', 'gen4')),
+    (AUDIO, ('eleven', 'tts')),
+)
+
+
+def classify(model: str) -> str:
+    """Category of a model id by keyword; anything unrecognised is a chat model."""
+    lowered = model.lower()
+    for category, keywords in _KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return category
+    return CHAT
+
+
+def normalize(text: str) -> str:
+    """Lowercase letters and digits only, so "gpt4o", "GPT-4o" and "gpt 4o" compare equal."""
+    return "".join(c for c in text.lower() if c.isalnum())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def model_trigrams(model: str) -> Set[str]:
+    """Trigrams of the full id and of the part after the vendor, which is what people type."""
+    return trigrams(model) | trigrams(model.rpartition('/')[2])
+
+
+def _model_id(entry: Any) -> Optional[str]:
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict):
+        return entry.get('model') or entry.get('id')
+    return None
+
+
+class ModelIndex:
+    """Immutable set of model ids with category buckets and a trigram index.
+
+    Everything is computed once when the index is built, so membership,
+    category lookups and listings are dict/tuple reads, and suggestions
+    only score the models that share a trigram with the query.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        self._categories: Dict[str, str] = {}
+        for model, category in entries:
+            self._categories.setdefault(model, category)
+        self._models: Tuple[str, ...] = tuple(self._categories)
+        self._buckets: Dict[str, Tuple[str, ...]] = {
+            category: tuple(m for m in self._models if self._categories[m] == category) for category in CATEGORIES
+        }
+        self._lower: Dict[str, str] = {}
+        self._normalized: Tuple[str, ...] = tuple(normalize(m) for m in self._models)
+        self._grams: Dict[str, List[int]] = {}
+        for position, model in enumerate(self._models):
+            self._lower.setdefault(model.lower(), model)
+            for gram in model_trigrams(model):
+                self._grams.setdefault(gram, []).append(position)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> 'ModelIndex':
+        """Index a /v1/models response: ``{"data": {"chat": [...], "image": [...]}}`` or a plain list."""
+        data = payload.get('data', payload) if isinstance(payload, dict) else payload
+        entries = []
+        if isinstance(data, dict):
+            for group, items in data.items():
+                for item in items if isinstance(items, list) else ():
+                    model = _model_id(item)
+                    if model:
+                        entries.append((model, group if group in CATEGORIES and group != CHAT else classify(model)))
+        elif isinstance(data, list):
+            entries = [(model, classify(model)) for model in map(_model_id, data) if model]
+        return cls(entries)
+
+    @classmethod
+    def from_models(cls, models: Iterable[str]) -> 'ModelIndex':
+        return cls((model, classify(model)) for model in models)
+
+    @classmethod
+    def builtin(cls) -> 'ModelIndex':
+        """The lists shipped in config.models, used until the API has answered."""
+        return cls([(model, IMAGE) for model in STRAICO_IMAGE_MODELS] +
+                   [(model, classify(model)) for model in STRAICO_MODELS])
+
+    def __contains__(self, model: str) -> bool:
+        return model in self._categories
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def models(self, category: Optional[str] = None) -> Tuple[str, ...]:
+        return self._models if category is None else self._buckets.get(category, ())
+
+    def category(self, model: str) -> Optional[str]:
+        return self._categories.get(model)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """The catalog id for ``name``, matched exactly or else ignoring case."""
+        if name in self._categories:
+            return name
+        return self._lower.get(name.lower())
+
+    def suggest(self, query: str, limit: int = 5, category: Optional[str] = None,
+                min_score: float = 0.3) -> List[str]:
+        """Closest model ids to ``query``, best first.
+
+        Ids containing the query rank ahead of the rest; after that models
+        are ordered by the share of the query's trigrams they contain, then
+        by length so the closest fit wins ties.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        grams = trigrams(query)
+        hits: Dict[int, int] = {}
+        if len(query) < 3:
+            # Too short to share an inner trigram; few enough ids to just scan
+            hits = {position: 0 for position, text in enumerate(self._normalized) if query in text}
+        for gram in grams:
+            for position in self._grams.get(gram, ()):
+                hits[position] = hits.get(position, 0) + 1
+        scored = []
+        for position, shared in hits.items():
+            model = self._models[position]
+            if category is not None and self._categories[model] != category:
+                continue
+            score = shared / len(grams)
+            if query in self._normalized[position]:
+                score += 1
+            if score >= min_score:
+                scored.append((-score, len(model), model))
+        scored.sort()
+        return [model for _, _, model in scored[:limit]]
+
+
+class ModelCatalog:
+    """The live model list from /v1/models, shared by every plugin.
+
+    ``start()`` serves the copy cached at ``path`` when there is one, or
+    else the built-in lists in config.models, and fetches the API copy in
+    the background, so startup never waits on /v1/models. A positive
+    ``startup_timeout`` opts in to waiting that long for the first fetch
+    when there is no cached copy. The list is then refreshed every
+    ``refresh_interval`` seconds. Each refresh builds a new ModelIndex and swaps it in whole, so
+    readers never see a half-built index.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Any]], path: Optional[str] = None,
+                 refresh_interval: float = 3600, startup_timeout: float = 0.0):
+        self.fetch = fetch
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.startup_timeout = startup_timeout
+        self.logger = logging.getLogger(__name__)
+        self.index = ModelIndex.builtin()
+        self.source = "builtin"
+        self.updated: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.refreshes = 0
+        self.failures = 0
+
+    # --- loading -----------------------------------------------------------
+
+    def _read_cache(self) -> Optional[Tuple[float, Any]]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cached = json.load(f)
+            return cached['fetched'], cached['payload']
+        except FileNotFoundError:
+            return None
+
+    def _write_cache(self, payload: Any):
+        # Written aside and renamed so a crash never leaves a torn cache file
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'fetched': time.time(), 'payload': payload}, f)
+        os.replace(temp, self.path)
+
+    async def start(self):
+        cached = None
+        if self.path:
+            try:
+                cached = await asyncio.to_thread(self._read_cache)
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable model cache {self.path}: {e}")
+        if cached is not None:
+            fetched, payload = cached
+            index = ModelIndex.from_payload(payload)
+            if len(index):
+                self.index, self.source, self.updated = index, "disk", fetched
+                self.logger.info(f"Loaded {len(index)} models from {self.path}")
+        if self.source == "builtin" and self.startup_timeout > 0:
+            try:
+                await asyncio.wait_for(self.refresh(), self.startup_timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning("Model list did not load in time; using the built-in list for now")
+        fetched = self.source == "api"
+        if self.refresh_interval > 0 or not fetched:
+            self._task = asyncio.create_task(self._refresh_periodically(immediately=not fetched))
+
+    async def refresh(self) -> bool:
+        """Fetch the model list and swap it in; returns False (keeping the current list) on failure."""
+        try:
+            payload = await self.fetch()
+            index = ModelIndex.from_payload(payload)
+            if not len(index):
+                raise ValueError("response listed no models")
+        except Exception as e:
+            self.failures += 1
+            self.logger.warning(f"Model list refresh failed: {e}")
+            return False
+        self.index, self.source, self.updated = index, "api", time.time()
+        self.refreshes += 1
+        if self.path:
+            try:
+                await asyncio.to_thread(self._write_cache, payload)
+            except Exception as e:
+                self.logger.warning(f"Could not cache the model list at {self.path}: {e}")
+        return True
+
+    async def _refresh_periodically(self, immediately: bool):
+        if not immediately:
+            await asyncio.sleep(self.refresh_interval)
+        while True:
+            await self.refresh()
+            if self.refresh_interval <= 0:
+                return  # just the first fetch
+            await asyncio.sleep(self.refresh_interval)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # --- lookups (the current index) --------------------------------------
+
+    def __contains__(self, model: str) -> bool:
+        return model in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def models(self, category: Optional[str] = None) -> Tuple[str, ...]:
+        return self.index.models(category)
+
+    def category(self, model: str) -> Optional[str]:
+        return self.index.category(model)
+
+    def resolve(self, name: str) -> Optional[str]:
+        return self.index.resolve(name)
+
+    def suggest(self, query: str, limit: int = 5, category: Optional[str] = None) -> List[str]:
+        return self.index.suggest(query, limit, category)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'models': len(self.index),
+            'categories': {category: len(self.index.models(category)) for category in CATEGORIES},
+            'source': self.source,
+            'age': time.time() - self.updated if self.updated else None,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
@@ -0,0 +1,232 @@
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Preference kinds; the subject is a user id for USER_MODEL and a channel id otherwise
+USER_MODEL = "user_model"
+AUTO_RESPONSE = "auto_response"
+COMPLETION_CACHE = "completion_cache"
+
+Key = Tuple[str, int]
+
+_MISSING = object()
+
+
+class PreferenceStore:
+    """Per-user and per-channel settings behind an in-memory cache.
+
+    Every value lives in one dict keyed by ``(kind, subject)``, so lookups
+    on the hot path are a single dict probe. With a ``path`` the values are
+    also kept in SQLite: changes are coalesced in memory and written in one
+    transaction every ``flush_interval`` seconds on a worker thread, and
+    ``start()`` warm-loads the table in pages in the background so the bot
+    is usable before every row is read. A key asked for before the warm
+    load reaches it is read through from the database on demand.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 1.0, batch_size: int = 500,
+                 page_size: int = 5000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.logger = logging.getLogger(__name__)
+        # None marks a key known to be unset, so neither the warm load nor a
+        # read-through brings back a row deleted since startup
+        self._values: Dict[Key, Optional[str]] = {}
+        self._pending: Dict[Key, Optional[str]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._warm = path is None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.loaded = 0
+        self.read_throughs = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+
+    # --- worker thread -----------------------------------------------------
+
+    def _open(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS preferences ("
+            " kind TEXT NOT NULL, subject INTEGER NOT NULL, value TEXT NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (kind, subject))"
+        )
+        db.commit()
+        self._db = db
+
+    def _read_page(self, after: int) -> List[tuple]:
+        return self._db.execute(
+            "SELECT rowid, kind, subject, value FROM preferences WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after, self.page_size)
+        ).fetchall()
+
+    def _read_one(self, kind: str, subject: int) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT value FROM preferences WHERE kind = ? AND subject = ?", (kind, subject)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _apply(self, changes: Dict[Key, Optional[str]]):
+        now = time.time()
+        with self._db as db:
+            db.executemany(
+                "INSERT INTO preferences (kind, subject, value, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (kind, subject) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                [(kind, subject, value, now) for (kind, subject), value in changes.items() if value is not None]
+            )
+            db.executemany(
+                "DELETE FROM preferences WHERE kind = ? AND subject = ?",
+                [key for key, value in changes.items() if value is None]
+            )
+
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --- event loop side ---------------------------------------------------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def start(self):
+        """Open the database and begin warm-loading it; returns without waiting for the rows."""
+        if self.path is None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preferences")
+        await self._run(self._open)
+        self._wakeup = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._warm_load()))
+        self._tasks.append(asyncio.create_task(self._flush_periodically()))
+
+    async def _warm_load(self):
+        started = time.perf_counter()
+        after = 0
+        try:
+            while True:
+                rows = await self._run(self._read_page, after)
+                for rowid, kind, subject, value in rows:
+                    # Anything set, cleared or read through meanwhile is newer
+                    self._values.setdefault((kind, subject), value)
+                self.loaded += len(rows)
+                if len(rows) < self.page_size:
+                    break
+                after = rows[-1][0]
+        except Exception as e:
+            self.errors += 1
+            self.logger.error(f"Failed to load preferences from {self.path}: {e}")
+            return
+        self._warm = True
+        self.logger.info(f"Loaded {self.loaded} preferences from {self.path} "
+                         f"in {time.perf_counter() - started:.2f}s")
+
+    async def get(self, kind: str, subject: int, default: Any = None) -> Any:
+        key = (kind, subject)
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            if self._warm or self._db is None:
+                return default
+            self.read_throughs += 1
+            try:
+                stored = await self._run(self._read_one, kind, subject)
+            except Exception as e:
+                self.errors += 1
+                self.logger.warning(f"Preference lookup failed for {kind} {subject}: {e}")
+                return default
+            # A set() during the read wins over the stored value
+            value = self._values.setdefault(key, stored)
+        return default if value is None else value
+
+    def set(self, kind: str, subject: int, value: Optional[str]):
+        """Change a preference now; ``None`` removes it. The write reaches disk on the next flush."""
+        key = (kind, subject)
+        self._values[key] = value
+        if self._db is not None:
+            self._pending[key] = value
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    async def user_model(self, user_id: int, default: str) -> str:
+        return await self.get(USER_MODEL, user_id, default)
+
+    def set_user_model(self, user_id: int, model: str):
+        self.set(USER_MODEL, user_id, model)
+
+    async def auto_response(self, channel_id: int) -> bool:
+        return await self.get(AUTO_RESPONSE, channel_id) is not None
+
+    def set_auto_response(self, channel_id: int, enabled: bool):
+        self.set(AUTO_RESPONSE, channel_id, "1" if enabled else None)
+
+    async def completion_cache(self, channel_id: int, default: bool) -> bool:
+        """Whether the channel uses the completion cache; ``default`` until it is toggled."""
+        value = await self.get(COMPLETION_CACHE, channel_id)
+        return default if value is None else value == "1"
+
+    def set_completion_cache(self, channel_id: int, enabled: bool):
+        # Stored either way, so turning off a channel listed in COMPLETION_CACHE_CHANNELS sticks
+        self.set(COMPLETION_CACHE, channel_id, "1" if enabled else "0")
+
+    def subjects(self, kind: str, value: Optional[str] = None) -> List[int]:
+        """Subjects with a ``kind`` preference (equal to ``value`` if given); complete once warm-loaded."""
+        return [subject for (k, subject), v in self._values.items()
+                if k == kind and v is not None and (value is None or v == value)]
+
+    async def flush(self):
+        if not self._pending or self._db is None:
+            return
+        changes, self._pending = self._pending, {}
+        try:
+            await self._run(self._apply, changes)
+            self.written += len(changes)
+            self.flushes += 1
+        except Exception as e:
+            self.errors += 1
+            self.logger.error(f"Failed to write {len(changes)} preference change(s): {e}")
+            # Keep them for the next flush unless they have been superseded
+            for key, value in changes.items():
+                self._pending.setdefault(key, value)
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self._db is not None:
+            await self.flush()
+            await self._run(self._close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'entries': sum(1 for value in self._values.values() if value is not None),
+            'warm': self._warm,
+            'loaded': self.loaded,
+            'read_throughs': self.read_throughs,
+            'pending': len(self._pending),
+            'written': self.written,
+            'flushes': self.flushes,
+            'errors': self.errors,
+        }
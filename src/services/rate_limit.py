@@ -0,0 +1,121 @@
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+USER = "user"
+CHANNEL = "channel"
+GUILD = "guild"
+GLOBAL = "global"
+
+
+class _Bucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class BucketTier:
+    """Token buckets for one scope (e.g. per user), refilled lazily on access.
+
+    A bucket that has been idle for ``capacity / rate`` seconds is full again
+    and therefore indistinguishable from a missing one, so buckets are kept in
+    last-touched order and idle ones are dropped from the front as checks
+    happen. Memory tracks recently active keys, not every key ever seen.
+    """
+
+    def __init__(self, name: str, capacity: float, period: float, sweep_batch: int = 4):
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.idle_expiry = period
+        self.sweep_batch = sweep_batch
+        self._buckets: "OrderedDict[Hashable, _Bucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def wait_time(self, key: Hashable, cost: float, now: float) -> float:
+        """Seconds until ``cost`` tokens are available (0 if available now)."""
+        bucket = self._buckets.get(key)
+        tokens = self.capacity if bucket is None else min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+        cost = min(cost, self.capacity)
+        return 0.0 if tokens >= cost else (cost - tokens) / self.rate
+
+    def consume(self, key: Hashable, cost: float, now: float):
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens = self.capacity
+        else:
+            tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+        self._buckets[key] = _Bucket(tokens - min(cost, self.capacity), now)
+
+    def sweep(self, now: float):
+        for _ in range(self.sweep_batch):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket.updated < self.idle_expiry:
+                return
+            del self._buckets[key]
+
+
+class RateLimiter:
+    """Hierarchical token-bucket limiter: per-user, per-channel, per-guild and global.
+
+    A request must fit in every applicable tier; tokens are only taken when
+    all tiers admit it, so a rejection never charges the caller. Each check
+    is O(1) per tier.
+    """
+
+    def __init__(self, limits: Dict[str, Optional[Tuple[float, float]]]):
+        self.logger = logging.getLogger(__name__)
+        self.tiers: Dict[str, BucketTier] = {
+            name: BucketTier(name, capacity, period)
+            for name, spec in limits.items() if spec
+            for capacity, period in [spec]
+            if capacity > 0 and period > 0
+        }
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {name: 0 for name in self.tiers}
+
+    def check(self, user_id: Any = None, channel_id: Any = None, guild_id: Any = None,
+              cost: float = 1.0) -> Tuple[float, Optional[str]]:
+        """Consume ``cost`` tokens if possible.
+
+        Returns ``(0.0, None)`` when allowed, otherwise ``(retry_after, tier)``
+        for the tier that needs the longest wait.
+        """
+        now = time.monotonic()
+        keys = {USER: user_id, CHANNEL: channel_id, GUILD: guild_id, GLOBAL: GLOBAL}
+
+        applicable = []
+        worst_wait, worst_tier = 0.0, None
+        for name, tier in self.tiers.items():
+            key = keys.get(name)
+            if key is None:
+                continue
+            tier.sweep(now)
+            applicable.append((tier, key))
+            wait = tier.wait_time(key, cost, now)
+            if wait > worst_wait:
+                worst_wait, worst_tier = wait, name
+
+        if worst_tier is not None:
+            self.rejected[worst_tier] += 1
+            self.logger.debug(f"Rate limited on {worst_tier} tier, retry after {worst_wait:.1f}s")
+            return worst_wait, worst_tier
+
+        for tier, key in applicable:
+            tier.consume(key, cost, now)
+        self.allowed += 1
+        return 0.0, None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'allowed': self.allowed,
+            'rejected': dict(self.rejected),
+            'tracked_buckets': {name: len(tier) for name, tier in self.tiers.items()},
+        }
@@ -0,0 +1,17 @@
+import time
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+
+@dataclass
+class RequestContext:
+    """Per-call admission metadata threaded from command handlers into the request path."""
+    priority: Optional[int] = None   # services.scheduler priority class; None = endpoint default
+    guild_id: Hashable = None        # fair-queuing flow; None for DMs and background work
+    cost: float = 1.0                # scheduler cost, e.g. number of image variations
+    deadline: Optional[float] = None  # time.monotonic() by which the whole call must finish
+    api_key: Optional[str] = None    # pin one key instead of picking from the pool
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None when there is none."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
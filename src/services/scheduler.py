@@ -0,0 +1,222 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Hashable, List, Optional
+
+from core.errors import OverloadedError
+
+# Priority classes, most urgent first
+INTERACTIVE = 0     # !chat and other user-facing commands
+AUTO_RESPONSE = 1   # auto-response channels
+IMAGE = 2           # image generation
+BACKGROUND = 3      # video generation and status polls
+
+PRIORITY_NAMES = {
+    INTERACTIVE: "interactive",
+    AUTO_RESPONSE: "auto_response",
+    IMAGE: "image",
+    BACKGROUND: "background",
+}
+
+# Default priority by endpoint class (see services.endpoints)
+_DEFAULT_PRIORITIES = {
+    "chat": INTERACTIVE,
+    "metadata": INTERACTIVE,
+    "image": IMAGE,
+    "video": BACKGROUND,
+}
+
+
+def default_priority(endpoint_cls: str) -> int:
+    return _DEFAULT_PRIORITIES.get(endpoint_cls, BACKGROUND)
+
+
+class _Waiting:
+    __slots__ = ('waiter', 'cost', 'weight', 'enqueued_at')
+
+    def __init__(self, waiter: asyncio.Future, cost: float, weight: float, enqueued_at: float):
+        self.waiter = waiter
+        self.cost = cost
+        self.weight = weight
+        self.enqueued_at = enqueued_at
+
+
+class _ClassQueue:
+    """Self-clocked weighted fair queue for one priority class.
+
+    Requests wait in a FIFO per flow (guild). The oldest request of each
+    flow carries a virtual finish tag ``max(V, last_finish[flow]) +
+    cost / weight``; the smallest tag is served first and ``V`` advances to
+    the tag being served. A guild submitting a burst therefore interleaves
+    with other guilds instead of going ahead of them. ``last_finish`` only
+    moves when a request is dispatched, so requests that time out or are
+    cancelled in the queue don't push back their guild's later ones.
+    """
+
+    def __init__(self):
+        self.virtual_time = 0.0
+        self.last_finish: Dict[Hashable, float] = {}
+        self.flows: Dict[Hashable, Deque[_Waiting]] = {}
+        self.heap: List = []            # (finish tag, seq, flow, request) for the oldest request of each flow
+        self.waiting = 0
+        self.wait_times: Deque[float] = deque(maxlen=512)
+        self.served = 0
+        self._seq = itertools.count()
+
+    def finish_tag(self, flow: Hashable, cost: float, weight: float) -> float:
+        start = max(self.virtual_time, self.last_finish.get(flow, 0.0))
+        return start + cost / max(weight, 1e-6)
+
+    def commit(self, flow: Hashable, finish: float):
+        """Charge a dispatched request to its flow."""
+        self.last_finish[flow] = finish
+        self.virtual_time = max(self.virtual_time, finish)
+        if len(self.last_finish) > 1024:
+            self._prune()
+
+    def push(self, flow: Hashable, request: _Waiting):
+        pending = self.flows.setdefault(flow, deque())
+        pending.append(request)
+        self.waiting += 1
+        if len(pending) == 1:
+            self._tag_head(flow)
+
+    def discard(self, flow: Hashable, request: _Waiting):
+        """Forget a request that gave up waiting; the next in its flow is tagged afresh."""
+        pending = self.flows.get(flow)
+        if not pending or request not in pending:
+            return
+        was_head = pending[0] is request
+        pending.remove(request)
+        self.waiting -= 1
+        if was_head:
+            self._tag_head(flow)
+
+    def pop(self) -> Optional[_Waiting]:
+        """The waiting request with the smallest finish tag, or None."""
+        while self.heap:
+            finish, _, flow, request = heapq.heappop(self.heap)
+            pending = self.flows.get(flow)
+            if not pending or pending[0] is not request:
+                continue  # tagged as head before it gave up
+            pending.popleft()
+            self.waiting -= 1
+            self.commit(flow, finish)
+            self._tag_head(flow)
+            return request
+        return None
+
+    def _tag_head(self, flow: Hashable):
+        pending = self.flows[flow]
+        if not pending:
+            del self.flows[flow]
+            return
+        head = pending[0]
+        heapq.heappush(self.heap, (self.finish_tag(flow, head.cost, head.weight), next(self._seq), flow, head))
+
+    def _prune(self):
+        # Flows whose last tag is behind virtual time would restart at V anyway
+        self.last_finish = {f: t for f, t in self.last_finish.items() if t > self.virtual_time}
+
+
+class PriorityScheduler:
+    """Admits API work by priority class, then fairly across guilds.
+
+    At most ``capacity`` requests run at once. When a slot frees, the
+    highest-priority non-empty class is served; within it, guilds share
+    capacity by weighted fair queuing.
+    """
+
+    def __init__(self, capacity: int = 10, guild_weights: Optional[Dict[Hashable, float]] = None):
+        self.capacity = capacity
+        self.guild_weights = guild_weights or {}
+        self.in_flight = 0
+        self._classes: Dict[int, _ClassQueue] = {p: _ClassQueue() for p in PRIORITY_NAMES}
+        self.logger = logging.getLogger(__name__)
+        self.rejected = 0
+
+    def _queued(self) -> int:
+        return sum(q.waiting for q in self._classes.values())
+
+    async def acquire(self, priority: int, guild_id: Hashable = None, cost: float = 1.0,
+                      timeout: Optional[float] = None):
+        queue = self._classes.get(priority, self._classes[BACKGROUND])
+        weight = self.guild_weights.get(guild_id, 1.0)
+
+        if self.in_flight < self.capacity and self._queued() == 0:
+            self.in_flight += 1
+            queue.commit(guild_id, queue.finish_tag(guild_id, cost, weight))
+            queue.wait_times.append(0.0)
+            queue.served += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        request = _Waiting(waiter, cost, weight, time.monotonic())
+        queue.push(guild_id, request)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return
+            waiter.cancel()
+            queue.discard(guild_id, request)
+            self.rejected += 1
+            raise OverloadedError(
+                f"The AI service is busy ({PRIORITY_NAMES.get(priority, priority)} queue wait exceeded {timeout:.0f}s)"
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                queue.discard(guild_id, request)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        for priority in sorted(self._classes):
+            queue = self._classes[priority]
+            while self.in_flight < self.capacity:
+                request = queue.pop()
+                if request is None:
+                    break
+                queue.wait_times.append(time.monotonic() - request.enqueued_at)
+                queue.served += 1
+                self.in_flight += 1
+                request.waiter.set_result(None)
+            if self.in_flight >= self.capacity:
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: int, guild_id: Hashable = None, cost: float = 1.0,
+                   timeout: Optional[float] = None):
+        await self.acquire(priority, guild_id, cost, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        classes = {}
+        for priority, queue in self._classes.items():
+            waits = sorted(queue.wait_times)
+            classes[PRIORITY_NAMES[priority]] = {
+                'queued': queue.waiting,
+                'served': queue.served,
+                'avg_wait_ms': round(1000 * sum(waits) / len(waits)) if waits else 0,
+                'p95_wait_ms': round(1000 * waits[min(len(waits) - 1, int(len(waits) * 0.95))]) if waits else 0,
+            }
+        return {
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'queued': self._queued(),
+            'rejected': self.rejected,
+            'classes': classes,
+        }
@@ -0,0 +1,21 @@
+from typing import Optional
+
+# How conversation history is partitioned (HISTORY_SCOPE)
+CHANNEL = "channel"   # threads share their parent channel's history
+THREAD = "thread"     # every channel and thread has its own history
+USER = "user"         # every user has their own history in each channel or thread
+
+SCOPES = (CHANNEL, THREAD, USER)
+
+
+def scope_key(mode: str, channel_id: int, user_id: int, parent_id: Optional[int] = None) -> str:
+    """History key for a message in ``channel_id`` (a thread of ``parent_id``, if given) by ``user_id``.
+
+    Channel and thread keys are the bare id, so histories saved before
+    scoping existed still line up.
+    """
+    if mode == CHANNEL and parent_id is not None:
+        channel_id = parent_id
+    if mode == USER:
+        return f"{channel_id}:{user_id}"
+    return str(channel_id)
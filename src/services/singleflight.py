@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent identical calls so they share one upstream future.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task. A cancelled caller only stops
+    waiting - the shared task keeps running for the others and is cancelled
+    only once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.logger = logging.getLogger(__name__)
+
+        self.executed = 0    # calls that went upstream
+        self.coalesced = 0   # calls that joined an in-flight request
+        self.abandoned = 0   # upstream calls cancelled because every waiter left
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task, k=key, f=flight: self._finish(k, f, task))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+            self.logger.debug(f"Coalesced in-flight request {key}")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.abandoned += 1
+                self._forget(key, flight)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'abandoned': self.abandoned,
+            'in_flight': len(self._flights),
+        }
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Future):
+        self._forget(key, flight)
+        # Mark the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -3,204 +3,769 @@ import asyncio
 import json
 import time
 import hashlib
-from typing import Dict, List, Optional, Any
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple
 import logging
-from core.errors import APIError
+from core.errors import APIError, DeadlineExceededError
+from services.singleflight import SingleFlight
+from services.cache import ResponseCache, STALE
+from services.concurrency import ConcurrencyController
+from services.circuit_breaker import CircuitBreakerRegistry
+from services.endpoints import CHAT, endpoint_class, normalize_endpoint, profile_for
+from services.request import RequestContext
+from services.hedging import HedgePolicy, LatencyTracker
+from services.decoding import DECODE_ERRORS, Decoder, decode_body, get_decoder
+from services.key_pool import KeyPool, ApiKey, KEY_FAILURE_STATUSES
+from services.connection_health import ConnectionHealth
+from services.context_builder import ContextBuilder
+from services.scheduler import PriorityScheduler, default_priority
+
+def extract_completion_text(response: Any) -> Optional[str]:
+    """Return the first non-empty completion text from a /v1/prompt/completion response."""
+    if isinstance(response, dict) and 'data' in response:
+        data = response['data']
+        if isinstance(data, dict) and 'completions' in data:
+            for model_data in data['completions'].values():
+                if 'completion' in model_data:
+                    completion = model_data['completion']
+                    if 'choices' in completion and completion['choices']:
+                        choice = completion['choices'][0]
+                        if 'message' in choice and 'content' in choice['message']:
+                            content = (choice['message']['content'] or '').strip()
+                            if content:
+                                return content
+    return None
+
+
+def _extract_stream_delta(event: Dict) -> Optional[str]:
+    """Pull the text delta out of one streamed event (OpenAI-style or Straico-style)."""
+    if not isinstance(event, dict):
+        return None
+    choices = event.get('choices')
+    if choices:
+        choice = choices[0]
+        delta = choice.get('delta') or choice.get('message') or {}
+        return delta.get('content') or choice.get('text')
+    if isinstance(event.get('content'), str):
+        return event['content']
+    if 'data' in event:
+        return extract_completion_text(event)
+    return None
+
+
+def _request_model(data: Optional[Dict]) -> Optional[str]:
+    """Model a request targets, used to key circuit breakers"""
+    if not data:
+        return None
+    if data.get('model'):
+        return data['model']
+    models = data.get('models')
+    if models and len(models) == 1:
+        return models[0]
+    return None
+
+
+def _extract_coins(response: Any) -> Optional[float]:
+    """Remaining credits from a /v1/user response"""
+    data = response.get('data') if isinstance(response, dict) else None
+    coins = data.get('coins') if isinstance(data, dict) else None
+    return float(coins) if isinstance(coins, (int, float)) else None
+
+
+def _extract_price(response: Any) -> Optional[float]:
+    """Coins charged for a completion or generation, when the response reports it"""
+    data = response.get('data') if isinstance(response, dict) else None
+    if not isinstance(data, dict):
+        return None
+    price = data.get('overall_price') or data.get('price')
+    total = price.get('total') if isinstance(price, dict) else None
+    return float(total) if isinstance(total, (int, float)) else None
+
 
 class StraicoService:
-    def __init__(self, api_key: str, base_url: str = "https://api.straico.com"):
+    def __init__(self, api_key: str, base_url: str = "https://api.straico.com",
+                 connection_pool_size: int = 10, limit_per_host: int = 5,
+                 trace_configs: Optional[List[aiohttp.TraceConfig]] = None,
+                 cache_max_entries: int = 256, cache_max_bytes: int = 4 * 1024 * 1024,
+                 queue_timeout: float = 15.0, breaker_failure_threshold: int = 5,
+                 breaker_recovery_timeout: float = 30.0, chat_deadline: float = 30.0,
+                 hedge_ratio: float = 0.0, json_decoder: str = "auto",
+                 extra_api_keys: Optional[List[str]] = None, key_failure_threshold: int = 3,
+                 key_cooldown: float = 60.0, key_refresh_interval: float = 300.0,
+                 warm_connections: int = 2, keepalive_interval: float = 20.0, probe_path: str = "/",
+                 context_token_budget: int = 4000):
         self.api_key = api_key
+        # Authorization is set per request from this pool, least-loaded key first
+        self._keys = KeyPool([api_key, *(extra_api_keys or [])],
+                             failure_threshold=key_failure_threshold, cooldown=key_cooldown)
+        self._key_refresh_interval = key_refresh_interval
         self.base_url = base_url.rstrip('/')
         self.session = None
         self.logger = logging.getLogger(__name__)
 
         # Performance optimizations
-        self._response_cache = {}
-        self._cache_ttl = 300  # 5 minutes cache
-        self._connection_pool_size = 10
+        self._response_cache = ResponseCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
+        self._background_tasks = set()
+        self._connection_pool_size = connection_pool_size
+        self._limit_per_host = limit_per_host
         self._timeout = aiohttp.ClientTimeout(total=30, connect=10)
+        # Optional aiohttp tracing hooks (used by benchmarks to observe pool usage)
+        self._trace_configs = [self._connection_trace(), *(trace_configs or [])]
+
+        # Connections opened ahead of the first request and kept alive by idle probes
+        self._warm_connections = min(warm_connections, limit_per_host)
+        self._keepalive_interval = keepalive_interval
+        self._probe_path = probe_path
+        self._probe_timeout = aiohttp.ClientTimeout(total=10, connect=5)
+        self._connections = ConnectionHealth()
+        self._last_request_at = 0.0
+
+        # Streaming: ask upstream for SSE; JSON replies fall back to simulated
+        # chunking, and an endpoint that rejects the flag turns it off
+        self.upstream_streaming = True
+        self._simulated_chunk_chars = 120
+
+        # Concurrent identical requests share one upstream call
+        self._singleflight = SingleFlight()
+        # Adaptive (AIMD) concurrency limits per endpoint class; callers queue up to queue_timeout
+        self._concurrency = ConcurrencyController(queue_timeout=queue_timeout)
+        # Per endpoint/model circuit breakers fail fast while an upstream is down
+        self._breakers = CircuitBreakerRegistry(
+            failure_threshold=breaker_failure_threshold,
+            recovery_timeout=breaker_recovery_timeout
+        )
+        # Orders work by priority class, then fairly across guilds, for the shared connection pool
+        self._scheduler = PriorityScheduler(capacity=connection_pool_size)
+        # Default end-to-end budget for a chat completion, retries included
+        self.chat_deadline = chat_deadline
+        # Observed latency of successful calls, per endpoint route
+        self._latency: Dict[str, LatencyTracker] = {}
+        # Duplicate chat completions that outlive the observed p95, for up to hedge_ratio of requests
+        self._hedging = HedgePolicy(ratio=hedge_ratio, tracker=self._latency_for("/v1/prompt/completion"))
+        # Packs recent history into each chat prompt within a per-model token budget
+        self._context = ContextBuilder(max_tokens=context_token_budget)
+        # Fastest available JSON decoder (orjson/msgspec when installed)
+        self.decoder_name, self._decoder = get_decoder(json_decoder)
 
     async def __aenter__(self):
         # Optimized session with connection pooling
         connector = aiohttp.TCPConnector(
             limit=self._connection_pool_size,
-            limit_per_host=5,
+            limit_per_host=self._limit_per_host,
             ttl_dns_cache=300,
             use_dns_cache=True,
-            keepalive_timeout=30,
+            # Idle probes run well inside this window so warm connections survive quiet periods
+            keepalive_timeout=max(30, self._keepalive_interval * 2),
             enable_cleanup_closed=True
         )
 
         self.session = aiohttp.ClientSession(
             connector=connector,
             timeout=self._timeout,
+            trace_configs=self._trace_configs,
             headers={
-                "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json",
                 "Connection": "keep-alive"
             }
         )
+
+        # Keep per-key credit balances current when balancing across several accounts
+        if len(self._keys) > 1 and self._key_refresh_interval > 0:
+            self._spawn(self._refresh_key_quotas_periodically())
+        if self._warm_connections > 0 and self._keepalive_interval > 0:
+            self._spawn(self._keep_connections_warm())
         return self
 
+    def _spawn(self, coro) -> asyncio.Future:
+        """Run a background task that is cancelled when the service closes"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def _connection_trace(self) -> aiohttp.TraceConfig:
+        """Tracing hooks that time each request and note whether it opened a new connection"""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.started = time.monotonic()
+            ctx.reused = None
+            ctx.probe = isinstance(ctx.trace_request_ctx, dict) and ctx.trace_request_ctx.get('probe', False)
+            if not ctx.probe:
+                self._last_request_at = ctx.started
+
+        async def on_connection_create_end(session, ctx, params):
+            ctx.reused = False
+
+        async def on_connection_reuseconn(session, ctx, params):
+            ctx.reused = True
+
+        async def on_request_end(session, ctx, params):
+            if not ctx.probe and ctx.reused is not None:
+                self._connections.record_request(time.monotonic() - ctx.started, ctx.reused)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open up to ``connections`` pooled connections ahead of real traffic.
+
+        Probes run concurrently so each needs its own connection; returns how
+        many succeeded. Probes bypass the limiter, breakers and key pool.
+        """
+        if not self.session:
+            raise RuntimeError("Service not initialized. Use async with statement.")
+        count = self._warm_connections if connections is None else min(connections, self._limit_per_host)
+        if count <= 0:
+            return 0
+        results = await asyncio.gather(*(self._probe() for _ in range(count)))
+        return sum(results)
+
+    async def _probe(self) -> bool:
+        self._connections.probes += 1
+        try:
+            async with self.session.request(
+                "HEAD",
+                f"{self.base_url}/{self._probe_path.lstrip('/')}",
+                timeout=self._probe_timeout,
+                trace_request_ctx={'probe': True}
+            ) as response:
+                await response.read()
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # aiohttp drops a connection that failed, so the next probe opens a fresh one
+            self._connections.probe_failures += 1
+            self.logger.debug(f"Keepalive probe failed: {e!r}")
+            return False
+
+    async def _keep_connections_warm(self):
+        while True:
+            await asyncio.sleep(self._keepalive_interval)
+            # Real traffic keeps connections warm on its own
+            if time.monotonic() - self._last_request_at < self._keepalive_interval:
+                continue
+            healthy = await self.warm_up()
+            if healthy < self._warm_connections:
+                # Replace sockets that turned out to be dead, off the request path
+                replaced = await self.warm_up(self._warm_connections - healthy)
+                self._connections.replaced += replaced
+                self.logger.info(f"Replaced {replaced}/{self._warm_connections - healthy} dead pooled connections")
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for task in list(self._background_tasks):
+            task.cancel()
         if self.session:
             await self.session.close()
 
-    def _get_cache_key(self, method: str, endpoint: str, data: Optional[Dict] = None) -> str:
+    def _get_cache_key(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                       api_key: Optional[str] = None) -> str:
         """Generate cache key for request"""
         key_data = f"{method}:{endpoint}:{json.dumps(data, sort_keys=True) if data else ''}"
+        if api_key:
+            # Requests pinned to a key see that account's data
+            key_data += f":{hashlib.sha256(api_key.encode()).hexdigest()}"
         return hashlib.md5(key_data.encode()).hexdigest()
 
-    def _is_cache_valid(self, cache_entry: Dict) -> bool:
-        """Check if cache entry is still valid"""
-        return time.time() - cache_entry['timestamp'] < self._cache_ttl
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, *,
+                            context: Optional[RequestContext] = None, timeout: Optional[float] = None,
+                            use_cache: bool = True, coalesce: Optional[bool] = None, hedge: bool = True) -> Any:
+        """Single request pipeline: cache -> retries -> hedging/coalescing -> admission -> HTTP -> decode.
 
-    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, use_cache: bool = True) -> Dict:
+        Per-endpoint behaviour comes from the EndpointProfile in services.endpoints;
+        ``timeout``, ``use_cache``, ``coalesce`` and ``hedge`` override or narrow it per call.
+        """
         if not self.session:
             raise RuntimeError("Service not initialized. Use async with statement.")
 
-        # Check cache for GET requests and specific endpoints
-        cache_key = None
-        if use_cache and method == "GET" or endpoint in ["/v1/models", "/v1/user"]:
-            cache_key = self._get_cache_key(method, endpoint, data)
-            if cache_key in self._response_cache and self._is_cache_valid(self._response_cache[cache_key]):
-                self.logger.debug(f"Cache hit for {endpoint}")
-                return self._response_cache[cache_key]['data']
+        profile = profile_for(endpoint)
+        context = context or RequestContext()
+        timeout = profile.timeout if timeout is None else timeout
 
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        self.logger.debug(f"Making {method} request to {url}")
+        # Only GET responses are cacheable; per-endpoint TTLs live in services.cache
+        cache_key = None
+        if use_cache and profile.cache and method == "GET":
+            cache_key = self._get_cache_key(method, endpoint, data, context.api_key)
+            cached, state = self._response_cache.get(cache_key)
+            if state is not None:
+                self.logger.debug(f"Cache {state} hit for {endpoint}")
+                if state == STALE:
+                    self._revalidate(method, endpoint, data, cache_key, context)
+                return cached
+
+        # Only idempotent requests are coalesced unless the caller opts in
+        if coalesce is None:
+            coalesce = profile.coalesce and method == "GET"
+
+        def send():
+            return self._send_request(method, endpoint, data, timeout, cache_key, context)
 
-        try:
-            # Use optimized request parameters
-            async with self.session.request(
-                method,
-                url,
-                json=data,
-                compress=True  # Enable compression
-            ) as response:
-                content_type = response.headers.get('content-type', '')
+        # Reduce retry delay and optimize retry logic
+        base_delay = 0.5  # Reduced from 1 second
+        limiter = self._concurrency[endpoint_class(endpoint)]
 
-                if 'application/json' in content_type:
-                    response_data = await response.json()
+        for attempt in range(profile.retries + 1):
+            try:
+                if coalesce:
+                    return await self._singleflight.do(self._get_cache_key(method, endpoint, data, context.api_key), send)
+                if hedge and profile.hedge:
+                    return await self._hedged(endpoint, send, context)
+                return await send()
+            except APIError as e:
+                # Don't pile retries onto an endpoint the limiter has just backed off from
+                if e.status_code == 500 and attempt < profile.retries and not limiter.is_backing_off():
+                    # Exponential backoff with jitter
+                    delay = base_delay * (2 ** attempt) + (asyncio.get_event_loop().time() % 0.1)
+                    # Only retry if the backoff plus a typical call still fits in the deadline
+                    remaining = context.remaining()
+                    typical = self._latency_for(endpoint).percentile(0.5) or 0.0
+                    if remaining is not None and remaining < delay + typical:
+                        self.logger.warning(f"API 500 error on {endpoint}, not retrying: deadline too close")
+                        raise e
+                    self.logger.warning(f"API 500 error, retrying attempt {attempt + 1}/{profile.retries} after {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
                 else:
-                    text_response = await response.text()
-                    try:
-                        response_data = json.loads(text_response)
-                    except json.JSONDecodeError:
-                        response_data = {"response": text_response}
-
-                if response.status >= 400:
-                    self.logger.error(f"API Error {response.status}: {response_data}")
-                    raise APIError(f"API Error {response.status}: {response_data}", response.status)
-
-                # Cache successful responses
-                if use_cache and cache_key and response.status == 200:
-                    self._response_cache[cache_key] = {
-                        'data': response_data,
-                        'timestamp': time.time()
-                    }
-                    # Clean old cache entries periodically
-                    if len(self._response_cache) > 100:
-                        self._clean_cache()
-
-                return response_data
-
-        except asyncio.TimeoutError:
-            self.logger.error(f"Request timeout for {endpoint}")
-            raise APIError(f"Request timeout for {endpoint}")
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Network error: {str(e)}")
-            raise APIError(f"Network error: {str(e)}")
-
-    def _clean_cache(self):
-        """Remove expired cache entries"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._response_cache.items()
-            if current_time - entry['timestamp'] > self._cache_ttl
-        ]
-        for key in expired_keys:
-            del self._response_cache[key]
-
-    async def _make_request_with_timeout(self, method: str, endpoint: str, data: Optional[Dict] = None, timeout_seconds: int = 30) -> Dict:
-        """Make request with custom timeout for specific operations"""
-        if not self.session:
-            raise RuntimeError("Service not initialized. Use async with statement.")
+                    raise e
 
+    async def _send_request(self, method: str, endpoint: str, data: Optional[Dict], timeout: float,
+                            cache_key: Optional[str], context: Optional[RequestContext] = None) -> Any:
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        self.logger.debug(f"Making {method} request to {url} with {timeout_seconds}s timeout")
-
-        # Create custom timeout for this request
-        custom_timeout = aiohttp.ClientTimeout(total=timeout_seconds, connect=10)
-
+        self.logger.debug(f"Making {method} request to {url} with {timeout}s timeout")
+
+        context = context or RequestContext()
+        async with self._admit(endpoint, data, context):
+            request_timeout, clipped = self._request_timeout(timeout, endpoint, context)
+            tried: List[ApiKey] = []
+            while True:
+                key = self._keys.acquire(context.api_key, exclude=tried)
+                status = None
+                started = time.monotonic()
+                try:
+                    # Use optimized request parameters
+                    async with self.session.request(
+                        method,
+                        url,
+                        json=data,
+                        timeout=request_timeout,
+                        headers=self._auth_headers(key),
+                        compress=True  # Enable compression
+                    ) as response:
+                        status = response.status
+                        # Read the body once; decoding happens on the raw bytes
+                        raw = await response.read()
+
+                except asyncio.TimeoutError:
+                    if clipped:
+                        raise DeadlineExceededError(f"Request to {endpoint} ran past its deadline")
+                    self.logger.error(f"Request timeout ({timeout}s) for {endpoint}")
+                    raise APIError(f"Request timeout ({timeout}s) for {endpoint}")
+                except aiohttp.ClientError as e:
+                    self.logger.error(f"Network error: {str(e)}")
+                    raise APIError(f"Network error: {str(e)}")
+                finally:
+                    self._keys.release(key, status)
+
+                # A rejected or throttled key says nothing about the request; try another account
+                tried.append(key)
+                if (status in KEY_FAILURE_STATUSES and context.api_key is None
+                        and self._keys.has_alternative(tried)):
+                    self.logger.warning(f"API key {key.label} got {status} for {endpoint}, trying another key")
+                    continue
+                break
+
+            response_data = decode_body(raw, self._decoder_for(endpoint))
+
+            if status >= 400:
+                self.logger.error(f"API Error {status}: {response_data}")
+                raise APIError(f"API Error {status}: {response_data}", status)
+
+            self._latency_for(endpoint).record(time.monotonic() - started)
+            price = _extract_price(response_data)
+            if price:
+                self._keys.charge(key, price)
+
+            # Cache successful responses
+            if cache_key and status == 200:
+                self._response_cache.set(cache_key, response_data, endpoint, size=len(raw))
+
+            return response_data
+
+    @staticmethod
+    def _auth_headers(key: ApiKey) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {key.value}"}
+
+    def _decoder_for(self, endpoint: str) -> Decoder:
+        name = profile_for(endpoint).decoder
+        return self._decoder if name is None else get_decoder(name)[1]
+
+    def _latency_for(self, endpoint: str) -> LatencyTracker:
+        key = normalize_endpoint(endpoint)
+        tracker = self._latency.get(key)
+        if tracker is None:
+            tracker = self._latency[key] = LatencyTracker()
+        return tracker
+
+    async def _hedged(self, endpoint: str, send: Callable[[], Awaitable[Any]], context: RequestContext) -> Any:
+        """Run ``send``, racing a duplicate against it if it runs past the observed p95 latency."""
+        self._hedging.budget.on_request()
+        hedge_delay = self._hedging.delay()
+        remaining = context.remaining()
+        if hedge_delay is None or (remaining is not None and hedge_delay >= remaining):
+            return await send()
+
+        primary = asyncio.ensure_future(send())
+        pending = {primary}
+        error = None
         try:
-            async with self.session.request(
-                method,
-                url,
-                json=data,
-                timeout=custom_timeout,
-                compress=True
-            ) as response:
-                content_type = response.headers.get('content-type', '')
-
-                if 'application/json' in content_type:
-                    response_data = await response.json()
-                else:
-                    text_response = await response.text()
-                    try:
-                        response_data = json.loads(text_response)
-                    except json.JSONDecodeError:
-                        response_data = {"response": text_response}
-
-                if response.status >= 400:
-                    self.logger.error(f"API Error {response.status}: {response_data}")
-                    raise APIError(f"API Error {response.status}: {response_data}", response.status)
-
-                return response_data
-
-        except asyncio.TimeoutError:
-            self.logger.error(f"Request timeout ({timeout_seconds}s) for {endpoint}")
-            raise APIError(f"Request timeout ({timeout_seconds}s) for {endpoint}")
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Network error: {str(e)}")
-            raise APIError(f"Network error: {str(e)}")
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if (not done and not self._concurrency[endpoint_class(endpoint)].is_backing_off()
+                    and self._hedging.budget.try_spend()):
+                self.logger.debug(f"{endpoint} outstanding after {hedge_delay:.2f}s, sending hedge")
+                pending.add(asyncio.ensure_future(send()))
+            pending |= done
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._hedging.budget.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @asynccontextmanager
+    async def _admit(self, endpoint: str, data: Optional[Dict], context: Optional[RequestContext] = None):
+        """Admission path for one upstream call: circuit breaker, adaptive limiter, priority scheduler.
+
+        The limiter permit is taken first, so requests queued behind their
+        class's AIMD limit don't hold shared scheduler slots away from other
+        classes. Both waits share a single queue deadline, which never
+        extends past the caller's own deadline.
+        """
+        context = context or RequestContext()
+        cls = endpoint_class(endpoint)
+        priority = context.priority
+        if priority is None:
+            priority = profile_for(endpoint).priority
+        if priority is None:
+            priority = default_priority(cls)
+        queue_timeout = self._concurrency.queue_timeout
+        remaining = context.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise DeadlineExceededError(f"Deadline passed before the request to {endpoint} could start")
+            queue_timeout = min(queue_timeout, remaining)
+        queue_deadline = time.monotonic() + queue_timeout
+
+        async with self._breakers.guard(endpoint, _request_model(data)):
+            async with self._concurrency.slot(cls, timeout=queue_timeout):
+                async with self._scheduler.slot(priority, context.guild_id, context.cost,
+                                                timeout=max(0.0, queue_deadline - time.monotonic())):
+                    yield
+
+    def _request_timeout(self, total: float, endpoint: str,
+                         context: Optional[RequestContext]) -> Tuple[aiohttp.ClientTimeout, bool]:
+        """Client timeout for one call, cut to the context deadline when that comes first.
+
+        Returns the timeout and whether it was shortened by the deadline.
+        """
+        remaining = context.remaining() if context else None
+        if remaining is None or remaining >= total:
+            return aiohttp.ClientTimeout(total=total, connect=10), False
+        if remaining <= 0:
+            raise DeadlineExceededError(f"Deadline passed before the request to {endpoint} could start")
+        return aiohttp.ClientTimeout(total=remaining, connect=min(10, remaining)), True
+
+    def _revalidate(self, method: str, endpoint: str, data: Optional[Dict], cache_key: str,
+                    context: RequestContext):
+        """Refresh a stale cache entry in the background (stale-while-revalidate)"""
+        # Same key as the caller, since it is part of the cache key; the caller's deadline no longer applies
+        context = replace(context, deadline=None)
+
+        async def refresh():
+            try:
+                await self._singleflight.do(
+                    cache_key,
+                    lambda: self._send_request(method, endpoint, data, profile_for(endpoint).timeout,
+                                               cache_key, context)
+                )
+            except APIError as e:
+                self.logger.warning(f"Background refresh of {endpoint} failed: {e}")
+
+        self._spawn(refresh())
+
+    def invalidate_cache(self, endpoint: Optional[str] = None) -> int:
+        """Drop cached responses for an endpoint (or prefix), or the whole cache"""
+        return self._response_cache.invalidate(endpoint=endpoint)
+
+    def apply_settings(self, chat_deadline: float, queue_timeout: float, hedge_ratio: float,
+                       context_token_budget: int):
+        """Update the per-request limits in place; requests already running keep theirs."""
+        self.chat_deadline = chat_deadline
+        self._concurrency.queue_timeout = queue_timeout
+        self._hedging.budget.ratio = hedge_ratio
+        self._context.max_tokens = context_token_budget
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime counters for the utility stats command"""
+        return {
+            'singleflight': self._singleflight.get_stats(),
+            'cache': self._response_cache.get_stats(),
+            'concurrency': self._concurrency.get_stats(),
+            'breakers': self._breakers.get_stats(),
+            'scheduler': self._scheduler.get_stats(),
+            'hedging': self._hedging.get_stats(),
+            'decoder': self.decoder_name,
+            'keys': self._keys.get_stats(),
+            'connections': {**self._connections.get_stats(), 'warm_target': self._warm_connections},
+            'context': self._context.get_stats(),
+        }
 
     async def get_models(self) -> List[Dict]:
         return await self._make_request("GET", "/v1/models")
 
-    async def get_user_info(self) -> Dict:
-        return await self._make_request("GET", "/v1/user")
-
-    async def chat_completion(self, model: str, messages: List[Dict], **kwargs) -> Dict:
-        # Optimize the request payload
-        data = {
-            "smart_llm_selector": {
+    async def get_user_info(self, refresh: bool = False) -> Dict:
+        """Account info for the primary API key"""
+        if refresh:
+            self.invalidate_cache("/v1/user")
+        primary = self._keys.primary
+        user_info = await self._make_request("GET", "/v1/user", context=RequestContext(api_key=primary.value))
+        coins = _extract_coins(user_info)
+        if coins is not None:
+            self._keys.update_credits(primary, coins)
+        return user_info
+
+    async def refresh_key_quotas(self):
+        """Read remaining credits for every pooled key from /v1/user"""
+        for key in self._keys.keys:
+            try:
+                user_info = await self._make_request(
+                    "GET", "/v1/user", context=RequestContext(api_key=key.value), use_cache=False
+                )
+            except APIError as e:
+                self.logger.warning(f"Could not refresh credits for API key {key.label}: {e}")
+                continue
+            coins = _extract_coins(user_info)
+            if coins is not None:
+                self._keys.update_credits(key, coins)
+
+    async def _refresh_key_quotas_periodically(self):
+        while True:
+            await self.refresh_key_quotas()
+            await asyncio.sleep(self._key_refresh_interval)
+
+    def _chat_payload(self, model: Optional[str], messages: List[Dict], pack_context: bool = True,
+                      **kwargs) -> Dict:
+        """Completion payload for ``model`` with as much recent history as its budget allows.
+
+        With ``pack_context=False`` every message is sent, however long.
+        Without a model (or with "auto") the API's smart selector picks one.
+        """
+        reply_tokens = kwargs.get("max_tokens") or 0
+        if not messages:
+            message = "Hello"
+        elif pack_context:
+            message = self._context.build(model or "", messages, reply_tokens)
+        else:
+            message = ContextBuilder.render(messages)
+        payload = {"message": message, **kwargs}
+        if model and model != "auto":
+            payload["models"] = [model]
+        else:
+            payload["smart_llm_selector"] = {
                 "quantity": 1,
                 "pricing_method": "quality"
-            },
-            "message": messages[-1]["content"] if messages else "Hello",
-            **kwargs
-        }
+            }
+        return payload
+
+    async def chat_completion(self, model: str, messages: List[Dict], *, priority: Optional[int] = None,
+                              guild_id: Optional[int] = None, timeout: Optional[float] = None,
+                              hedge: bool = True, pack_context: bool = True, **kwargs) -> Dict:
+        """Run a chat completion within ``timeout`` seconds (default ``chat_deadline``), retries included.
+
+        With hedging enabled, an attempt still outstanding at the observed p95
+        latency gets a duplicate request and the first answer wins. Callers
+        whose prompt must arrive whole (history summaries) pass
+        ``pack_context=False`` to skip the context token budget.
+        """
+        # Optimize the request payload
+        data = self._chat_payload(model, messages, pack_context, **kwargs)
+        deadline = time.monotonic() + (self.chat_deadline if timeout is None else timeout)
+        context = RequestContext(priority=priority, guild_id=guild_id, deadline=deadline)
+
+        return await self._make_request("POST", "/v1/prompt/completion", data,
+                                        context=context, use_cache=False, hedge=hedge)
+
+    async def compare_models(self, models: List[str], prompt: str, *, guild_id: Optional[int] = None,
+                             timeout: Optional[float] = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Send one prompt to several models concurrently, yielding each result as it lands.
+
+        Each model is its own request (so its own breaker and deadline); a
+        failure or timeout is yielded as that model's result instead of
+        cancelling the rest. Results are dicts with ``model``, ``response``,
+        ``error`` and ``latency``.
+        """
+        if not self.session:
+            raise RuntimeError("Service not initialized. Use async with statement.")
 
-        # Reduce retry delay and optimize retry logic
-        max_retries = 2
-        base_delay = 0.5  # Reduced from 1 second
+        deadline = time.monotonic() + (self.chat_deadline if timeout is None else timeout)
 
-        for attempt in range(max_retries + 1):
+        async def complete(model: str) -> Dict[str, Any]:
+            started = time.monotonic()
+            data = {"models": [model], "message": prompt, **kwargs}
             try:
-                # Disable caching for chat completions (real-time responses)
-                return await self._make_request("POST", "/v1/prompt/completion", data, use_cache=False)
+                response = await self._make_request(
+                    "POST", "/v1/prompt/completion", data,
+                    context=RequestContext(guild_id=guild_id, deadline=deadline),
+                    use_cache=False, hedge=False
+                )
+                return {'model': model, 'response': response, 'error': None, 'latency': time.monotonic() - started}
             except APIError as e:
-                if e.status_code == 500 and attempt < max_retries:
-                    # Exponential backoff with jitter
+                return {'model': model, 'response': None, 'error': e, 'latency': time.monotonic() - started}
+
+        tasks = [asyncio.ensure_future(complete(model)) for model in models]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The caller stopped listening; don't leave paid requests running
+            for task in tasks:
+                task.cancel()
+
+    async def stream_chat_completion(self, model: str, messages: List[Dict], *, priority: Optional[int] = None,
+                                     guild_id: Optional[int] = None, timeout: Optional[float] = None,
+                                     **kwargs) -> AsyncIterator[str]:
+        """Yield completion text incrementally.
+
+        Parses Server-Sent Events or raw chunked text when the API streams,
+        and otherwise chunks the buffered completion so callers can use a
+        single code path. The deadline bounds queueing and retries; once
+        text is flowing the stream is only bounded by the gap between chunks.
+        """
+        if not self.session:
+            raise RuntimeError("Service not initialized. Use async with statement.")
+
+        data = self._chat_payload(model, messages, **kwargs)
+        deadline = time.monotonic() + (self.chat_deadline if timeout is None else timeout)
+        context = RequestContext(priority=priority, guild_id=guild_id, deadline=deadline)
+        if self.upstream_streaming:
+            data["stream"] = True
+
+        url = f"{self.base_url}/v1/prompt/completion"
+        profile = profile_for("/v1/prompt/completion")
+        # No total deadline while streaming; bound the gap between chunks instead
+        stream_timeout = aiohttp.ClientTimeout(total=None, connect=10, sock_read=profile.timeout)
+
+        max_retries = profile.retries
+        base_delay = 0.5
+        tried_keys: List[ApiKey] = []
+        # Set once upstream refuses "stream"; confirmed by a buffered retry that succeeds
+        stream_rejected = False
+
+        attempt = 0
+        while True:
+            yielded = False
+            try:
+                async with self._admit("/v1/prompt/completion", data, context):
+                    key = self._keys.acquire(exclude=tried_keys)
+                    status = None
+                    try:
+                        async with self.session.request(
+                            "POST",
+                            url,
+                            json=data,
+                            timeout=stream_timeout,
+                            headers={**self._auth_headers(key), "Accept": "text/event-stream, application/json"}
+                        ) as response:
+                            status = response.status
+                            content_type = response.headers.get('content-type', '')
+
+                            if response.status >= 400:
+                                body = await response.text()
+                                self.logger.error(f"API Error {response.status}: {body}")
+                                raise APIError(f"API Error {response.status}: {body}", response.status)
+                            if stream_rejected and self.upstream_streaming:
+                                self.logger.warning("Upstream does not accept streaming requests; using buffered completions")
+                                self.upstream_streaming = False
+
+                            if 'text/event-stream' in content_type:
+                                async for delta in self._iter_sse(response):
+                                    yielded = True
+                                    yield delta
+                            elif 'application/json' not in content_type and response.headers.get('transfer-encoding') == 'chunked':
+                                async for raw in response.content.iter_any():
+                                    text = raw.decode('utf-8', errors='replace')
+                                    if text:
+                                        yielded = True
+                                        yield text
+                            else:
+                                # Simulated fallback: the API buffered the whole completion
+                                response_data = decode_body(await response.read(), self._decoder)
+                                content = extract_completion_text(response_data) or ""
+                                for start in range(0, len(content), self._simulated_chunk_chars):
+                                    yielded = True
+                                    yield content[start:start + self._simulated_chunk_chars]
+                                    await asyncio.sleep(0)
+                    except asyncio.TimeoutError:
+                        self.logger.error("Stream timeout for /v1/prompt/completion")
+                        raise APIError("Request timeout for /v1/prompt/completion")
+                    except aiohttp.ClientError as e:
+                        self.logger.error(f"Network error: {str(e)}")
+                        raise APIError(f"Network error: {str(e)}")
+                    finally:
+                        self._keys.release(key, status)
+                return
+
+            except APIError as e:
+                if not yielded and e.status_code in (400, 422) and data.pop("stream", None):
+                    stream_rejected = True
+                    continue
+                if e.status_code in KEY_FAILURE_STATUSES and not yielded:
+                    tried_keys.append(key)
+                    if self._keys.has_alternative(tried_keys):
+                        self.logger.warning(f"API key {key.label} got {e.status_code} for stream, trying another key")
+                        continue
+                if (e.status_code == 500 and attempt < max_retries and not yielded
+                        and not self._concurrency[CHAT].is_backing_off()):
                     delay = base_delay * (2 ** attempt) + (asyncio.get_event_loop().time() % 0.1)
-                    self.logger.warning(f"API 500 error, retrying attempt {attempt + 1}/{max_retries} after {delay:.2f}s")
+                    if context.remaining() < delay:
+                        raise
+                    self.logger.warning(f"API 500 error, retrying stream attempt {attempt + 1}/{max_retries} after {delay:.2f}s")
                     await asyncio.sleep(delay)
+                    attempt += 1
                     continue
-                else:
-                    raise e
+                raise
+
+    async def _iter_sse(self, response) -> AsyncIterator[str]:
+        async for raw_line in response.content:
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            if not line or line.startswith(':') or not line.startswith('data:'):
+                continue
+
+            payload = line[5:].strip()
+            if payload == '[DONE]':
+                break
+
+            try:
+                event = self._decoder(payload.encode())
+            except DECODE_ERRORS:
+                yield payload
+                continue
+
+            delta = _extract_stream_delta(event)
+            if delta:
+                yield delta
 
-    async def generate_image(self, model: str, description: str, size: str, variations: int, **kwargs) -> Dict:
+    async def generate_image(self, model: str, description: str, size: str, variations: int, *,
+                             guild_id: Optional[int] = None, **kwargs) -> Dict:
         data = {
             "model": model,
             "description": description,
@@ -214,16 +779,18 @@ class StraicoService:
         timeout_multiplier = max(variations, 1)
         extended_timeout = min(120, 60 + (timeout_multiplier * 20))  # 60s base + 20s per variation, max 120s
 
-        return await self._make_request_with_timeout("POST", "/v1/image/generation", data, extended_timeout)
+        # Each variation costs a fair-queuing share so large batches don't crowd out other guilds
+        context = RequestContext(guild_id=guild_id, cost=float(timeout_multiplier))
+        return await self._make_request("POST", "/v1/image/generation", data, context=context, timeout=extended_timeout)
 
-    async def generate_video(self, prompt: str, model: str = "runway-gen3", **kwargs) -> Dict:
+    async def generate_video(self, prompt: str, model: str = "runway-gen3", *, guild_id: Optional[int] = None, **kwargs) -> Dict:
         data = {
             "prompt": prompt,
             "model": model,
             **kwargs
         }
-        # Video generation typically takes longer
-        return await self._make_request_with_timeout("POST", "/videos/generations", data, 90)
+        # Video generation typically takes longer (see the endpoint profile)
+        return await self._make_request("POST", "/videos/generations", data, context=RequestContext(guild_id=guild_id))
 
-    async def get_generation_status(self, generation_id: str) -> Dict:
-        return await self._make_request("GET", f"/generations/{generation_id}")
\ No newline at end of file
+    async def get_generation_status(self, generation_id: str, *, guild_id: Optional[int] = None) -> Dict:
+        return await self._make_request("GET", f"/generations/{generation_id}", context=RequestContext(guild_id=guild_id))
\ No newline at end of file
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-endpoint circuit breakers (services.circuit_breaker)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.circuit_breaker as circuit_breaker
+from core.errors import APIError, CircuitOpenError
+from services.circuit_breaker import CircuitBreakerRegistry, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(test):
+    def wrapper():
+        clock = FakeClock()
+        original = circuit_breaker.time
+        circuit_breaker.time = clock
+        try:
+            test(clock)
+        finally:
+            circuit_breaker.time = original
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+async def call(registry, error=None, endpoint="/v1/prompt/completion", model="openai/gpt-4o"):
+    """One guarded request; returns the breaker error if it failed fast, else None."""
+    try:
+        async with registry.guard(endpoint, model):
+            if error is not None:
+                raise error
+    except CircuitOpenError as e:
+        return e
+    except APIError:
+        pass
+    return None
+
+
+@with_clock
+def test_opens_after_consecutive_failures(clock):
+    async def run():
+        registry = CircuitBreakerRegistry(failure_threshold=3, recovery_timeout=30)
+        breaker = registry.get("/v1/prompt/completion", "openai/gpt-4o")
+        await call(registry, APIError("down", 503))
+        await call(registry, APIError("down", 503))
+        await call(registry)                               # a success resets the count
+        for _ in range(2):
+            await call(registry, APIError("down", 503))
+        assert breaker.state == CLOSED
+
+        await call(registry, APIError("bad request", 400))  # client errors say nothing about health
+        assert breaker.state == CLOSED
+        await call(registry, APIError("down", 503))
+        assert breaker.state == OPEN
+
+        error = await call(registry)
+        assert isinstance(error, CircuitOpenError) and error.retry_after == 30
+        assert "`openai/gpt-4o`" in str(error)
+        assert breaker.fast_failures == 1
+        # Other models on the same endpoint are unaffected
+        assert await call(registry, model="anthropic/claude") is None
+
+    asyncio.run(run())
+    print('✅ Consecutive overload failures open the circuit for that model')
+
+
+@with_clock
+def test_half_open_probe_closes(clock):
+    async def run():
+        registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=30)
+        breaker = registry.get("/v1/prompt/completion", "openai/gpt-4o")
+        await call(registry, APIError("down", 503))
+        assert breaker.state == OPEN
+
+        clock.now += 31
+        probe_started = asyncio.Event()
+        finish_probe = asyncio.Event()
+
+        async def probe():
+            async with registry.guard("/v1/prompt/completion", "openai/gpt-4o"):
+                probe_started.set()
+                await finish_probe.wait()
+
+        task = asyncio.create_task(probe())
+        await probe_started.wait()
+        assert breaker.state == HALF_OPEN
+        # Only one probe at a time; everyone else still fails fast
+        assert isinstance(await call(registry), CircuitOpenError)
+
+        finish_probe.set()
+        await task
+        assert breaker.state == CLOSED and breaker.consecutive_failures == 0
+        assert await call(registry) is None
+
+    asyncio.run(run())
+    print('✅ A successful half-open probe closes the circuit')
+
+
+@with_clock
+def test_failed_probe_reopens_with_backoff(clock):
+    async def run():
+        registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=30)
+        breaker = registry.get("/v1/prompt/completion", "openai/gpt-4o")
+        breaker.max_recovery_timeout = 100
+        await call(registry, APIError("down", 503))
+
+        for expected in (60, 100, 100):
+            clock.now += breaker.recovery_timeout + 1
+            await call(registry, APIError("still down", 502))
+            assert breaker.state == OPEN and breaker.recovery_timeout == expected
+            assert breaker.retry_after() == expected
+
+        clock.now += 101
+        assert await call(registry) is None
+        assert breaker.state == CLOSED and breaker.recovery_timeout == 30
+        assert breaker.times_opened == 4
+
+    asyncio.run(run())
+    print('✅ A failed probe re-opens the circuit with a doubled, capped timeout')
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_half_open_probe_closes()
+    test_failed_probe_reopens_with_backoff()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for background history compaction (services.compaction)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.conversation import ConversationHistory
+from services.compaction import HistoryCompactor, SUMMARY_PREFIX
+from services.context_builder import ContextBuilder
+
+
+def test_compacts_in_background_without_losing_new_messages():
+    async def run():
+        history = ConversationHistory(max_history=20)
+        release = asyncio.Event()
+        prompts = []
+
+        async def summarize(prompt):
+            prompts.append(prompt)
+            await release.wait()
+            return "Alice asked about deploys; Bob said Fridays are frozen."
+
+        compactor = HistoryCompactor(history, summarize, threshold=10, keep_recent=4)
+        history.add_listener(compactor.maybe_compact)
+        for i in range(10):
+            history.add_message(1, "user", f"message {i}", "Alice")
+        await asyncio.sleep(0)
+
+        # The summary is pending; the channel keeps working meanwhile
+        assert compactor.get_stats()['running'] == 1
+        history.add_message(1, "user", "message 10", "Alice")
+        assert len(history.get_history(1)) == 11
+
+        release.set()
+        await asyncio.sleep(0.01)
+        messages = history.get_history(1)
+        assert messages[0]['summary'] and messages[0]['content'].startswith(SUMMARY_PREFIX)
+        assert [m['content'] for m in messages[1:]] == [f"message {i}" for i in range(6, 11)]
+        assert "Alice: message 0" in prompts[0] and "message 6" not in prompts[0]
+        assert compactor.get_stats()['messages_folded'] == 6
+
+    asyncio.run(run())
+    print('✅ Oldest turns are folded into a summary off the reply path')
+
+
+def test_failure_and_clear_leave_history_alone():
+    async def run():
+        history = ConversationHistory()
+
+        async def failing(prompt):
+            raise RuntimeError("upstream down")
+
+        compactor = HistoryCompactor(history, failing, threshold=5, keep_recent=2, retry_delay=60)
+        for i in range(5):
+            history.add_message(1, "user", f"m{i}")
+        assert await compactor.compact(1) is False
+        assert len(history.get_history(1)) == 5
+        # Backs off instead of retrying on every message
+        assert compactor.maybe_compact(1) is False
+
+        async def clearing(prompt):
+            history.clear_history(1)
+            return "summary"
+
+        compactor.summarize = clearing
+        compactor._retry_at.clear()
+        assert await compactor.compact(1) is False
+        assert not history.get_history(1)
+        assert compactor.get_stats()['discarded'] == 1
+
+    asyncio.run(run())
+    print('✅ Failed or outdated summaries leave the history untouched')
+
+
+def test_summary_survives_trim_and_packing():
+    history = ConversationHistory(max_history=4)
+    for i in range(3):
+        history.add_message(1, "user", f"m{i}")
+    old = history.get_history(1)[:2]
+    assert history.replace_prefix(1, old, {"role": "system", "content": "Summary", "summary": True})
+    for i in range(3, 8):
+        history.add_message(1, "user", f"m{i}")
+    messages = history.get_history(1)
+    # The summary rides along on top of the last max_history messages
+    assert messages[0]['summary'] and [m['content'] for m in messages[1:]] == ["m4", "m5", "m6", "m7"]
+
+    # Pinned ahead of older turns when the budget is tight
+    builder = ContextBuilder(max_tokens=16, window_for=lambda model: 8192)
+    packed = builder.select("m", messages)
+    assert packed[0]['summary'] and packed[-1]['content'] == "m7"
+    print('✅ Summaries are kept by trimming and context packing')
+
+
+if __name__ == "__main__":
+    test_compacts_in_background_without_losing_new_messages()
+    test_failure_and_clear_leave_history_alone()
+    test_summary_survives_trim_and_packing()
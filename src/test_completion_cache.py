@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the exact-match completion cache (services.completion_cache)
+"""
+
+import os
+import sys
+import asyncio
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.completion_cache as completion_cache
+from services.completion_cache import CompletionCache, is_follow_up
+
+QUESTION = [{"role": "user", "content": "How do I  reset my password?"}]
+SAME_QUESTION = [{"role": "user", "content": "how do i reset my PASSWORD?"}]
+
+
+def test_normalized_hits_per_channel():
+    cache = CompletionCache(max_entries=10)
+    assert cache.get(1, "openai/gpt-5", QUESTION) is None
+    cache.set(1, "openai/gpt-5", QUESTION, "Use !reset")
+
+    assert cache.get(1, "openai/gpt-5", SAME_QUESTION) == "Use !reset"
+    assert cache.get(2, "openai/gpt-5", SAME_QUESTION) is None      # other channel
+    assert cache.get(1, "anthropic/claude", SAME_QUESTION) is None  # other model
+    stats = cache.get_stats()
+    assert stats['hits'] == 1 and stats['saved_calls'] == 1 and stats['misses'] == 3
+    print('✅ Normalized context hits within the same channel and model')
+
+
+def test_lru_and_ttl():
+    cache = CompletionCache(max_entries=2, ttl=60)
+    for i in range(3):
+        cache.set(1, "m", [{"role": "user", "content": f"q{i}"}], f"a{i}")
+    assert cache.get(1, "m", [{"role": "user", "content": "q0"}]) is None
+    assert cache.get_stats()['evictions'] == 1
+
+    original = completion_cache.time.time
+    try:
+        completion_cache.time.time = lambda: original() + 120
+        assert cache.get(1, "m", [{"role": "user", "content": "q2"}]) is None
+    finally:
+        completion_cache.time.time = original
+    assert cache.get_stats()['expirations'] == 1
+    print('✅ LRU eviction and TTL expiry')
+
+
+def test_follow_ups_key_on_the_conversation():
+    cache = CompletionCache(max_entries=10)
+    first = [{"role": "user", "content": "Is Rust fast?"}, {"role": "assistant", "content": "Yes."},
+             {"role": "user", "content": "why?"}]
+    other = [{"role": "user", "content": "Is Python fast?"}, {"role": "assistant", "content": "Not really."},
+             {"role": "user", "content": "Why?"}]
+    cache.set(1, "m", first, "No garbage collector")
+    assert cache.get(1, "m", other) is None
+    assert cache.get(1, "m", [{"role": "user", "content": "Hi"}] + first[1:]) == "No garbage collector"
+
+    # A window of one message only looks at the question
+    recent = CompletionCache(max_entries=10, context_messages=1)
+    recent.set(1, "m", first, "No garbage collector")
+    assert recent.get(1, "m", other) == "No garbage collector"
+
+    # 0 opts in to keying on the whole conversation
+    whole = CompletionCache(max_entries=10, context_messages=0)
+    whole.set(1, "m", QUESTION, "Use !reset")
+    assert whole.get(1, "m", [{"role": "user", "content": "hello"}] + SAME_QUESTION) is None
+    print('✅ Follow-ups only hit within the same conversation')
+
+
+def test_repeated_questions_hit_after_chatter():
+    cache = CompletionCache(max_entries=10)
+    history = [{"role": "user", "content": "hello everyone"}, {"role": "assistant", "content": "Hi!"}] + QUESTION
+    cache.set(1, "m", history, "Use !reset")
+
+    history += [{"role": "assistant", "content": "Use !reset"},
+                {"role": "user", "content": "anyone watching the game tonight?"},
+                {"role": "assistant", "content": "I can't watch, but enjoy it!"}] + SAME_QUESTION
+    assert cache.get(1, "m", history) == "Use !reset"
+
+    assert not is_follow_up("How do I reset my password?")
+    assert is_follow_up("why?") and is_follow_up("Can you explain that in more detail?")
+    print('✅ A repeated question hits however much chatter came between')
+
+
+def test_survives_restart():
+    def rows(path):
+        with sqlite3.connect(path) as db:
+            return db.execute("SELECT channel_id, text FROM completions ORDER BY channel_id").fetchall()
+
+    async def run(path):
+        cache = CompletionCache(path=path, flush_interval=60)
+        await cache.start()
+        cache.set(7, "m", QUESTION, "Use !reset")
+        cache.set(8, "m", QUESTION, "Other channel")
+        # Written behind, not on the caller's path
+        assert rows(path) == [] and cache.get_stats()['pending'] == 2
+        await cache.flush()
+        assert rows(path) == [(7, "Use !reset"), (8, "Other channel")]
+        await cache.close()
+
+        reopened = CompletionCache(path=path)
+        await reopened.start()
+        assert reopened.get(7, "m", SAME_QUESTION) == "Use !reset"
+        assert reopened.clear(7) == 1
+        await reopened.close()
+
+        again = CompletionCache(path=path)
+        await again.start()
+        assert again.get(7, "m", QUESTION) is None
+        assert again.get(8, "m", QUESTION) == "Other channel"
+        await again.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "completions.db")))
+    print('✅ Cached completions persist across restarts')
+
+
+if __name__ == "__main__":
+    test_normalized_hits_per_channel()
+    test_lru_and_ttl()
+    test_follow_ups_key_on_the_conversation()
+    test_repeated_questions_hit_after_chatter()
+    test_survives_restart()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for the adaptive (AIMD) concurrency limiter (services.concurrency)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.concurrency as concurrency
+from core.errors import APIError, OverloadedError, DeadlineExceededError
+from services.concurrency import (AdaptiveLimiter, ConcurrencyController, LimiterSettings, classify_outcome,
+                                  SUCCESS, OVERLOAD, IGNORE)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(test):
+    def wrapper():
+        clock = FakeClock()
+        original = concurrency.time
+        concurrency.time = clock
+        try:
+            test(clock)
+        finally:
+            concurrency.time = original
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+def settle(limiter: AdaptiveLimiter, outcome: str, latency: float = 0.1):
+    limiter.in_flight += 1
+    limiter.release(outcome, latency)
+
+
+@with_clock
+def test_additive_increase_up_to_ceiling(clock):
+    limiter = AdaptiveLimiter("chat", LimiterSettings(initial=4, maximum=6))
+    for _ in range(4):
+        settle(limiter, SUCCESS)
+    # +1/limit per success: about one slot per window of requests
+    assert limiter.capacity == 4 and 4.9 < limiter.limit < 5.0
+    settle(limiter, SUCCESS)
+    assert limiter.capacity == 5
+
+    for _ in range(50):
+        settle(limiter, SUCCESS)
+    assert limiter.limit == 6 and limiter.capacity == 6
+    print('✅ Healthy completions raise the limit, never past the maximum')
+
+
+@with_clock
+def test_slow_successes_do_not_increase(clock):
+    limiter = AdaptiveLimiter("chat", LimiterSettings(initial=4), latency_tolerance=2.0)
+    settle(limiter, SUCCESS, latency=0.1)
+    before = limiter.limit
+    settle(limiter, SUCCESS, latency=1.0)      # 10x the average
+    assert limiter.limit == before
+    print('✅ Successes far slower than usual do not raise the limit')
+
+
+@with_clock
+def test_multiplicative_decrease_with_cooldown_and_floor(clock):
+    limiter = AdaptiveLimiter("chat", LimiterSettings(initial=8, minimum=2), cooldown=1.0)
+    settle(limiter, OVERLOAD)
+    assert limiter.capacity == 4 and limiter.is_backing_off()
+
+    # The rest of the same failing window only counts once
+    settle(limiter, OVERLOAD)
+    assert limiter.capacity == 4 and limiter.decreases == 1
+
+    clock.now += 1.5
+    assert not limiter.is_backing_off()
+    settle(limiter, OVERLOAD)
+    clock.now += 1.5
+    settle(limiter, OVERLOAD)
+    assert limiter.capacity == 2 and limiter.limit == 2.0
+
+    settle(limiter, IGNORE)
+    assert limiter.capacity == 2 and limiter.decreases == 3
+    print('✅ Overload halves the limit once per cooldown, down to the minimum')
+
+
+def test_queue_order_and_timeout():
+    async def run():
+        controller = ConcurrencyController({"chat": LimiterSettings(initial=1, maximum=1)}, queue_timeout=5)
+        limiter = controller["chat"]
+        order = []
+        release = asyncio.Event()
+
+        async def job(name, timeout=None):
+            async with controller.slot("chat", timeout=timeout):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(job("first"))
+        await asyncio.sleep(0)
+        queued = [asyncio.create_task(job(f"queued-{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        assert limiter.get_stats()['queued'] == 2
+
+        # Past its wait deadline the caller is rejected instead of queueing forever
+        try:
+            await job("late", timeout=0.05)
+            raise AssertionError("expected OverloadedError")
+        except OverloadedError:
+            pass
+        assert limiter.rejected == 1 and limiter.get_stats()['queued'] == 2
+
+        release.set()
+        await asyncio.gather(first, *queued)
+        assert order == ["first", "queued-0", "queued-1"]
+        assert limiter.in_flight == 0 and limiter.peak_queue == 3
+
+    asyncio.run(run())
+    print('✅ Callers over the limit queue in order and time out')
+
+
+def test_cancelled_waiter_frees_its_place():
+    async def run():
+        limiter = AdaptiveLimiter("chat", LimiterSettings(initial=1, maximum=1))
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release(IGNORE, 0.0)
+        assert limiter.in_flight == 0 and limiter.get_stats()['queued'] == 0
+        await asyncio.wait_for(limiter.acquire(), 0.1)
+
+    asyncio.run(run())
+    print('✅ Cancelled waiters give up their place')
+
+
+def test_outcome_classification():
+    assert classify_outcome(None) == SUCCESS
+    assert classify_outcome(APIError("busy", 429)) == OVERLOAD
+    assert classify_outcome(APIError("bad gateway", 502)) == OVERLOAD
+    assert classify_outcome(APIError("Request timeout")) == OVERLOAD
+    assert classify_outcome(APIError("bad request", 400)) == IGNORE
+    assert classify_outcome(OverloadedError("queue full")) == IGNORE
+    assert classify_outcome(DeadlineExceededError("too late")) == IGNORE
+    assert classify_outcome(asyncio.CancelledError()) == IGNORE
+    print('✅ Only 429/5xx/timeouts count as overload')
+
+
+if __name__ == "__main__":
+    test_additive_increase_up_to_ceiling()
+    test_slow_successes_do_not_increase()
+    test_multiplicative_decrease_with_cooldown_and_floor()
+    test_queue_order_and_timeout()
+    test_cancelled_waiter_frees_its_place()
+    test_outcome_classification()
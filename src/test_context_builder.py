@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted context packing (services.context_builder)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.models import context_window, DEFAULT_CONTEXT_WINDOW
+from services.context_builder import ContextBuilder, estimate_tokens, MESSAGE_OVERHEAD
+
+
+def _history(n, size=40):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i:03d} " + "x" * size, "name": "Ana"}
+            for i in range(n)]
+
+
+def test_packs_newest_within_budget():
+    builder = ContextBuilder(max_tokens=100)
+    history = _history(50)
+    packed = builder.select("openai/gpt-5", history)
+    assert packed[-1] is history[-1]
+    assert packed == history[-len(packed):]        # contiguous, oldest dropped first
+    used = sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD for m in packed)
+    assert used <= 100 and len(packed) < 50
+    print(f'✅ Packed {len(packed)}/50 newest messages into 100 tokens')
+
+
+def test_small_context_models_get_less():
+    builder = ContextBuilder(max_tokens=4000, window_for=lambda model: 1000)
+    assert builder.budget_for("tiny/model", reply_tokens=600) == 400
+    assert context_window("anthropic/claude-sonnet-4") == 200000
+    assert context_window("unknown/model") == DEFAULT_CONTEXT_WINDOW
+    print('✅ Budget respects model context window and reply reserve')
+
+
+def test_oversized_message_is_truncated():
+    builder = ContextBuilder(max_tokens=20)
+    packed = builder.select("m", [{"role": "user", "content": "é" * 500}])
+    assert len(packed) == 1 and estimate_tokens(packed[0]['content']) <= 20
+    assert builder.get_stats()['truncated'] == 1
+    print('✅ An oversized latest message is truncated, not dropped')
+
+
+def test_render():
+    assert ContextBuilder.render([{"role": "user", "content": "hi"}]) == "hi"
+    text = ContextBuilder.render([
+        {"role": "user", "content": "hi", "name": "Ana"},
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "and now?", "name": "Ana"},
+    ])
+    assert text.splitlines() == ["Conversation so far:", "Ana: hi", "Assistant: hello", "", "Ana: and now?"]
+    print('✅ History renders as a transcript ending with the new message')
+
+
+if __name__ == "__main__":
+    test_packs_newest_within_budget()
+    test_small_context_models_get_less()
+    test_oversized_message_is_truncated()
+    test_render()
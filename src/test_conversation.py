@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for bounded per-channel conversation history (services.conversation)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.conversation import ConversationHistory, Message
+from services.scopes import CHANNEL, THREAD, USER, scope_key
+
+
+def test_ring_buffer_and_snapshots():
+    history = ConversationHistory(max_history=3)
+    for i in range(5):
+        history.add_message(1, "user", f"m{i}", "Alice")
+    snapshot = history.get_history(1)
+    assert [m['content'] for m in snapshot] == ["m2", "m3", "m4"]
+    assert history.get_history(1) is snapshot  # unchanged history is not copied again
+
+    history.add_message(1, "assistant", "reply")
+    assert [m['content'] for m in snapshot] == ["m2", "m3", "m4"]
+    assert [m['content'] for m in history.get_history(1)] == ["m3", "m4", "reply"]
+    assert history.get_total_messages() == 3 and history.message_count(1) == 3
+    print('✅ Channels keep their last messages and hand out stable snapshots')
+
+
+def test_records_read_like_dicts():
+    user = Message("user", "hi", "Alice")
+    bot = Message("assistant", "hello")
+    assert dict(user) == {"role": "user", "content": "hi", "name": "Alice"}
+    assert bot.get('name') is None and 'name' not in bot
+    assert {**bot, 'content': 'x'} == {"role": "assistant", "content": "x"}
+    assert user.size == 2 and Message("user", "é").size == 2
+    print('✅ Message records behave like the old message dicts')
+
+
+def test_global_budget_evicts_idle_channels():
+    history = ConversationHistory(max_history=10, max_total_messages=6)
+    for channel in (1, 2, 3):
+        history.add_message(channel, "user", "a")
+        history.add_message(channel, "user", "b")
+    history.add_message(1, "user", "c")   # channel 1 is now the most recent
+    assert history.get_scope_count() == 2 and not history.get_history(2)
+    assert history.get_stats()['evicted_scopes'] == 1
+
+    by_bytes = ConversationHistory(max_history=10, max_total_bytes=10)
+    by_bytes.add_message(1, "user", "12345")
+    by_bytes.add_message(2, "user", "12345")
+    by_bytes.add_message(2, "user", "1")
+    assert by_bytes.get_scope_count() == 1 and by_bytes.get_stats()['bytes'] == 6
+
+    by_bytes.clear_history(2)
+    assert by_bytes.get_stats()['bytes'] == 0 and by_bytes.get_total_messages() == 0
+    print('✅ Global message and byte limits forget the least recently active channels')
+
+
+def test_scopes_and_idle_eviction():
+    # Thread 20 inside channel 10, message from user 7
+    assert scope_key(CHANNEL, 20, 7, parent_id=10) == "10"
+    assert scope_key(THREAD, 20, 7, parent_id=10) == "20"
+    assert scope_key(USER, 20, 7, parent_id=10) == "20:7"
+    assert scope_key(CHANNEL, 10, 7) == "10"
+
+    history = ConversationHistory(max_history=5, idle_ttl=60)
+    for user in range(100_000):
+        history.add_message(scope_key(USER, 1, user), "user", "hi")
+    assert history.get_scope_count() == 100_000
+    assert [m['content'] for m in history.get_history("1:99999")] == ["hi"]
+
+    # Age everything but the newest scope past the idle limit
+    for state in history._scopes.values():
+        state.last_active -= 120
+    history.add_message("1:0", "user", "back")
+    assert history.get_scope_count() == 1 and history.get_total_messages() == 2
+    assert history.get_stats()['evicted_scopes'] == 99_999
+    print('✅ Scopes key histories per channel, thread or user and idle ones are evicted')
+
+
+if __name__ == "__main__":
+    test_ring_buffer_and_snapshots()
+    test_records_read_like_dicts()
+    test_global_budget_evicts_idle_channels()
+    test_scopes_and_idle_eviction()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for per-key serialization and burst folding (services.debounce)
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.debounce import KeyedDebouncer
+
+
+def test_bursts_fold_and_calls_never_overlap():
+    async def run():
+        calls = []
+        running = set()
+
+        async def handler(key, items):
+            assert key not in running, "calls for one key overlapped"
+            running.add(key)
+            calls.append((key, list(items)))
+            await asyncio.sleep(0.05)
+            running.discard(key)
+
+        debouncer = KeyedDebouncer(handler, window=0.02, max_wait=1.0)
+        for i in range(5):
+            debouncer.submit("a", i)
+            await asyncio.sleep(0.005)
+        debouncer.submit("b", "x")
+        await asyncio.sleep(0.04)
+        # Arrives while "a" is being handled; becomes the next batch
+        debouncer.submit("a", 5)
+        await asyncio.sleep(0.2)
+
+        assert calls == [("a", [0, 1, 2, 3, 4]), ("b", ["x"]), ("a", [5])]
+        stats = debouncer.get_stats()
+        assert stats['batches'] == 3 and stats['folded'] == 4 and stats['active'] == 0
+
+    asyncio.run(run())
+    print('✅ Bursts fold into one call and calls per key run one at a time')
+
+
+def test_max_wait_bounds_continuous_chatter():
+    async def run():
+        calls = []
+
+        async def handler(key, items):
+            calls.append(len(items))
+
+        debouncer = KeyedDebouncer(handler, window=0.05, max_wait=0.1)
+        for i in range(10):
+            debouncer.submit(1, i)
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.2)
+        # A quiet window never came, so max_wait flushed batches anyway
+        assert len(calls) >= 2 and sum(calls) == 10
+        await debouncer.close()
+
+    asyncio.run(run())
+    print('✅ Continuous chatter is still answered within max_wait')
+
+
+def test_leading_item_is_not_delayed():
+    async def run():
+        calls = []
+
+        async def handler(key, items):
+            calls.append((list(items), time.monotonic() - started))
+            await asyncio.sleep(0.05)
+
+        debouncer = KeyedDebouncer(handler, window=0.5, max_wait=1.0, leading=True)
+        started = time.monotonic()
+        debouncer.submit("a", 0)
+        await asyncio.sleep(0.01)
+        # Arrive while the first reply is running: folded and debounced
+        debouncer.submit("a", 1)
+        debouncer.submit("a", 2)
+        await asyncio.sleep(0.7)
+
+        assert [items for items, _ in calls] == [[0], [1, 2]]
+        assert calls[0][1] < 0.05 and calls[1][1] >= 0.5
+        await debouncer.close()
+
+    asyncio.run(run())
+    print('✅ A message to an idle key is handled at once; follow-ups are folded')
+
+
+if __name__ == "__main__":
+    test_bursts_fold_and_calls_never_overlap()
+    test_max_wait_bounds_continuous_chatter()
+    test_leading_item_is_not_delayed()
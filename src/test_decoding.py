@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Test script for response body decoding (services.decoding)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.decoding import DECODERS, decode_body, get_decoder
+from services.endpoints import profile_for, DEFAULT_PROFILE
+from services.scheduler import BACKGROUND
+
+
+def test_decoders_agree():
+    raw = '{"data": {"completions": {"m": {"text": "héllo"}}}, "n": [1, 2.5, null, true]}'.encode()
+    results = [decode_body(raw, decoder) for decoder in DECODERS.values()]
+    assert all(result == results[0] for result in results)
+    print(f'✅ Decoders agree ({", ".join(DECODERS)})')
+
+
+def test_non_json_falls_back_to_text():
+    for decoder in DECODERS.values():
+        assert decode_body(b"Bad Gateway", decoder) == {"response": "Bad Gateway"}
+        assert decode_body(b"", decoder) == {"response": ""}
+    print('✅ Non-JSON bodies are wrapped as text')
+
+
+def test_decoder_selection():
+    assert get_decoder("json")[0] == "json"
+    assert get_decoder("auto")[0] in DECODERS
+    assert get_decoder("no-such-decoder")[0] == get_decoder("auto")[0]
+    print('✅ Decoder selection falls back to the fastest installed')
+
+
+def test_endpoint_profiles():
+    assert profile_for("/v1/prompt/completion").retries == 2
+    assert profile_for("/generations/abc123").priority == BACKGROUND
+    assert profile_for("v1/models").cache
+    assert profile_for("/v2/unknown") is DEFAULT_PROFILE
+    print('✅ Endpoint profiles resolve per route')
+
+
+if __name__ == "__main__":
+    test_decoders_agree()
+    test_non_json_falls_back_to_text()
+    test_decoder_selection()
+    test_endpoint_profiles()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for chat latency tracking and the hedging budget (services.hedging)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.hedging import HedgeBudget, HedgePolicy, LatencyTracker
+
+
+def test_percentiles_need_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(1.0)
+    assert tracker.percentile(0.95) is None
+
+    for i in range(91):
+        tracker.record(1.0 + i / 10)
+    assert tracker.percentile(0.5) < tracker.percentile(0.95) <= 10.0
+    print('✅ Percentiles appear once the window is calibrated')
+
+
+def test_budget_caps_hedge_rate():
+    budget = HedgeBudget(ratio=0.1, burst=2)
+    allowed = 0
+    for _ in range(100):
+        budget.on_request()
+        if budget.try_spend():
+            allowed += 1
+    assert 9 <= allowed <= 10, allowed   # ~10% of requests, modulo float rounding
+
+    disabled = HedgeBudget(ratio=0.0)
+    disabled.on_request()
+    assert not disabled.enabled and not disabled.try_spend()
+    print('✅ Hedges are capped at the configured ratio')
+
+
+def test_hedge_delay():
+    policy = HedgePolicy(ratio=0.1, min_delay=1.0, tracker=LatencyTracker(min_samples=5))
+    assert policy.delay() is None   # not calibrated yet
+    for _ in range(5):
+        policy.latency.record(0.2)
+    assert policy.delay() == 1.0    # never hedge sooner than min_delay
+    for _ in range(50):
+        policy.latency.record(4.0)
+    assert policy.delay() == 4.0
+    assert HedgePolicy(ratio=0.0).delay() is None
+    print('✅ Hedge delay follows observed p95')
+
+
+if __name__ == "__main__":
+    test_percentiles_need_samples()
+    test_budget_caps_hedge_rate()
+    test_hedge_delay()
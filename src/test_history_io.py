@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming history export/import (services.history_io)
+"""
+
+import os
+import sys
+import gzip
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.conversation import ConversationHistory
+from services.history_io import (
+    batched, detect_format, import_into_database, read_records, records_from_database, records_from_history, write_records
+)
+from services.history_store import open_database
+
+
+def seed_database(path):
+    db = open_database(path)
+    rows = [("b", "user", "hi", "Bob", 0), ("a", "user", "hello", "Alice", 0),
+            ("a", "assistant", "hey there", None, 0), ("a", "system", "Summary of earlier", None, 1)]
+    db.executemany("INSERT INTO messages (scope, role, content, name, summary, created) VALUES (?, ?, ?, ?, ?, 0)", rows)
+    db.commit()
+    db.close()
+
+
+def test_database_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "source.db"), os.path.join(tmp, "target.db")
+        dump = os.path.join(tmp, "backup.jsonl.gz")
+        seed_database(source)
+
+        assert write_records(records_from_database(source), dump) == (2, 4)
+        assert gzip.open(dump).readline().startswith(b'{"format":"straico-history"')
+        records = list(read_records(dump))
+        assert [r['scope'] for r in records] == ["a", "b"]
+        assert records[0]['summary'] == "Summary of earlier"
+        assert records[0]['messages'] == [{"role": "user", "content": "hello", "name": "Alice"},
+                                          {"role": "assistant", "content": "hey there"}]
+
+        # Replacing scopes makes a repeated import harmless
+        for _ in range(2):
+            assert import_into_database(read_records(dump), target, batch_size=2) == (2, 4)
+        assert list(records_from_database(target)) == records
+    print('✅ Databases round-trip through a compressed JSONL dump')
+
+
+def test_invalid_dumps_are_rejected():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "bad.jsonl")
+        Path(dump).write_text('{"format":"straico-history","version":1}\n'
+                              '{"scope":"a","summary":null,"messages":[]}\n'
+                              '{"scope":"b","messages":[{"role":"robot","content":"x"}]}\n')
+        records = read_records(dump)
+        assert next(records)['scope'] == "a"
+        try:
+            next(records)
+            assert False, "invalid role accepted"
+        except ValueError as e:
+            assert "Record 2" in str(e)
+
+        Path(dump).write_text('{"hello": "world"}\n')
+        try:
+            list(read_records(dump))
+            assert False, "foreign file accepted"
+        except ValueError as e:
+            assert "Not a history dump" in str(e)
+
+    assert detect_format("x.jsonl.gz") == ("jsonl", True)
+    assert detect_format("x.jsonl") == ("jsonl", False)
+    print('✅ Malformed or foreign dumps are rejected with the record position')
+
+
+def test_memory_history_round_trip():
+    history = ConversationHistory(max_history=5)
+    history.add_message("1", "user", "one", "Alice")
+    history.add_message("1", "assistant", "two")
+    history.replace_prefix("1", history.get_history("1")[:1], {"role": "system", "content": "S", "summary": True})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "memory.jsonl")
+        write_records(records_from_history(history), dump)
+        restored = ConversationHistory(max_history=5)
+        for record in read_records(dump):
+            restored.restore(record['scope'], record['summary'], record['messages'])
+    assert [dict(m) for m in restored.get_history("1")] == [dict(m) for m in history.get_history("1")]
+    assert restored.get_total_messages() == 2
+    print('✅ In-memory history exports and restores without a database')
+
+
+def test_records_are_batched_lazily():
+    pulled = []
+
+    def records():
+        for i in range(7):
+            pulled.append(i)
+            yield {"scope": str(i), "summary": None, "messages": []}
+
+    batches = batched(records(), 3)
+    assert [r["scope"] for r in next(batches)] == ["0", "1", "2"]
+    assert pulled == [0, 1, 2]                  # nothing read past the first batch
+    assert [len(b) for b in batches] == [3, 1]
+    print('✅ Records are grouped into batches without reading ahead')
+
+
+if __name__ == "__main__":
+    test_database_round_trip()
+    test_invalid_dumps_are_rejected()
+    test_memory_history_round_trip()
+    test_records_are_batched_lazily()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent conversation store (services.history_store)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.conversation import ConversationHistory
+from services.history_store import HistoryStore
+
+
+def contents(history, channel_id):
+    return [m['content'] for m in history.get_history(channel_id)]
+
+
+def test_history_survives_restart():
+    async def run(path):
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        history = ConversationHistory(max_history=3, store=store)
+        for i in range(4):
+            history.add_message(1, "user", f"m{i}", "Alice")
+        history.add_message(2, "user", "forget me")
+        history.clear_history(2)
+        # Nothing reaches disk until a flush, and nothing blocks before it
+        assert store.get_stats()['written'] == 0
+        await store.close()
+
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        history = ConversationHistory(max_history=3, store=store)
+        # Startup reads nothing; the first use of a channel does
+        assert history.get_scope_count() == 0
+        await history.ensure_loaded(1)
+        await history.ensure_loaded(2)
+        assert contents(history, 1) == ["m1", "m2", "m3"]
+        assert history.get_history(1)[0]['name'] == "Alice"
+        assert contents(history, 2) == []
+        assert store.get_stats()['loads'] == 2
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "history.db")))
+    print('✅ Buffered history is written on close and lazily loaded after restart')
+
+
+def test_loads_keep_concurrent_messages_and_summaries():
+    async def run(path):
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        history = ConversationHistory(max_history=10, store=store)
+        for i in range(4):
+            history.add_message(1, "user", f"m{i}")
+        snapshot = history.get_history(1)
+        history.replace_prefix(1, snapshot[:2], {"role": "system", "content": "Summary", "summary": True})
+        await store.close()
+
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        history = ConversationHistory(max_history=10, store=store)
+        # A message written before the load finishes is kept, not duplicated
+        history.add_message(1, "user", "early")
+        loading = asyncio.ensure_future(history.ensure_loaded(1))
+        await asyncio.sleep(0)
+        history.add_message(1, "user", "during")
+        await loading
+        assert contents(history, 1) == ["Summary", "m2", "m3", "early", "during"]
+        assert history.get_history(1)[0]['summary']
+        assert history.get_total_messages() == 5
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "history.db")))
+    print('✅ Summaries persist and loads merge messages that arrive meanwhile')
+
+
+def test_flush_during_load_does_not_duplicate():
+    async def run(path):
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        history = ConversationHistory(max_history=10, store=store)
+        history.add_message(1, "user", "before")
+
+        # Hold the writer thread so the load is queued behind other work
+        gate = threading.Event()
+        blocked = asyncio.ensure_future(store._run(gate.wait))
+        loading = asyncio.ensure_future(history.ensure_loaded(1))
+        await asyncio.sleep(0)
+        history.add_message(1, "user", "during")
+        # A periodic flush fires after the load started but before its read ran
+        flushing = asyncio.ensure_future(store.flush())
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(blocked, loading, flushing)
+
+        assert contents(history, 1) == ["before", "during"]
+        await store.close()
+
+        store = HistoryStore(path, flush_interval=60)
+        await store.start()
+        assert [r[1] for r in (await store.load("1", 10))[1]] == ["before", "during"]
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "history.db")))
+    print('✅ A flush racing a load neither duplicates nor drops messages')
+
+
+def test_retention_prunes_in_background():
+    async def run(path):
+        store = HistoryStore(path, flush_interval=60, retention=3600, keep_per_scope=2)
+        await store.start()
+        store._pending.append((0, "1", "user", "ancient", None, time.time() - 7200))
+        for i in range(3):
+            store.append("1", "user", f"m{i}")
+        store.append("2", "user", "other")
+        await store.flush()
+        assert await store.prune() == 2
+        summary, rows = await store.load("1", 10)
+        assert summary is None and [r[1] for r in rows] == ["m1", "m2"]
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "history.db")))
+    print('✅ Retention drops expired messages and keeps the newest per scope')
+
+
+if __name__ == "__main__":
+    test_history_survives_restart()
+    test_loads_keep_concurrent_messages_and_summaries()
+    test_flush_during_load_does_not_duplicate()
+    test_retention_prunes_in_background()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for hot reloading plugins and configuration (core.reloader)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.bot import StraicoBot
+from core.config import Config
+from core.errors import PluginError
+from core.reloader import HotReloader
+from services.conversation import ConversationHistory
+
+
+class FakeBot:
+    def __init__(self, plugins_path):
+        self.plugins_path = plugins_path
+        self.calls = []
+        self.broken = set()
+
+    async def load_plugin(self, name):
+        self.calls.append(('load', name))
+
+    async def reload_plugin(self, name):
+        if name in self.broken:
+            raise PluginError(f"Failed to reload plugin {name}, keeping the running version: SyntaxError")
+        self.calls.append(('reload', name))
+
+    async def unload_plugin_module(self, name):
+        self.calls.append(('unload', name))
+
+    def reload_config(self, env_file):
+        self.calls.append(('config', os.path.basename(env_file)))
+        return ['default_chat_model']
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    # Make the edit visible even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_changes_are_detected_and_dispatched():
+    async def run(root):
+        plugins = root / "plugins"
+        write(plugins / "base.py", "")
+        write(plugins / "chat" / "__init__.py", "")
+        write(plugins / "chat" / "commands.py", "v = 1")
+        write(plugins / "image" / "__init__.py", "")
+        env = root / ".env"
+        write(env, "DEFAULT_CHAT_MODEL=a")
+
+        bot = FakeBot(plugins)
+        reloader = HotReloader(bot, interval=60, env_path=str(env))
+        await reloader.start()
+        await reloader.check()
+        assert bot.calls == [], "nothing changed yet"
+
+        write(plugins / "chat" / "commands.py", "v = 2")
+        write(plugins / "video" / "__init__.py", "")
+        write(plugins / "base.py", "# needs a restart")
+        (plugins / "image" / "__init__.py").unlink()
+        write(env, "DEFAULT_CHAT_MODEL=b")
+        await reloader.check()
+        assert bot.calls == [('reload', 'chat'), ('load', 'video'), ('unload', 'image'), ('config', '.env')]
+
+        # A broken edit is reported once, not retried every poll
+        bot.calls.clear()
+        bot.broken.add('chat')
+        write(plugins / "chat" / "commands.py", "v = (")
+        await reloader.check()
+        await reloader.check()
+        assert bot.calls == [] and reloader.get_stats()['failures'] == 1
+        bot.broken.clear()
+        write(plugins / "chat" / "commands.py", "v = 3")
+        await reloader.check()
+        assert bot.calls == [('reload', 'chat')]
+        assert reloader.get_stats()['plugin_reloads'] == 3
+        await reloader.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp)))
+    print('✅ Edited, added and removed plugins and env changes are dispatched once')
+
+
+def test_history_limit_changes_in_place():
+    history = ConversationHistory(max_history=4)
+    for i in range(6):
+        history.add_message(1, "user", f"m{i}")
+    history.set_max_history(6)
+    history.add_message(1, "user", "m6")
+    assert [m['content'] for m in history.get_history(1)] == ["m2", "m3", "m4", "m5", "m6"]
+
+    history.set_max_history(2)
+    assert [m['content'] for m in history.get_history(1)] == ["m5", "m6"]
+    assert history.get_total_messages() == 2
+    history.add_message(1, "user", "m7")
+    assert [m['content'] for m in history.get_history(1)] == ["m6", "m7"]
+    print('✅ History limits grow and shrink without reordering messages')
+
+
+def test_config_reload_keeps_runtime_toggles():
+    def config(**overrides):
+        return Config(discord_token="token", straico_api_key="key", history_db_path=None,
+                      preferences_db_path=None, completion_cache_path=None, model_catalog_path=None,
+                      **overrides)
+
+    async def run():
+        bot = StraicoBot(config(completion_cache_channels={1, 2}))
+        bot.preferences.set_completion_cache(2, False)    # !cache off
+        bot.preferences.set_completion_cache(5, True)     # !cache on
+        try:
+            # An unrelated .env edit alongside a new default channel list
+            applied = bot.apply_config(config(completion_cache_channels={1, 3}, max_message_length=1500))
+            assert set(applied) == {'completion_cache_channels', 'max_message_length'}
+            assert bot.config.max_message_length == 1500
+            assert bot.completion_cache_channels() == {1, 3, 5}
+            assert await bot.completion_cache_enabled(5) and not await bot.completion_cache_enabled(2)
+        finally:
+            await bot.close()
+
+    asyncio.run(run())
+    print('✅ Reloading the configuration keeps channels toggled with !cache')
+
+
+if __name__ == "__main__":
+    test_changes_are_detected_and_dispatched()
+    test_history_limit_changes_in_place()
+    test_config_reload_keeps_runtime_toggles()
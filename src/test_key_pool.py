@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the Straico API key pool (services.key_pool)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.errors import OverloadedError
+from services.key_pool import KeyPool, COOLING, EXHAUSTED
+
+
+def test_least_loaded_first():
+    pool = KeyPool(["key-aaaaaaaa", "key-bbbbbbbb", "key-aaaaaaaa"])
+    assert len(pool) == 2   # duplicates collapse
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    pool.release(first, 200)
+    assert pool.acquire() is first
+    print('✅ Keys are picked least-loaded first')
+
+
+def test_prefers_keys_with_credits():
+    pool = KeyPool(["key-aaaaaaaa", "key-bbbbbbbb"])
+    a, b = pool.keys
+    pool.update_credits(a, 10)
+    pool.update_credits(b, 500)
+    assert pool.acquire() is b
+    pool.charge(b, 500)
+    assert b.state(0) == EXHAUSTED
+    assert pool.acquire() is a
+    print('✅ Keys with more credits win ties; exhausted keys drop out')
+
+
+def test_repeated_failures_take_key_out_of_rotation():
+    pool = KeyPool(["key-aaaaaaaa", "key-bbbbbbbb"], failure_threshold=2, cooldown=60)
+    a, b = pool.keys
+    for _ in range(2):
+        pool.release(pool.acquire(pinned=a.value), 429)
+    assert pool.get_stats()[0]['state'] == COOLING
+    for _ in range(3):
+        key = pool.acquire()
+        assert key is b
+        pool.release(key, 200)
+    assert pool.has_alternative([]) and not pool.has_alternative([b])
+
+    for _ in range(2):
+        pool.release(pool.acquire(pinned=b.value), 401)
+    try:
+        pool.acquire()
+        assert False, "expected OverloadedError"
+    except OverloadedError:
+        pass
+    print('✅ Keys leave rotation after repeated 401/429s')
+
+
+if __name__ == "__main__":
+    test_least_loaded_first()
+    test_prefers_keys_with_credits()
+    test_repeated_failures_take_key_out_of_rotation()
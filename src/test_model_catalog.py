@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the live model catalog (services.model_catalog)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.errors import ValidationError
+from services.model_catalog import CHAT, IMAGE, VIDEO, ModelCatalog, ModelIndex
+from utils.formatters import EMBED_MAX_FIELD_VALUE, EMBED_MAX_FIELDS, EMBED_MAX_TOTAL, format_model_embeds
+from utils.validators import validate_image_model, validate_model
+
+PAYLOAD = {
+    "data": {
+        "chat": [{"name": "GPT-5", "model": "openai/gpt-5"},
+                 {"name": "Claude Sonnet 4", "model": "anthropic/claude-sonnet-4"},
+                 {"name": "Kling", "model": "kling-v2"}],
+        "image": [{"name": "DALL·E 3", "model": "openai/dall-e-3"}],
+    },
+    "success": True,
+}
+
+
+def test_index_buckets_and_suggestions():
+    index = ModelIndex.from_payload(PAYLOAD)
+    assert index.models(CHAT) == ("openai/gpt-5", "anthropic/claude-sonnet-4")
+    assert index.models(IMAGE) == ("openai/dall-e-3",)
+    assert index.models(VIDEO) == ("kling-v2",)
+    assert index.resolve("OpenAI/GPT-5") == "openai/gpt-5"
+    assert index.resolve("gpt-5") is None
+
+    assert index.suggest("gpt5")[0] == "openai/gpt-5"
+    assert index.suggest("claude sonet")[0] == "anthropic/claude-sonnet-4"
+    assert index.suggest("sonnet", category=IMAGE) == []
+    assert index.suggest("zzzz") == []
+    print('✅ Category buckets and trigram suggestions are precomputed')
+
+
+def test_validators_use_the_catalog():
+    index = ModelIndex.from_payload(PAYLOAD)
+    assert validate_model("ANTHROPIC/claude-sonnet-4", index) == "anthropic/claude-sonnet-4"
+    try:
+        validate_model("gpt5", index)
+        assert False, "unknown model accepted"
+    except ValidationError as e:
+        assert "Did you mean: openai/gpt-5" in str(e)
+    try:
+        validate_image_model("openai/gpt-5", index)
+        assert False, "chat model accepted as an image model"
+    except ValidationError:
+        pass
+    # Without a catalog the built-in lists are used
+    assert validate_model("openai/gpt-4o-mini") == "openai/gpt-4o-mini"
+    print('✅ Validators resolve and suggest through the catalog')
+
+
+def test_catalog_caches_and_survives_api_outage():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError("API down")
+        return PAYLOAD
+
+    async def run(path):
+        # Nothing cached yet: serve the built-in list and fetch in the background
+        catalog = ModelCatalog(fetch, path=path, refresh_interval=0)
+        await catalog.start()
+        assert catalog.source == "builtin" and not calls
+        await catalog._task
+        assert catalog.source == "api" and len(catalog) == 4
+        await catalog.close()
+
+        # Next boot serves the cached copy; a failed refresh keeps it
+        catalog = ModelCatalog(fetch, path=path, refresh_interval=0)
+        await catalog.start()
+        assert catalog.source == "disk" and "openai/dall-e-3" in catalog
+        assert not await catalog.refresh()
+        assert catalog.source == "disk" and catalog.get_stats()['failures'] == 1
+        await catalog.close()
+
+        # No cache and no API: the built-in lists, even when waiting was opted in to
+        catalog = ModelCatalog(fetch, path=None, refresh_interval=0, startup_timeout=0.5)
+        await catalog.start()
+        assert catalog.source == "builtin" and "openai/dall-e-3" in catalog
+        await catalog.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "models.json")))
+    print('✅ The model list is cached on disk and kept through API failures')
+
+
+def test_startup_does_not_wait_for_the_api():
+    release = asyncio.Event()
+
+    async def slow_fetch():
+        await release.wait()
+        return PAYLOAD
+
+    async def run():
+        catalog = ModelCatalog(slow_fetch, path=None, refresh_interval=3600)
+        await asyncio.wait_for(catalog.start(), 0.1)
+        assert catalog.source == "builtin" and "openai/gpt-5" in catalog
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert catalog.source == "api" and catalog.refreshes == 1
+        await catalog.close()
+
+    asyncio.run(run())
+    print('✅ Startup serves the built-in list while the first fetch runs')
+
+
+def test_model_list_fits_discord_limits():
+    sections = [(f"{kind} Models", [f"provider-{kind.lower()}/model-with-a-long-name-{i:03d}" for i in range(count)])
+                for kind, count in (("Chat", 400), ("Image", 60), ("Video", 3), ("Audio", 0))]
+    embeds = format_model_embeds(sections, title="Available Straico Models", footer="Total: 463 models available")
+
+    assert len(embeds) > 1
+    for embed in embeds:
+        assert len(embed.fields) <= EMBED_MAX_FIELDS and len(embed) <= EMBED_MAX_TOTAL
+        assert all(len(field.value) <= EMBED_MAX_FIELD_VALUE for field in embed.fields)
+    listed = [line for embed in embeds for field in embed.fields for line in field.value.split("\n")]
+    assert listed == [model for _, models in sections for model in models]
+    names = [field.name for embed in embeds for field in embed.fields]
+    assert "Image Models (cont. 2)" in names and "Audio Models" not in names
+    assert embeds[-1].footer.text == "Total: 463 models available" and embeds[0].footer.text is None
+    print('✅ Every model category is chunked and split across embeds within Discord limits')
+
+
+if __name__ == "__main__":
+    test_index_buckets_and_suggestions()
+    test_validators_use_the_catalog()
+    test_catalog_caches_and_survives_api_outage()
+    test_startup_does_not_wait_for_the_api()
+    test_model_list_fits_discord_limits()
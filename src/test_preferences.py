@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent preferences store (services.preferences)
+"""
+
+import os
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.preferences import PreferenceStore
+
+
+def test_preferences_survive_restart():
+    async def run(path):
+        store = PreferenceStore(path, flush_interval=60)
+        await store.start()
+        store.set_user_model(1, "openai/gpt-4o")
+        store.set_user_model(1, "anthropic/claude-sonnet-4")
+        store.set_auto_response(10, True)
+        store.set_auto_response(11, True)
+        store.set_auto_response(11, False)
+        # Changes are visible at once but coalesced until a flush
+        assert await store.user_model(1, "default") == "anthropic/claude-sonnet-4"
+        assert store.get_stats()['pending'] == 3 and store.get_stats()['written'] == 0
+        await store.close()
+
+        store = PreferenceStore(path, flush_interval=60, page_size=1)
+        await store.start()
+        while not store.get_stats()['warm']:
+            await asyncio.sleep(0.01)
+        assert await store.user_model(1, "default") == "anthropic/claude-sonnet-4"
+        assert await store.user_model(2, "default") == "default"
+        assert await store.auto_response(10)
+        assert not await store.auto_response(11)
+        assert store.get_stats()['loaded'] == 2
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "preferences.db")))
+    print('✅ Preferences are written behind and warm-loaded after restart')
+
+
+def test_lookups_before_warm_load_finishes():
+    async def run(path):
+        store = PreferenceStore(path, flush_interval=60)
+        await store.start()
+        for channel_id in range(100):
+            store.set_auto_response(channel_id, True)
+        await store.close()
+
+        store = PreferenceStore(path, flush_interval=60, page_size=10)
+        await store.start()
+        # Changed before the warm load reaches them: the new values must stick
+        store.set_auto_response(99, False)
+        assert await store.auto_response(98)
+        while not store.get_stats()['warm']:
+            await asyncio.sleep(0.01)
+        assert not await store.auto_response(99)
+        assert await store.auto_response(98)
+        assert store.get_stats()['entries'] == 99
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "preferences.db")))
+    print('✅ Lookups read through during the warm load and newer changes win')
+
+
+def test_completion_cache_toggles_override_defaults():
+    async def run(path):
+        store = PreferenceStore(path, flush_interval=60)
+        await store.start()
+        store.set_completion_cache(20, True)
+        store.set_completion_cache(21, False)      # opted in by COMPLETION_CACHE_CHANNELS, turned off
+        await store.close()
+
+        store = PreferenceStore(path, flush_interval=60)
+        await store.start()
+        assert await store.completion_cache(20, default=False)
+        assert not await store.completion_cache(21, default=True)
+        assert await store.completion_cache(22, default=True)
+        while not store.get_stats()['warm']:
+            await asyncio.sleep(0.01)
+        assert store.subjects("completion_cache", "1") == [20]
+        assert store.subjects("completion_cache", "0") == [21]
+        await store.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "preferences.db")))
+    print('✅ Reply cache toggles persist and override the configured channels')
+
+
+def test_memory_only():
+    async def run():
+        store = PreferenceStore()
+        await store.start()
+        store.set_user_model(1, "openai/gpt-4o")
+        assert await store.user_model(1, "default") == "openai/gpt-4o"
+        assert store.get_stats()['pending'] == 0
+        await store.close()
+
+    asyncio.run(run())
+    print('✅ Without a path preferences stay in memory')
+
+
+if __name__ == "__main__":
+    test_preferences_survive_restart()
+    test_lookups_before_warm_load_finishes()
+    test_completion_cache_toggles_override_defaults()
+    test_memory_only()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the hierarchical token-bucket rate limiter (services.rate_limit)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.rate_limit as rate_limit
+from services.rate_limit import RateLimiter, BucketTier, USER, CHANNEL, GUILD, GLOBAL
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(test):
+    def wrapper():
+        clock = FakeClock()
+        original = rate_limit.time
+        rate_limit.time = clock
+        try:
+            test(clock)
+        finally:
+            rate_limit.time = original
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+@with_clock
+def test_user_budget_and_retry_after(clock):
+    limiter = RateLimiter({USER: (3, 60)})
+    for _ in range(3):
+        assert limiter.check(user_id=1, channel_id=10) == (0.0, None)
+
+    retry_after, tier = limiter.check(user_id=1, channel_id=10)
+    assert tier == USER
+    assert abs(retry_after - 20.0) < 1e-6   # one token refills every 20s
+
+    # Other users are unaffected
+    assert limiter.check(user_id=2, channel_id=10) == (0.0, None)
+
+    clock.now += 20
+    assert limiter.check(user_id=1, channel_id=10) == (0.0, None)
+    print('✅ Per-user bucket limits and refills')
+
+
+@with_clock
+def test_rejection_does_not_charge_other_tiers(clock):
+    limiter = RateLimiter({USER: (1, 60), CHANNEL: (2, 60)})
+    assert limiter.check(user_id=1, channel_id=10)[1] is None
+    assert limiter.check(user_id=1, channel_id=10)[1] == USER   # rejected by user tier
+    assert limiter.check(user_id=2, channel_id=10)[1] is None   # channel still has a token
+    assert limiter.check(user_id=3, channel_id=10)[1] == CHANNEL
+    print('✅ Rejected requests are not charged')
+
+
+@with_clock
+def test_weighted_costs_and_optional_guild(clock):
+    limiter = RateLimiter({USER: (10, 60), GUILD: (8, 60), GLOBAL: (100, 60)})
+    assert limiter.check(user_id=1, channel_id=10, guild_id=None, cost=8)[1] is None  # DMs skip guild tier
+    assert limiter.check(user_id=2, channel_id=11, guild_id=5, cost=8)[1] is None
+    retry_after, tier = limiter.check(user_id=3, channel_id=11, guild_id=5, cost=4)
+    assert tier == GUILD and retry_after > 0
+    print('✅ Costs are weighted and guild tier skipped in DMs')
+
+
+@with_clock
+def test_idle_buckets_expire(clock):
+    tier = BucketTier(USER, capacity=5, period=10)
+    for user in range(100):
+        tier.consume(user, 1, clock.now)
+    assert len(tier) == 100
+
+    clock.now += 10
+    for _ in range(25):
+        tier.sweep(clock.now)
+    assert len(tier) == 0
+    print('✅ Idle buckets are dropped lazily')
+
+
+def test_folded_auto_responses_are_charged_once():
+    import asyncio
+    from contextlib import asynccontextmanager
+    from types import SimpleNamespace
+    from core.bot import StraicoBot
+    from core.config import Config
+
+    class Channel:
+        id = 10
+
+        @asynccontextmanager
+        async def typing(self):
+            yield
+
+    async def run():
+        bot = StraicoBot(Config(discord_token="token", straico_api_key="key", history_db_path=None,
+                                preferences_db_path=None, completion_cache_path=None, model_catalog_path=None,
+                                rate_limit_user=(2, 60)))
+        replies = []
+
+        async def generate(message, scope):
+            replies.append(message.content)
+
+        bot._generate_auto_response = generate
+        channel = Channel()
+        burst = [SimpleNamespace(content=f"m{i}", author=SimpleNamespace(id=1), channel=channel, guild=None)
+                 for i in range(5)]
+        try:
+            await bot._auto_respond("scope", burst)
+            await bot._auto_respond("scope", burst[:1])
+            assert replies == ["m4", "m0"]
+            # Two replies used the user's two requests; five messages did not
+            retry_after, scope = bot.rate_limiter.check(1, 10, None)
+            assert retry_after > 0 and scope == USER
+        finally:
+            await bot.close()
+
+    asyncio.run(run())
+    print('✅ A folded burst of auto-response messages costs one request')
+
+
+if __name__ == "__main__":
+    test_user_budget_and_retry_after()
+    test_rejection_does_not_charge_other_tiers()
+    test_weighted_costs_and_optional_guild()
+    test_idle_buckets_expire()
+    test_folded_auto_responses_are_charged_once()
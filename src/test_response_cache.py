@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the TTL/LRU response cache (services.cache)
+"""
+
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import services.cache as cache_module
+from services.cache import ResponseCache, CachePolicy, FRESH, STALE
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(test):
+    def wrapper():
+        clock = FakeClock()
+        original = cache_module.time
+        cache_module.time = clock
+        try:
+            test(clock)
+        finally:
+            cache_module.time = original
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+@with_clock
+def test_lru_eviction_order(clock):
+    cache = ResponseCache(max_entries=2, policies={})
+    cache.set("a", 1, "/a")
+    cache.set("b", 2, "/b")
+    assert cache.get("a") == (1, FRESH)      # "a" is now the most recently used
+    cache.set("c", 3, "/c")
+
+    assert cache.get("b") == (None, None)
+    assert cache.get("a") == (1, FRESH) and cache.get("c") == (3, FRESH)
+    assert cache.get_stats()['evictions'] == 1
+    print('✅ Least recently used entry is evicted first')
+
+
+@with_clock
+def test_byte_bound(clock):
+    cache = ResponseCache(max_entries=10, max_bytes=100, policies={})
+    cache.set("a", "x", "/a", size=40)
+    cache.set("b", "y", "/b", size=40)
+    cache.set("c", "z", "/c", size=40)
+    assert len(cache) == 2 and cache.total_bytes == 80
+    assert cache.get("a") == (None, None)
+
+    cache.set("huge", "w", "/huge", size=101)     # never cached, nothing evicted for it
+    assert cache.get("huge") == (None, None) and len(cache) == 2
+
+    cache.set("b", "y2", "/b", size=10)           # replacing an entry frees its old size
+    assert cache.total_bytes == 50
+    print('✅ Total size stays within max_bytes')
+
+
+@with_clock
+def test_ttl_and_stale_while_revalidate(clock):
+    cache = ResponseCache(policies={"/v1/user": CachePolicy(ttl=60, stale_while_revalidate=600)})
+    cache.set("user", {"coins": 5}, "/v1/user")
+
+    clock.now += 59
+    assert cache.get("user") == ({"coins": 5}, FRESH)
+    clock.now += 2
+    assert cache.get("user") == ({"coins": 5}, STALE)
+
+    # A refresh stores a new value and restarts the TTL
+    cache.set("user", {"coins": 4}, "/v1/user")
+    assert cache.get("user") == ({"coins": 4}, FRESH)
+
+    clock.now += 661
+    assert cache.get("user") == (None, None)
+    assert len(cache) == 0
+    stats = cache.get_stats()
+    assert stats['hits'] == 2 and stats['stale_hits'] == 1 and stats['expirations'] == 1
+    print('✅ Entries go stale after their TTL and expire after the revalidate window')
+
+
+@with_clock
+def test_policies(clock):
+    cache = ResponseCache(default_policy=CachePolicy(ttl=300),
+                          policies={"/generations/": CachePolicy(ttl=5), "/nocache": CachePolicy(ttl=0)})
+    assert cache.policy_for("/generations/abc").ttl == 5
+    assert cache.policy_for("/v1/models").ttl == 300
+    cache.set("n", 1, "/nocache")
+    assert len(cache) == 0
+    print('✅ Per-endpoint and prefix policies apply')
+
+
+@with_clock
+def test_invalidate(clock):
+    cache = ResponseCache(policies={})
+    cache.set("u1", 1, "/v1/user")
+    cache.set("u2", 2, "/v1/user")
+    cache.set("g1", 3, "/generations/1")
+    cache.set("g2", 4, "/generations/2")
+    cache.set("m", 5, "/v1/models")
+
+    assert cache.invalidate(key="u1") == 1
+    assert cache.invalidate(key="missing") == 0
+    assert cache.invalidate(endpoint="/v1/user") == 1
+    assert cache.invalidate(endpoint="/generations") == 2
+    assert cache.get("m") == (5, FRESH)
+    assert cache.invalidate() == 1
+    assert len(cache) == 0 and cache.total_bytes == 0
+    assert cache.get_stats()['invalidations'] == 5
+    print('✅ Invalidation by key, endpoint, prefix and everything')
+
+
+if __name__ == "__main__":
+    test_lru_eviction_order()
+    test_byte_bound()
+    test_ttl_and_stale_while_revalidate()
+    test_policies()
+    test_invalidate()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the priority scheduler (services.scheduler)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.errors import OverloadedError
+from services.scheduler import PriorityScheduler, INTERACTIVE, AUTO_RESPONSE, BACKGROUND
+
+
+async def _run_queued(scheduler, requests):
+    """Occupy the only slot, queue ``requests`` and return the order they are admitted in."""
+    order = []
+    await scheduler.acquire(BACKGROUND)
+
+    async def worker(label, priority, guild):
+        await scheduler.acquire(priority, guild)
+        order.append(label)
+        scheduler.release()
+
+    tasks = [asyncio.create_task(worker(*request)) for request in requests]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_strict_priority():
+    async def run():
+        scheduler = PriorityScheduler(capacity=1)
+        order = await _run_queued(scheduler, [
+            ("bg", BACKGROUND, 1),
+            ("auto", AUTO_RESPONSE, 1),
+            ("chat", INTERACTIVE, 1),
+        ])
+        assert order == ["chat", "auto", "bg"], order
+    asyncio.run(run())
+    print('✅ Higher priority classes are served first')
+
+
+def test_guilds_share_fairly():
+    async def run():
+        scheduler = PriorityScheduler(capacity=1)
+        burst = [(f"a{i}", INTERACTIVE, "A") for i in range(3)]
+        order = await _run_queued(scheduler, burst + [("b0", INTERACTIVE, "B"), ("b1", INTERACTIVE, "B")])
+        assert order[:4] == ["a0", "b0", "a1", "b1"], order
+    asyncio.run(run())
+    print('✅ A bursting guild interleaves with other guilds')
+
+
+def test_queue_timeout():
+    async def run():
+        scheduler = PriorityScheduler(capacity=1)
+        await scheduler.acquire(INTERACTIVE)
+        try:
+            await scheduler.acquire(BACKGROUND, timeout=0.01)
+            assert False, "expected OverloadedError"
+        except OverloadedError:
+            pass
+        stats = scheduler.get_stats()
+        assert stats['rejected'] == 1 and stats['queued'] == 0
+        scheduler.release()
+        assert scheduler.in_flight == 0
+    asyncio.run(run())
+    print('✅ Queue waits time out with OverloadedError')
+
+
+def test_timed_out_requests_do_not_push_back_their_guild():
+    async def run():
+        scheduler = PriorityScheduler(capacity=1)
+        await scheduler.acquire(BACKGROUND)
+        # A large request from guild A gives up in the queue...
+        try:
+            await scheduler.acquire(INTERACTIVE, "A", cost=10, timeout=0.01)
+            assert False, "expected OverloadedError"
+        except OverloadedError:
+            pass
+
+        # ...so A's next request competes as if it had never been queued
+        order = []
+
+        async def worker(label, guild):
+            await scheduler.acquire(INTERACTIVE, guild)
+            order.append(label)
+            scheduler.release()
+
+        tasks = [asyncio.create_task(worker(label, guild)) for label, guild in [("b0", "B"), ("b1", "B"), ("a0", "A")]]
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        assert order == ["b0", "a0", "b1"], order
+        assert scheduler.get_stats()['queued'] == 0
+    asyncio.run(run())
+    print('✅ Requests that time out in the queue are not charged to their guild')
+
+
+if __name__ == "__main__":
+    test_strict_priority()
+    test_guilds_share_fairly()
+    test_queue_timeout()
+    test_timed_out_requests_do_not_push_back_their_guild()
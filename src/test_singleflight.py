@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for in-flight request coalescing (services.singleflight)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream():
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"ok": calls}
+
+        results = await asyncio.gather(*(flight.do("GET:/v1/user", upstream) for _ in range(30)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(run())
+    assert calls == 1
+    assert all(r == {"ok": 1} for r in results)
+    assert flight.get_stats() == {'executed': 1, 'coalesced': 29, 'abandoned': 0, 'in_flight': 0}
+    print('✅ 30 identical calls -> 1 upstream request')
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def run():
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", upstream))
+        second = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        return flight, first, result
+
+    flight, first, result = asyncio.run(run())
+    assert first.cancelled()
+    assert result == "done"
+    assert flight.abandoned == 0
+    print('✅ Cancelling one waiter leaves the shared call running')
+
+
+def test_last_waiter_cancels_upstream():
+    async def run():
+        flight = SingleFlight()
+        upstream_cancelled = asyncio.Event()
+
+        async def upstream():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.wait_for(upstream_cancelled.wait(), 0.5)
+        return flight
+
+    flight = asyncio.run(run())
+    assert flight.abandoned == 1
+    assert flight.in_flight() == 0
+    print('✅ Upstream call cancelled once every waiter is gone')
+
+
+def test_errors_propagate_and_key_is_released():
+    async def run():
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        outcomes = await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+        retry = await flight.do("k", lambda: asyncio.sleep(0, result="fresh"))
+        return outcomes, retry
+
+    outcomes, retry = asyncio.run(run())
+    assert all(isinstance(o, ValueError) for o in outcomes)
+    assert retry == "fresh"
+    print('✅ Errors reach every waiter and the next call starts fresh')
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_upstream()
+    test_cancelled_waiter_does_not_cancel_others()
+    test_last_waiter_cancels_upstream()
+    test_errors_propagate_and_key_is_released()
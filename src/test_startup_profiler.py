@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the startup profiler (core.profiler) and the lazy plugin manifest
+"""
+
+import ast
+import sys
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.profiler import StartupProfiler
+
+PLUGINS = Path(__file__).parent / 'plugins'
+
+
+def test_imports_are_timed():
+    with tempfile.TemporaryDirectory() as tmp:
+        package = Path(tmp) / 'profiled_pkg'
+        package.mkdir()
+        (package / '__init__.py').write_text("import time\ntime.sleep(0.02)\nfrom . import child\n")
+        (package / 'child.py').write_text("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, tmp)
+        profiler = StartupProfiler.install()
+        try:
+            import profiled_pkg
+        finally:
+            profiler.uninstall()
+            sys.path.remove(tmp)
+
+    parent_self, parent_cumulative = profiler.imports['profiled_pkg']
+    child_self, child_cumulative = profiler.imports['profiled_pkg.child']
+    assert child_self >= 0.05 and parent_self >= 0.02
+    assert parent_self < 0.05                       # the child's sleep is not counted twice
+    assert parent_cumulative >= parent_self + child_cumulative - 0.001
+    assert profiler.import_seconds >= parent_cumulative
+    # Modules keep their real loader once imported
+    assert type(profiled_pkg.__loader__).__name__ == 'SourceFileLoader'
+    assert type(profiled_pkg.__spec__.loader).__name__ == 'SourceFileLoader'
+    assert profiler._finder is None and all(type(f).__name__ != '_ImportTimer' for f in sys.meta_path)
+    print('✅ Import self and cumulative times are recorded per module')
+
+
+def test_report_is_logged_and_written():
+    profiler = StartupProfiler()
+    profiler.imports = {'a': [0.01, 0.03], 'b': [0.02, 0.02]}
+    with profiler.phase('plugins'):
+        with profiler.plugin_stage('chat', 'import'):
+            pass
+        with profiler.plugin_stage('chat', 'setup'):
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'startup_profile.json'
+        report = profiler.finish(logging.getLogger('test'), str(path))
+        written = json.loads(path.read_text())
+
+    assert profiler.ready is not None and written['time_to_ready'] == report['time_to_ready']
+    assert [p['name'] for p in written['phases']] == ['plugins']
+    assert set(written['plugins']['chat']) == {'import', 'setup'}
+    assert [i['module'] for i in written['imports']] == ['a', 'b']     # by cumulative time
+    print('✅ Startup report is logged and written as JSON')
+
+
+def _declared_commands(source: str) -> dict:
+    """{name: aliases} for every @commands.command(...) in a plugin source file."""
+    declared = {}
+    for node in ast.walk(ast.parse(source)):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call) and ast.unparse(decorator.func) == 'commands.command':
+                options = {k.arg: ast.literal_eval(k.value) for k in decorator.keywords}
+                declared[options.get('name', node.name)] = options.get('aliases', [])
+    return declared
+
+
+def test_manifest_matches_plugins():
+    manifest = json.loads((PLUGINS / 'manifest.json').read_text())
+    for module, entry in manifest.items():
+        declared = {}
+        for path in sorted((PLUGINS / module).rglob('*.py')):
+            declared.update(_declared_commands(path.read_text(encoding='utf-8')))
+        assert entry['commands'] == declared, f"plugins/manifest.json is out of date for {module}"
+    packages = {p.name for p in PLUGINS.iterdir() if (p / '__init__.py').exists()}
+    assert set(manifest) == packages
+    print('✅ Manifest lists every plugin command and alias')
+
+
+if __name__ == "__main__":
+    test_imports_are_timed()
+    test_report_is_logged_and_written()
+    test_manifest_matches_plugins()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Test script for StraicoService against a local stub of the Straico API
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import web
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.bot import StraicoBot
+from services.cache import CachePolicy
+from services.compaction import HistoryCompactor
+from services.conversation import ConversationHistory
+from services.straico import StraicoService
+
+
+class StubApi:
+    """Minimal local Straico API; records every request it serves."""
+
+    def __init__(self, streaming="sse"):
+        # "sse" streams when asked, "reject" answers a streaming request with 400
+        self.streaming = streaming
+        self.requests = []
+        self.bodies = []
+        self.app = web.Application()
+        self.app.router.add_route('*', '/{tail:.*}', self.handle)
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append((request.method, request.path, request.headers.get('Authorization')))
+        if request.method == 'HEAD':
+            return web.Response()
+        if request.path == '/v1/prompt/completion':
+            body = await request.json()
+            self.bodies.append(body)
+            model = (body.get('models') or ['auto'])[0]
+            if body.get('stream'):
+                if self.streaming == "reject":
+                    return web.json_response({'error': 'unknown field: stream'}, status=400)
+                response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+                await response.prepare(request)
+                for word in ("streamed ", "tokens"):
+                    await response.write(f'data: {{"choices": [{{"delta": {{"content": "{word}"}}}}]}}\n\n'.encode())
+                await response.write(b'data: [DONE]\n\n')
+                return response
+            return web.json_response({'data': {'completions': {model: {'completion': {
+                'choices': [{'message': {'content': 'summary of the conversation'}}]}}}}})
+        if request.path == '/v1/user':
+            return web.json_response({'data': {'coins': 10, 'key': request.headers.get('Authorization')}})
+        return web.json_response({'data': {'path': request.path}})
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+    def probes(self):
+        return [r for r in self.requests if r[0] == 'HEAD']
+
+
+def test_warm_up_and_keepalive():
+    async def run():
+        async with StubApi() as api:
+            async with StraicoService("key", base_url=api.url, warm_connections=2,
+                                      keepalive_interval=0.05) as service:
+                assert await service.warm_up() == 2
+                assert len(api.probes()) == 2
+
+                # Idle, so the keepalive loop keeps probing in the background
+                await asyncio.sleep(0.3)
+                assert len(api.probes()) > 2
+                stats = service.get_stats()['connections']
+                assert stats['probes'] == len(api.probes()) and stats['probe_failures'] == 0
+            assert service.session.closed
+
+    asyncio.run(run())
+    print('✅ Service opens its session, warms connections and keeps them alive')
+
+
+def test_stale_refresh_keeps_pinned_key():
+    async def run():
+        async with StubApi() as api:
+            async with StraicoService("primary", base_url=api.url, extra_api_keys=["spare"],
+                                      key_refresh_interval=0, warm_connections=0) as service:
+                service._response_cache.policies["/v1/user"] = CachePolicy(ttl=0.05, stale_while_revalidate=60)
+                first = await service.get_user_info()
+                await asyncio.sleep(0.1)
+                # Served stale; the background refresh must use the same account
+                service._response_cache.policies["/v1/user"] = CachePolicy(ttl=60)
+                assert await service.get_user_info() == first
+                await asyncio.sleep(0.1)
+                refreshed = await service.get_user_info()
+
+        users = [auth for method, path, auth in api.requests if path == '/v1/user']
+        assert users == ["Bearer primary", "Bearer primary"]
+        assert refreshed['data']['key'] == "Bearer primary"
+
+    asyncio.run(run())
+    print('✅ Stale-while-revalidate refreshes with the key the entry was cached for')
+
+
+def test_summary_prompt_is_not_truncated():
+    async def run():
+        async with StubApi() as api:
+            async with StraicoService("key", base_url=api.url, warm_connections=0,
+                                      context_token_budget=4000) as service:
+                bot = SimpleNamespace(straico_service=service, config=SimpleNamespace(summary_model="openai/gpt-4o-mini"))
+                bot._extract_ai_response = lambda response: StraicoBot._extract_ai_response(bot, response)
+
+                history = ConversationHistory(max_history=50)
+                for i in range(24):
+                    history.add_message(1, "user", f"turn-{i} " + "word " * 400)
+                compactor = HistoryCompactor(history, lambda prompt: StraicoBot._summarize(bot, prompt),
+                                             threshold=24, keep_recent=4)
+                assert await compactor.compact(1)
+
+        # ~40 KB of folded turns, far past the 4000-token chat budget, all reach the model
+        prompt = api.bodies[-1]['message']
+        assert len(prompt) > 40_000
+        assert all(f"turn-{i} " in prompt for i in range(20))
+        assert not any(f"turn-{i} " in prompt for i in range(20, 24))
+        assert [m['content'] for m in history.get_history(1)][0].endswith("summary of the conversation")
+
+    asyncio.run(run())
+    print('✅ Every folded turn reaches the summary model')
+
+
+def test_streams_upstream_by_default():
+    async def run():
+        async with StubApi() as api:
+            async with StraicoService("key", base_url=api.url, warm_connections=0) as service:
+                chunks = [c async for c in service.stream_chat_completion("openai/gpt-4o", [{"role": "user", "content": "hi"}])]
+        assert chunks == ["streamed ", "tokens"]
+        assert api.bodies[-1]['stream'] is True
+
+    asyncio.run(run())
+    print('✅ Chat completions stream from upstream by default')
+
+
+def test_rejected_streaming_falls_back_to_buffered():
+    async def run():
+        async with StubApi(streaming="reject") as api:
+            async with StraicoService("key", base_url=api.url, warm_connections=0) as service:
+                messages = [{"role": "user", "content": "hi"}]
+                first = [c async for c in service.stream_chat_completion("openai/gpt-4o", messages)]
+                assert not service.upstream_streaming
+                second = [c async for c in service.stream_chat_completion("openai/gpt-4o", messages)]
+        assert "".join(first) == "".join(second) == "summary of the conversation"
+        # One rejected streaming request, then buffered requests only
+        assert [b.get('stream') for b in api.bodies] == [True, None, None]
+
+    asyncio.run(run())
+    print('✅ An endpoint that rejects streaming falls back to buffered completions')
+
+
+def test_limiter_backlog_does_not_hold_scheduler_slots():
+    async def run():
+        service = StraicoService("key", connection_pool_size=2)
+        service._concurrency["chat"].limit = 1.0
+        release = asyncio.Event()
+
+        async def chat():
+            async with service._admit("/v1/prompt/completion", None):
+                await release.wait()
+
+        chats = [asyncio.create_task(chat()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        # One chat runs; the rest wait on the chat limit without taking scheduler capacity
+        assert service._scheduler.in_flight == 1
+        assert service._concurrency["chat"].get_stats()['queued'] == 2
+
+        async with service._admit("/v1/image/generation", None):
+            assert service._scheduler.in_flight == 2
+
+        release.set()
+        await asyncio.gather(*chats)
+        assert service._scheduler.in_flight == 0
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    print('✅ Requests queued on their limiter leave scheduler slots to other classes')
+
+
+if __name__ == "__main__":
+    test_warm_up_and_keepalive()
+    test_stale_refresh_keeps_pinned_key()
+    test_summary_prompt_is_not_truncated()
+    test_streams_upstream_by_default()
+    test_rejected_streaming_falls_back_to_buffered()
+    test_limiter_backlog_does_not_hold_scheduler_slots()
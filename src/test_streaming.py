@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for progressive Discord replies (utils.streaming)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the current directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import utils.streaming as streaming
+from utils.streaming import StreamingReply
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def with_clock(test):
+    def wrapper():
+        clock = FakeClock()
+        original = streaming.time
+        streaming.time = clock
+        try:
+            test(clock)
+        finally:
+            streaming.time = original
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+class FakeMessage:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+        self.edits = []
+        self.deleted = False
+
+    async def edit(self, content):
+        self.content = content
+        self.edits.append(content)
+
+    async def delete(self):
+        self.deleted = True
+
+
+class FakeChannel:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content):
+        message = FakeMessage(self, content)
+        self.messages.append(message)
+        return message
+
+
+@with_clock
+def test_edits_are_coalesced(clock):
+    async def run():
+        channel = FakeChannel()
+        reply = StreamingReply(channel, edit_interval=1.0)
+        await reply.start()
+        message = channel.messages[0]
+        assert message.content == reply.placeholder
+
+        await reply.append("Hello")
+        await reply.append(", ")
+        assert message.edits == []              # still inside the first interval
+
+        clock.now += 1.0
+        await reply.append("world")
+        assert message.edits == ["Hello, world"]
+
+        clock.now += 0.5
+        await reply.append("!")
+        assert len(message.edits) == 1
+
+        assert await reply.finish() == "Hello, world!"
+        assert message.edits == ["Hello, world", "Hello, world!"]
+        assert len(channel.messages) == 1
+
+    asyncio.run(run())
+    print('✅ Chunks are coalesced into at most one edit per interval')
+
+
+@with_clock
+def test_rolls_over_at_max_length(clock):
+    async def run():
+        channel = FakeChannel()
+        reply = StreamingReply(channel, max_length=2000, edit_interval=0)
+        words = [f"word{i:04d}" for i in range(450)]         # ~4000 characters
+        await reply.start()
+        for word in words:
+            await reply.append(word + " ")
+        text = await reply.finish()
+
+        assert text == " ".join(words)
+        assert len(channel.messages) == 3
+        shown = [m.content for m in channel.messages]
+        assert all(len(content) <= 2000 for content in shown)
+        # Splits land on word boundaries and lose nothing
+        assert "".join(shown).split() == words
+        assert reply.messages == channel.messages
+
+    asyncio.run(run())
+    print('✅ Output rolls over into new messages at 2000 characters')
+
+
+@with_clock
+def test_failed_stream_drops_placeholder(clock):
+    async def failing():
+        raise RuntimeError("upstream down")
+        yield ""
+
+    async def run():
+        channel = FakeChannel()
+        reply = StreamingReply(channel)
+        try:
+            await reply.consume(failing())
+            raise AssertionError("expected RuntimeError")
+        except RuntimeError:
+            pass
+        assert channel.messages[0].deleted and reply.messages == []
+
+    asyncio.run(run())
+    print('✅ A stream that fails before any text removes its placeholder')
+
+
+@with_clock
+def test_failure_after_text_keeps_partial_reply(clock):
+    async def partial():
+        yield "Partial answer"
+        raise RuntimeError("connection reset")
+
+    async def run():
+        channel = FakeChannel()
+        reply = StreamingReply(channel, edit_interval=0)
+        try:
+            await reply.consume(partial())
+            raise AssertionError("expected RuntimeError")
+        except RuntimeError:
+            pass
+        message = channel.messages[0]
+        assert not message.deleted and message.content == "Partial answer"
+        assert reply.messages == [message]
+
+    asyncio.run(run())
+    print('✅ A stream that fails midway keeps the text already shown')
+
+
+@with_clock
+def test_empty_stream_finalizes_with_notice(clock):
+    async def empty():
+        yield "   "
+
+    async def run():
+        channel = FakeChannel()
+        reply = StreamingReply(channel)
+        assert await reply.consume(empty()) is None
+        assert channel.messages[0].content == "Sorry, I could not generate a response."
+
+    asyncio.run(run())
+    print('✅ An empty completion replaces the placeholder with a notice')
+
+
+if __name__ == "__main__":
+    test_edits_are_coalesced()
+    test_rolls_over_at_max_length()
+    test_failed_stream_drops_placeholder()
+    test_failure_after_text_keeps_partial_reply()
+    test_empty_stream_finalizes_with_notice()
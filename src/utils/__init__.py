@@ -1,6 +1,6 @@
 # Utils module - import on demand to avoid dependency issues
 
-__all__ = ['validate_model', 'validate_prompt', 'format_error_message', 'format_success_message']
+__all__ = ['validate_model', 'validate_prompt', 'format_error_message', 'format_success_message', 'StreamingReply']
 
 def get_validators():
     from .validators import validate_model, validate_prompt
@@ -8,4 +8,8 @@ def get_validators():
 
 def get_formatters():
     from .formatters import format_error_message, format_success_message
-    return format_error_message, format_success_message
\ No newline at end of file
+    return format_error_message, format_success_message
+
+def get_streaming_reply():
+    from .streaming import StreamingReply
+    return StreamingReply
\ No newline at end of file
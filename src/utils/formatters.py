@@ -1,5 +1,10 @@
 import discord
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+# Discord rejects embeds past these limits with a 400
+EMBED_MAX_FIELDS = 25
+EMBED_MAX_FIELD_VALUE = 1024
+EMBED_MAX_TOTAL = 6000
 
 
 def format_error_message(error: str, title: str = "Error") -> discord.Embed:
@@ -52,6 +57,44 @@ def format_model_list(models: list, title: str = "Available Models", chunk_size:
     return embed
 
 
+def chunk_lines(lines: Iterable[str], max_lines: int = 15, max_chars: int = EMBED_MAX_FIELD_VALUE) -> List[List[str]]:
+    """Group lines so each group has at most ``max_lines`` and joins to at most ``max_chars``."""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        line = truncate_text(line, max_chars)
+        if current and (len(current) >= max_lines or size + 1 + len(line) > max_chars):
+            chunks.append(current)
+            current, size = [], 0
+        size += len(line) + (1 if current else 0)
+        current.append(line)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def format_model_embeds(sections: Iterable[Tuple[str, List[str]]], title: str = "Available Models",
+                        footer: Optional[str] = None, chunk_size: int = 15) -> List[discord.Embed]:
+    """Model lists as embed fields of ``chunk_size`` models, split over several embeds
+    when one would pass Discord's field count or total length limits."""
+    embeds = [discord.Embed(title=title, color=0x0099ff)]
+    reserved = len(footer or "")
+
+    for label, models in sections:
+        for i, chunk in enumerate(chunk_lines(models, chunk_size)):
+            name = label if i == 0 else f"{label} (cont. {i+1})"
+            value = "\n".join(chunk)
+            embed = embeds[-1]
+            if (len(embed.fields) >= EMBED_MAX_FIELDS
+                    or len(embed) + len(name) + len(value) + reserved > EMBED_MAX_TOTAL):
+                embed = discord.Embed(title=f"{title} (cont.)", color=0x0099ff)
+                embeds.append(embed)
+            embed.add_field(name=name, value=value, inline=True)
+
+    if footer:
+        embeds[-1].set_footer(text=footer)
+    return embeds
+
+
 def truncate_text(text: str, max_length: int = 100) -> str:
     if len(text) <= max_length:
         return text
@@ -0,0 +1,94 @@
+import time
+from typing import AsyncIterator, List, Optional
+
+
+class StreamingReply:
+    """Progressively edits a Discord message as completion text arrives.
+
+    A placeholder is posted up front, incoming text is coalesced and flushed
+    with at most one edit per ``edit_interval`` seconds, and output rolls over
+    into a new message once ``max_length`` is reached.
+    """
+
+    def __init__(self, channel, max_length: int = 2000, edit_interval: float = 1.0,
+                 placeholder: str = "⏳ Thinking..."):
+        self.channel = channel
+        self.max_length = max_length
+        self.edit_interval = edit_interval
+        self.placeholder = placeholder
+
+        self.messages: List = []
+        self._parts: List[str] = []
+        self._current = ""          # text already shown in the active message
+        self._pending = ""          # text received but not yet shown
+        self._last_edit = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts) + self._current + self._pending
+
+    async def start(self):
+        self.messages.append(await self.channel.send(self.placeholder))
+        self._last_edit = time.monotonic()
+
+    async def append(self, delta: str):
+        if not delta:
+            return
+        self._pending += delta
+        if time.monotonic() - self._last_edit >= self.edit_interval:
+            await self._flush()
+
+    async def finish(self, empty_text: str = "Sorry, I could not generate a response.") -> Optional[str]:
+        """Flush remaining text; returns the full response or None if nothing arrived."""
+        await self._flush()
+        full_text = "".join(self._parts) + self._current
+        if not full_text.strip():
+            await self._edit(self.messages[-1], empty_text)
+            return None
+        return full_text.strip()
+
+    async def abort(self):
+        """Drop the placeholder if the stream failed before producing any text."""
+        if self.messages and not self.text.strip():
+            try:
+                await self.messages[-1].delete()
+            except Exception:
+                pass
+            self.messages.pop()
+
+    async def consume(self, chunks: AsyncIterator[str]) -> Optional[str]:
+        await self.start()
+        try:
+            async for delta in chunks:
+                await self.append(delta)
+        except BaseException:
+            await self.abort()
+            raise
+        return await self.finish()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+
+        combined = self._current + self._pending
+        self._pending = ""
+
+        while len(combined) > self.max_length:
+            split_at = combined.rfind('\n', 0, self.max_length)
+            if split_at <= 0:
+                split_at = combined.rfind(' ', 0, self.max_length)
+            if split_at <= 0:
+                split_at = self.max_length
+
+            head, combined = combined[:split_at], combined[split_at:]
+            await self._edit(self.messages[-1], head)
+            self._parts.append(head)
+            self.messages.append(await self.channel.send("…"))
+
+        self._current = combined
+        if combined.strip():
+            await self._edit(self.messages[-1], combined)
+        self._last_edit = time.monotonic()
+
+    async def _edit(self, message, content: str):
+        await message.edit(content=content)
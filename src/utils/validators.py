@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Optional, List, Union
 try:
-    from config.models import STRAICO_MODELS, STRAICO_IMAGE_MODELS
+    from services.model_catalog import IMAGE, ModelCatalog, ModelIndex
     from core.errors import ValidationError
 except ImportError:
     # Fallback for when running as standalone module
@@ -8,25 +8,39 @@ except ImportError:
     from pathlib import Path
     src_path = Path(__file__).parent.parent
     sys.path.insert(0, str(src_path))
-    from config.models import STRAICO_MODELS, STRAICO_IMAGE_MODELS
+    from services.model_catalog import IMAGE, ModelCatalog, ModelIndex
     from core.errors import ValidationError
 
+_builtin_index: Optional[ModelIndex] = None
 
-def validate_model(model_name: str, model_list: List[str] = None) -> str:
-    if model_list is None:
-        model_list = STRAICO_MODELS
+
+def validate_model(model_name: str, catalog: Union[ModelCatalog, ModelIndex, List[str], None] = None,
+                   category: Optional[str] = None) -> str:
+    """Catalog id for ``model_name`` (case-insensitive), optionally limited to one category.
+
+    Pass the bot's ``model_catalog`` to check against the live list; without
+    one the built-in lists from config.models are used.
+    """
+    global _builtin_index
+    if catalog is None:
+        if _builtin_index is None:
+            _builtin_index = ModelIndex.builtin()
+        catalog = _builtin_index
+    elif isinstance(catalog, (list, tuple)):
+        catalog = ModelIndex.from_models(catalog)
 
     if not model_name:
         raise ValidationError("Model name cannot be empty")
 
-    if model_name not in model_list:
-        similar = [m for m in model_list if model_name.lower() in m.lower()]
+    model = catalog.resolve(model_name)
+    if model is None or (category is not None and catalog.category(model) != category):
+        similar = catalog.suggest(model_name, limit=3, category=category)
         if similar:
-            raise ValidationError(f"Model '{model_name}' not found. Did you mean: {', '.join(similar[:3])}?")
+            raise ValidationError(f"Model '{model_name}' not found. Did you mean: {', '.join(similar)}?")
         else:
             raise ValidationError(f"Model '{model_name}' not found")
 
-    return model_name
+    return model
 
 
 def validate_prompt(prompt: str, min_length: int = 1, max_length: int = 1000) -> str:
@@ -44,8 +58,8 @@ def validate_prompt(prompt: str, min_length: int = 1, max_length: int = 1000) ->
     return prompt
 
 
-def validate_image_model(model_name: str) -> str:
-    return validate_model(model_name, STRAICO_IMAGE_MODELS)
+def validate_image_model(model_name: str, catalog: Union[ModelCatalog, ModelIndex, None] = None) -> str:
+    return validate_model(model_name, catalog, category=IMAGE)
 
 
 def validate_variations(variations: int) -> int: